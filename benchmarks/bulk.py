@@ -0,0 +1,67 @@
+# benchmarks/bulk.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Throughput of i18n.bulk.render as the number of worker processes grows, for rows of a synthetic
+# domain rendered in several languages, compared with rendering them in this process (0 workers)
+#
+# Usage: python benchmarks/bulk.py [rows [languages [workers ...]]]
+
+import logging, os, sys, tempfile, time
+import i18n
+from i18n import bulk, po
+from po_load import synthetic_po
+
+
+def synthetic_rows(_count: int, _messages: int) -> list[tuple]:
+# Rows of the messages without context of synthetic_po(_messages)
+  rows = []
+  text_dict = { 'names': 'Alex', 'pronoun': 'they' }
+  for i in range(_count):
+    m = (i * 7) % _messages
+    if m % 3 == 0:
+      rows.append(( f'/sentence/{m}', None, None, text_dict, None ))
+    elif m % 3 == 1:
+      rows.append(( f'/sentence/{m}', f'/sentence/{m}/plural', i % 5, text_dict, None ))
+    else:
+      rows.append(( f'/sentence/{m - 1}', f'/sentence/{m - 1}/plural', i % 5, text_dict, None ))
+  return rows
+
+
+def main(_count: int, _language_count: int, _workers: list[int]) -> None:
+
+  with tempfile.TemporaryDirectory() as dirpath:
+    mo_data = po.compile_po(synthetic_po(1000))
+    languages = [ f'l{i}' for i in range(_language_count) ]
+    for language in languages:
+      os.makedirs(os.path.join(dirpath, language, 'LC_MESSAGES'))
+      with open(os.path.join(dirpath, language, 'LC_MESSAGES', 'bench.mo'), 'wb') as fp:
+        fp.write(mo_data)
+    t_domain = i18n.TranslationDomain('bench', locdirpath = dirpath)
+    rows = synthetic_rows(_count, 1000)
+
+    print(f'{_count} rows in {_language_count} languages, {os.cpu_count()} CPUs')
+    print(f"{'workers':>7} {'seconds':>9} {'strings/s':>11} {'speedup':>8}")
+    base = None
+    for workers in _workers:
+      start = time.perf_counter()
+      for strings in bulk.render(rows, t_domain, languages = languages, workers = workers):
+        pass
+      seconds = time.perf_counter() - start
+      rate = _count * _language_count / seconds
+      base = rate if base == None else base
+      print(f'{workers:>7} {seconds:>9.3f} {rate:>11.0f} {rate / base:>7.2f}x')
+
+  return None
+
+
+mainName = '__main__'
+
+if __name__ == mainName:
+
+  logging.getLogger(None).setLevel(logging.ERROR)
+  main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, int(sys.argv[2]) if len(sys.argv) > 2 else 8, [ int(w) for w in sys.argv[3:] ] or [ 0, 1, 2, 4, 8 ])
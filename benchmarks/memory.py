@@ -0,0 +1,64 @@
+# benchmarks/memory.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Bytes per instance of the translation classes
+#
+# Usage: python benchmarks/memory.py [count]
+
+import i18n, logging, sys, tracemalloc
+
+
+def shallow_size(_obj: object) -> int:
+# Size of the instance, plus its __dict__ if it has one
+  size = sys.getsizeof(_obj)
+  if hasattr(_obj, '__dict__'):
+    size += sys.getsizeof(_obj.__dict__)
+  return size
+
+
+def allocated_per_instance(_factory, _count: int) -> float:
+# Average bytes allocated by _count calls of _factory, keeping the results alive
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  instances = [ _factory(i) for i in range(_count) ]
+  after = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  del instances
+  return (after - before) / _count
+
+
+def main(_count: int) -> None:
+
+  t_langs = i18n.TranslationLanguages('en')
+  pt = t_langs.pronouns
+  ctc = t_langs.conjunctions
+  tdl = pt._translation_domain_language
+  contexts = [ f'context-{i}' for i in range(_count) ]
+  tt = ctc._translation
+
+  print(f"{'class':<28} {'shallow bytes':>14}")
+  for obj in ( t_langs, tdl._translation_domain, tdl, tt, pt, ctc ):
+    print(f'{type(obj).__qualname__:<28} {shallow_size(obj):>14}')
+
+  print('')
+  print(f"{'allocated per instance':<28} {'bytes':>14}")
+  bytes_per_instance = allocated_per_instance(lambda i: i18n.TranslationContext(tt, contexts[i]), _count)
+  print(f"{'TranslationContext':<28} {bytes_per_instance:>14.1f}")
+  bytes_per_instance = allocated_per_instance(lambda i: i18n.Translation(tdl), min(_count, 1000))
+    # list entry + Translation + its template cache dict
+  print(f"{'Translation':<28} {bytes_per_instance:>14.1f}")
+
+  return None
+
+
+mainName = '__main__'
+
+if __name__ == mainName:
+
+  logging.getLogger(None).setLevel(logging.ERROR)
+  main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,68 @@
+# benchmarks/mo_load.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Load time, memory allocated by loading and lookup time of synthetic catalogs:
+# gettext.GNUTranslations compared with MappedTranslations
+#
+# Usage: python benchmarks/mo_load.py [messages ...]
+
+import gettext, logging, os, sys, tempfile, time, tracemalloc
+from i18n import MappedTranslations, po
+from po_load import best_of, synthetic_po
+
+
+def load(_class: type, _mofilepath: str) -> gettext.NullTranslations:
+  with open(_mofilepath, 'rb') as fp:
+    return _class(fp)
+
+
+def allocated(_class: type, _mofilepath: str) -> int:
+  tracemalloc.start()
+  translations = load(_class, _mofilepath)
+  size = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  return size
+
+
+def first_lookups(_class: type, _mofilepath: str, _msgids: list[str]) -> float:
+# Seconds for looking up each msgid once in a newly loaded catalog, without the load time
+  times = []
+  for i in range(5):
+    translations = load(_class, _mofilepath)
+    start = time.perf_counter()
+    for msgid in _msgids:
+      translations.gettext(msgid)
+    times.append(time.perf_counter() - start)
+  return min(times)
+
+
+def main(_counts: list[int]) -> None:
+
+  print(f"{'messages':>9} {'class':<20} {'load':>11} {'allocated':>12} {'first lookup':>13} {'next lookup':>12}")
+  with tempfile.TemporaryDirectory() as dirpath:
+    for count in _counts:
+      mofilepath = os.path.join(dirpath, f'{count}.mo')
+      with open(mofilepath, 'wb') as fp:
+        fp.write(po.compile_po(synthetic_po(count)))
+      msgids = [ f'/sentence/{i}' for i in range(0, count, max(1, count // 1000)) ]
+
+      for _class in ( gettext.GNUTranslations, MappedTranslations ):
+        translations = load(_class, mofilepath)
+        lookup_seconds = best_of(lambda: [ translations.gettext(msgid) for msgid in msgids ])
+        first_lookup_seconds = first_lookups(_class, mofilepath, msgids)
+        print(f'{count:>9} {_class.__name__:<20} {best_of(lambda: load(_class, mofilepath)) * 1000:>8.2f} ms {allocated(_class, mofilepath) / 1024:>9.0f} kB {first_lookup_seconds * 1e6 / len(msgids):>10.2f} us {lookup_seconds * 1e6 / len(msgids):>9.2f} us')
+
+  return None
+
+
+mainName = '__main__'
+
+if __name__ == mainName:
+
+  logging.getLogger(None).setLevel(logging.ERROR)
+  main([ int(arg) for arg in sys.argv[1:] ] or [ 1000, 10000, 100000 ])
@@ -0,0 +1,81 @@
+# benchmarks/po_load.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Load time of synthetic catalogs: gettext.GNUTranslations on a *.mo file
+# compared with compiling the *.po file in memory and with the *.mo cache
+#
+# Usage: python benchmarks/po_load.py [messages ...]
+
+import gettext, logging, os, sys, tempfile, time
+from i18n import po
+
+
+po_header: str = '''msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=n != 1;\\n"
+
+'''
+
+
+def synthetic_po(_count: int) -> bytes:
+# One third of the messages have plural forms, one third have a context
+  lines = [ po_header ]
+  for i in range(_count):
+    match i % 3:
+      case 0:
+        lines.append(f'msgid "/sentence/{i}"\nmsgstr "When {{names}} goes out to eat, {{pronoun}} orders number {i}."\n\n')
+      case 1:
+        lines.append(f'msgid "/sentence/{i}"\nmsgid_plural "/sentence/{i}/plural"\nmsgstr[0] "{{names}} orders {i} item."\nmsgstr[1] "{{names}} order {i} items."\n\n')
+      case 2:
+        lines.append(f'msgctxt "context-{i % 10}"\nmsgid "/sentence/{i}"\nmsgstr "Context sentence {i}."\n\n')
+  return ''.join(lines).encode('utf-8')
+
+
+def best_of(_function, _repeat: int = 5) -> float:
+  times = []
+  for i in range(_repeat):
+    start = time.perf_counter()
+    _function()
+    times.append(time.perf_counter() - start)
+  return min(times)
+
+
+def main(_counts: list[int]) -> None:
+
+  print(f"{'messages':>9} {'GNUTranslations .mo':>20} {'.po in memory':>14} {'.po cached .mo':>15}")
+  with tempfile.TemporaryDirectory() as dirpath:
+    for count in _counts:
+      data = synthetic_po(count)
+      pofilepath = os.path.join(dirpath, f'{count}.po')
+      mofilepath = os.path.join(dirpath, f'{count}.mo')
+      with open(pofilepath, 'wb') as fp:
+        fp.write(data)
+      with open(mofilepath, 'wb') as fp:
+        fp.write(po.compile_po(data))
+      cache_dirpath = os.path.join(dirpath, 'cache')
+      po.load_po(pofilepath, cache_dirpath)
+
+      def load_mo():
+        with open(mofilepath, 'rb') as fp:
+          gettext.GNUTranslations(fp)
+
+      mo_seconds = best_of(load_mo)
+      po_seconds = best_of(lambda: po.load_po(pofilepath))
+      cached_seconds = best_of(lambda: po.load_po(pofilepath, cache_dirpath))
+      print(f'{count:>9} {mo_seconds * 1000:>17.2f} ms {po_seconds * 1000:>11.2f} ms {cached_seconds * 1000:>12.2f} ms')
+
+  return None
+
+
+mainName = '__main__'
+
+if __name__ == mainName:
+
+  logging.getLogger(None).setLevel(logging.ERROR)
+  main([ int(arg) for arg in sys.argv[1:] ] or [ 1000, 10000, 100000 ])
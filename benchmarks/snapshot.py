@@ -0,0 +1,74 @@
+# benchmarks/snapshot.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Cold start: time for a new process to import i18n, load a synthetic domain in every language
+# and translate one string in each, and the maximum resident set size of the process, for
+# *.mo files with gettext.GNUTranslations, *.mo files with MappedTranslations and a CatalogSnapshot
+#
+# Usage: python benchmarks/snapshot.py [languages [messages]]
+
+import json, logging, os, subprocess, sys, tempfile
+import i18n
+from i18n import po
+from po_load import synthetic_po
+
+
+child_script: str = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import i18n
+( mode, locdirpath, snapshot_filepath, languages ) = ( sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4:] )
+if mode == 'MappedTranslations':
+  i18n.Translation.catalog_class = i18n.MappedTranslations
+elif mode == 'CatalogSnapshot':
+  i18n.use_snapshot(snapshot_filepath)
+t_domain = i18n.TranslationDomain('bench', locdirpath = locdirpath)
+for language in languages:
+  i18n.Translation(i18n.TranslationDomainLanguage(t_domain, i18n.TranslationLanguages(language))).get('/sentence/3', { 'names': 'Alex', 'pronoun': 'they' })
+print(json.dumps({ 'seconds': time.perf_counter() - start, 'maxrss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss }))
+'''
+
+
+def cold_start(_mode: str, _locdirpath: str, _snapshot_filepath: str, _languages: list[str], _repeat: int = 5) -> dict:
+# Best of _repeat new processes
+  environment = dict(os.environ, PYTHONPATH = os.pathsep.join(sys.path))
+  results = []
+  for i in range(_repeat):
+    output = subprocess.run([ sys.executable, '-c', child_script, _mode, _locdirpath, _snapshot_filepath, *_languages ], env = environment, capture_output = True, check = True, text = True).stdout
+    results.append(json.loads(output))
+  return min(results, key = lambda result: result['seconds'])
+
+
+def main(_language_count: int, _count: int) -> None:
+
+  with tempfile.TemporaryDirectory() as dirpath:
+    locdirpath = os.path.join(dirpath, 'locales')
+    mo_data = po.compile_po(synthetic_po(_count))
+    languages = [ f'l{i}' for i in range(_language_count) ]
+    for language in languages:
+      os.makedirs(os.path.join(locdirpath, language, 'LC_MESSAGES'))
+      with open(os.path.join(locdirpath, language, 'LC_MESSAGES', 'bench.mo'), 'wb') as fp:
+        fp.write(mo_data)
+    snapshot_filepath = os.path.join(dirpath, 'bench.snapshot')
+    i18n.build_snapshot(snapshot_filepath, [ i18n.TranslationDomain('bench', locdirpath = locdirpath) ])
+
+    print(f'{_language_count} languages of {_count} messages')
+    print(f"{'catalogs':<20} {'cold start':>11} {'max RSS':>10}")
+    for mode in ( 'GNUTranslations', 'MappedTranslations', 'CatalogSnapshot' ):
+      result = cold_start(mode, locdirpath, snapshot_filepath, languages)
+      print(f"{mode:<20} {result['seconds'] * 1000:>8.1f} ms {result['maxrss'] / 1024:>7.1f} MB")
+
+  return None
+
+
+mainName = '__main__'
+
+if __name__ == mainName:
+
+  logging.getLogger(None).setLevel(logging.ERROR)
+  main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
@@ -0,0 +1,196 @@
+# benchmarks/suite.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Time per call of the translation hot paths, and load time of synthetic catalogs of 1k, 10k
+# and 100k messages. Each benchmark is calibrated to a number of loops per sample (as pyperf does),
+# then timed for a number of samples, and the results are written as JSON to compare commits.
+#
+# Usage:
+#   python benchmarks/suite.py --output base.json                  # on the base commit
+#   python benchmarks/suite.py --output new.json --compare base.json --max-regression 10
+#   python benchmarks/suite.py --budget budget.json                # { "<benchmark>": <max median in us>, ... }
+#   python benchmarks/suite.py --filter load --fast
+#
+# Exit status 1 if a benchmark is slower than --max-regression percent of --compare, or its median is over --budget
+
+import argparse, datetime, gc, gettext, json, logging, os, platform, statistics, subprocess, sys, tempfile, time
+import i18n
+from i18n import po
+from po_load import synthetic_po
+
+
+results_version: int = 1
+  # Changed when the format of the JSON results changes
+
+
+def time_benchmark(_function, _samples: int, _min_sample_seconds: float, _gc: bool = False) -> dict:
+# Seconds per call of _function
+# _gc - True to keep garbage collection enabled while timing, ex: for benchmarks that allocate a lot
+  loops = 1
+  while True:
+    seconds = _time_loops(_function, loops, _gc)
+    if seconds >= _min_sample_seconds or loops >= 1 << 24:
+      break
+    loops *= 2 if seconds == 0 else max(2, min(10, int(_min_sample_seconds / seconds) + 1))
+  _time_loops(_function, loops, _gc)
+    # Warmup
+  values = [ _time_loops(_function, loops, _gc) / loops for i in range(_samples) ]
+  return { 'loops': loops, 'median': statistics.median(values), 'mean': statistics.fmean(values), 'stdev': statistics.stdev(values) if len(values) > 1 else 0.0, 'min': min(values), 'values': values }
+
+
+def _time_loops(_function, _loops: int, _gc: bool) -> float:
+  gc_was_enabled = gc.isenabled()
+  if not _gc:
+    gc.disable()
+  try:
+    loops = range(_loops)
+    start = time.perf_counter()
+    for i in loops:
+      _function()
+    return time.perf_counter() - start
+  finally:
+    if gc_was_enabled:
+      gc.enable()
+
+
+def hot_path_benchmarks(_locdirpath: str) -> dict:
+# Name and function of each benchmark on the synthetic 'bench' domain in _locdirpath
+  Person = i18n.PronounTranslation.PronounPersonEnum
+  Gender = i18n.PronounTranslation.GenderEnum
+  Subject = i18n.PronounTranslation.PronounTypeEnum.Subject
+  t_domain = i18n.TranslationDomain('bench', locdirpath = _locdirpath)
+  t_langs = i18n.TranslationLanguages('en_US', 'en')
+  pt = t_langs.pronouns
+  tt = i18n.Translation(i18n.TranslationDomainLanguage(t_domain, t_langs))
+  ttc = i18n.TranslationContext(tt, 'context-5')
+  text_dict = { 'names': 'Alex', 'pronoun': 'they' }
+  subject = i18n.Subject(Person.Third_Person, 1, Gender.Female, [ 'Alex' ])
+  output_cache = i18n.OutputCache()
+    # Not enabled, so that it is only used by its own benchmark
+
+  return {
+    'Translation.get': lambda: tt.get('/sentence/3'),
+    'Translation.get text_dict': lambda: tt.get('/sentence/3', text_dict),
+    'Translation.nget': lambda: tt.nget('/sentence/4', '/sentence/4/plural', 2),
+    'Translation.nget text_dict': lambda: tt.nget('/sentence/4', '/sentence/4/plural', 2, text_dict, Person.Third_Person),
+    'Translation.render_with_subject': lambda: tt.render_with_subject('/sentence/3', None, subject = subject),
+    'OutputCache hit nget': lambda: output_cache._render(tt, None, '/sentence/4', '/sentence/4/plural', 2, None, None),
+    'OutputCache hit nget text_dict': lambda: output_cache._render(tt, None, '/sentence/4', '/sentence/4/plural', 2, text_dict, Person.Third_Person),
+    'TranslationContext.get (pgettext)': lambda: ttc.get('/sentence/5'),
+    'TranslationContext.nget (npgettext)': lambda: ttc.nget('/sentence/5', '/sentence/5/plural', 2),
+    'PronounTranslation.pronoun': lambda: pt.pronoun(Subject, Person.Third_Person, 1, gender = Gender.Female),
+    'PronounTranslation.pronoun_subject': lambda: pt.pronoun_subject(Person.First_Person, 3),
+    'PronounTranslation.determiner': lambda: pt.determiner(Person.Second_Person, 2),
+    'TranslationLanguages()': lambda: i18n.TranslationLanguages('en_US', 'en'),
+    'TranslationLanguages.pronouns': lambda: t_langs.pronouns,
+    'TranslationLanguages.join_names': lambda: t_langs.join_names([ 'Alex', 'Kenny', 'Martin' ]),
+  }
+
+
+def load_benchmarks(_dirpath: str, _counts: list[int]) -> dict:
+# Name and function of the load benchmarks for catalogs of each of _counts messages
+  benchmarks = dict()
+  for count in _counts:
+    locdirpath = os.path.join(_dirpath, f'load-{count}')
+    for ( language, extension ) in ( ( 'mo', 'mo' ), ( 'po', 'po' ) ):
+      os.makedirs(os.path.join(locdirpath, language, 'LC_MESSAGES'))
+      data = synthetic_po(count)
+      with open(os.path.join(locdirpath, language, 'LC_MESSAGES', f'bench.{extension}'), 'wb') as fp:
+        fp.write(po.compile_po(data) if extension == 'mo' else data)
+    t_domain = i18n.TranslationDomain('bench', locdirpath = locdirpath)
+    for ( language, description ) in ( ( 'mo', 'mo' ), ( 'po', 'po compiled in memory' ) ):
+      tdl = i18n.TranslationDomainLanguage(t_domain, i18n.TranslationLanguages(language))
+      benchmarks[f'load {count} {description}'] = ( lambda tdl = tdl: i18n.Translation._load(tdl) )
+  return benchmarks
+
+
+def metadata() -> dict:
+  try:
+    commit = subprocess.run([ 'git', 'rev-parse', 'HEAD' ], cwd = os.path.dirname(os.path.abspath(__file__)), capture_output = True, check = True, text = True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    commit = None
+  return { 'version': results_version, 'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec = 'seconds'), 'commit': commit, 'python': platform.python_implementation() + ' ' + platform.python_version(), 'platform': platform.platform(), 'optimize': sys.flags.optimize }
+
+
+def compare(_results: dict, _base: dict, _max_regression: float | None) -> list[str]:
+# Prints the change of the median of each benchmark, returns the names of the benchmarks slower than _max_regression percent
+  regressions = []
+  print('')
+  print(f"{'benchmark':<40} {'base':>12} {'current':>12} {'change':>9}")
+  for name, result in _results['benchmarks'].items():
+    base = _base['benchmarks'].get(name)
+    if base == None:
+      print(f"{name:<40} {'-':>12} {result['median'] * 1e6:>9.3f} us {'new':>9}")
+      continue
+    change = (result['median'] / base['median'] - 1) * 100
+    slower = _max_regression != None and change > _max_regression
+    if slower:
+      regressions.append(name)
+    print(f"{name:<40} {base['median'] * 1e6:>9.3f} us {result['median'] * 1e6:>9.3f} us {change:>+8.1f}%{' !' if slower else ''}")
+  return regressions
+
+
+def main(_arguments: argparse.Namespace) -> int:
+
+  samples = 5 if _arguments.fast else 20
+  min_sample_seconds = 0.01 if _arguments.fast else 0.05
+  results = { 'metadata': metadata(), 'benchmarks': dict() }
+
+  with tempfile.TemporaryDirectory() as dirpath:
+    locdirpath = os.path.join(dirpath, 'locales')
+    for language in ( 'en', 'en_US' ):
+      os.makedirs(os.path.join(locdirpath, language, 'LC_MESSAGES'))
+      with open(os.path.join(locdirpath, language, 'LC_MESSAGES', 'bench.mo'), 'wb') as fp:
+        fp.write(po.compile_po(synthetic_po(1000)))
+
+    benchmarks = { name: ( function, False ) for name, function in hot_path_benchmarks(locdirpath).items() }
+    benchmarks.update({ name: ( function, True ) for name, function in load_benchmarks(dirpath, _arguments.load_counts).items() })
+    print(f"{'benchmark':<40} {'median':>12} {'stdev':>12} {'loops':>9}")
+    for name, ( function, keep_gc ) in benchmarks.items():
+      if _arguments.filter != None and _arguments.filter not in name:
+        continue
+      result = time_benchmark(function, samples, min_sample_seconds, keep_gc)
+      results['benchmarks'][name] = result
+      print(f"{name:<40} {result['median'] * 1e6:>9.3f} us {result['stdev'] * 1e6:>9.3f} us {result['loops']:>9}")
+
+  if _arguments.output != None:
+    with open(_arguments.output, 'w', encoding = 'utf-8') as fp:
+      json.dump(results, fp, indent = 1)
+
+  failed = []
+  if _arguments.compare != None:
+    with open(_arguments.compare, encoding = 'utf-8') as fp:
+      failed += compare(results, json.load(fp), _arguments.max_regression)
+  if _arguments.budget != None:
+    with open(_arguments.budget, encoding = 'utf-8') as fp:
+      budget = json.load(fp)
+    for name, microseconds in budget.items():
+      result = results['benchmarks'].get(name)
+      if result != None and result['median'] * 1e6 > microseconds:
+        print(f"Over budget: {name} {result['median'] * 1e6:.3f} us > {microseconds} us")
+        failed.append(name)
+  if len(failed) > 0:
+    print(f'{len(failed)} benchmarks slower than allowed: {", ".join(dict.fromkeys(failed))}')
+    return 1
+  return 0
+
+
+mainName = '__main__'
+
+if __name__ == mainName:
+
+  parser = argparse.ArgumentParser(description = 'Benchmarks of the translation hot paths and of catalog loading')
+  parser.add_argument('--output', '-o', help = 'JSON file for the results')
+  parser.add_argument('--compare', help = 'JSON results of a previous run to compare with')
+  parser.add_argument('--max-regression', type = float, help = 'percent slower than --compare that fails the run')
+  parser.add_argument('--budget', help = 'JSON file of the maximum median in microseconds of benchmarks')
+  parser.add_argument('--filter', help = 'only the benchmarks with this in their name')
+  parser.add_argument('--fast', action = 'store_true', help = 'fewer and shorter samples')
+  parser.add_argument('--load-counts', type = int, nargs = '+', default = [ 1000, 10000, 100000 ], help = 'numbers of messages of the load benchmarks')
+  logging.getLogger(None).setLevel(logging.ERROR)
+  sys.exit(main(parser.parse_args()))
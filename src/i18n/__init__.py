@@ -6,4 +6,14 @@
 
 __path__ = __import__('pkgutil').extend_path(__path__, __name__)
 
-from .text import PronounTranslation, Translation, TranslationContext, TranslationDomain, TranslationDomainLanguage, TranslationLanguages
+from .cache import OutputCache
+from .current import CurrentLanguages, CurrentTranslation, LazyText, current_languages, shared_current_translation, shared_languages
+from .instrument import TranslationInstrumentation
+from .mo import MappedTranslations
+from .negotiate import LocaleNegotiator, normalize_language_code, parse_accept_language, truncation_chain
+from .registry import TranslationRegistry, translation_registry
+from .reload import TranslationReloader
+from .snapshot import CatalogSnapshot, build_snapshot, use_snapshot
+from .template import MessageTemplate
+from .text import PronounTranslation, Subject, Translation, TranslationContext, TranslationDomain, TranslationDomainLanguage, TranslationLanguages, clear_locale_cache
+from .warmup import preload
@@ -0,0 +1,195 @@
+# src/i18n/bulk.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Rendering of many rows in several languages with worker processes, ex: for nightly jobs.
+# The languages are shared out between the workers (a language gets several workers when there
+# are more workers than languages), and each worker loads the catalogs of its languages once, when
+# it starts. Then only chunks of rows and their rendered strings are sent between the processes,
+# and the strings are returned in the order of the rows, while the next chunks are rendered.
+#
+# Usage:
+#   for ( fr, de ) in render(rows, t_domain, languages = [ 'fr', 'de' ], workers = 8): ...
+#   python -m i18n.bulk --domain my-domain --locdir i18n/locales --languages fr de --workers 8 rows.jsonl rendered.jsonl
+#
+# Rows of the JSONL files: { "msgid": ..., "msgid_plural": ..., "n": ..., "fields": { ... }, "person": "Third_Person" }
+#   only msgid is required
+# Rows of the CSV files: columns msgid, msgid_plural, n and person (all optional but msgid), the other columns are the fields
+# The output has the rendered string in each language, keyed (JSONL) or in columns (CSV) named by the first language code
+
+import argparse, collections, csv, errno, io, itertools, json, logging, os, sys, time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Final
+
+from .current import shared_languages
+from .text import PronounTranslation, Translation, TranslationContext, TranslationDomain, TranslationDomainLanguage, preload_frame_summary
+
+
+_worker_translations: Final[dict[tuple[str], Translation | TranslationContext]] = dict()
+  # Translation (or TranslationContext) of each language of this worker process, set when it starts
+
+
+def _load_translations(_domain: str, _locdirpath: str, _language_codes: Iterable[tuple[str]], _context: str | None) -> dict[tuple[str], Translation | TranslationContext]:
+  translation_domain = TranslationDomain(_domain, locdirpath = _locdirpath)
+  translations = dict()
+  for codes in _language_codes:
+    translation = Translation(TranslationDomainLanguage(translation_domain, shared_languages(*codes)), frame_summary = preload_frame_summary)
+    translations[codes] = translation if _context == None else TranslationContext(translation, _context)
+  return translations
+
+
+def _init_worker(_domain: str, _locdirpath: str, _language_codes: list[tuple[str]], _context: str | None) -> None:
+  _worker_translations.update(_load_translations(_domain, _locdirpath, _language_codes, _context))
+  return None
+
+
+def _render_chunk(_codes: tuple[str], _rows: list[tuple]) -> list[str]:
+  return list(_worker_translations[_codes].render_many(_rows))
+
+
+def _chunks(_rows: Iterable[tuple], _chunk_size: int) -> Iterator[list[tuple]]:
+  rows = iter(_rows)
+  while True:
+    chunk = list(itertools.islice(rows, _chunk_size))
+    if len(chunk) == 0:
+      return None
+    yield chunk
+
+
+def render(_rows: Iterable[tuple], _translation_domain: TranslationDomain, *, languages: Iterable[str | tuple[str]], workers: int | None = None, context: str | None = None, chunk_size: int = 1000) -> Iterator[tuple[str]]:
+# _rows - ( msgid, msgid_plural, n, text_dict, person ) for each string, same as for Translation.render_many
+# languages - language codes, or tuples of language codes as given to TranslationLanguages
+# workers - number of worker processes, None for os.cpu_count(), 0 to render in this process
+# context - msgctxt of all the rows, None for none
+# Yields a tuple of the strings of each row, one for each of languages, in the order of _rows
+# _rows is read as the strings are yielded, at most a few chunks ahead for each worker
+  assert isinstance(_translation_domain, TranslationDomain), type(_translation_domain)
+  assert isinstance(workers, int | None), type(workers)
+  assert isinstance(chunk_size, int), type(chunk_size)
+  language_codes = [ ( l, ) if isinstance(l, str) else tuple(l) for l in languages ]
+  if len(language_codes) == 0:
+    raise ValueError('languages must not be empty')
+  if workers == None:
+    workers = os.cpu_count() or 1
+  if workers < 0 or chunk_size < 1:
+    raise ValueError(f'workers must be at least 0 and chunk_size at least 1: {workers} {chunk_size}')
+  domain_arguments = ( _translation_domain._domain, _translation_domain._locdirpath )
+
+  if workers == 0:
+    translations = _load_translations(*domain_arguments, language_codes, context)
+    for chunk in _chunks(_rows, chunk_size):
+      yield from zip(*( list(translations[codes].render_many(chunk)) for codes in language_codes ))
+    return None
+
+  worker_language_codes = [ [] for w in range(workers) ]
+  language_workers = { codes: [] for codes in language_codes }
+  for i in range(max(workers, len(language_workers))):
+  # Each language to one worker, or each worker to one language if there are more workers
+    ( w, codes ) = ( i % workers, tuple(language_workers)[i % len(language_workers)] )
+    worker_language_codes[w].append(codes)
+    language_workers[codes].append(w)
+  pools = [ ProcessPoolExecutor(1, initializer = _init_worker, initargs = ( *domain_arguments, codes, context )) for codes in worker_language_codes ]
+  max_pending = 2 * workers
+    # Chunks rendered or waiting to be rendered, ahead of the one being yielded
+  try:
+    pending = collections.deque()
+    for ( i, chunk ) in enumerate(_chunks(_rows, chunk_size)):
+      pending.append([ pools[language_workers[codes][i % len(language_workers[codes])]].submit(_render_chunk, codes, chunk) for codes in language_codes ])
+      if len(pending) > max_pending:
+        yield from zip(*( future.result() for future in pending.popleft() ))
+    while len(pending) > 0:
+      yield from zip(*( future.result() for future in pending.popleft() ))
+  finally:
+    for pool in pools:
+      pool.shutdown(cancel_futures = True)
+  return None
+
+
+def read_rows(_fp: io.TextIOBase, _format: str) -> Iterator[tuple]:
+# Rows for render from a JSONL or CSV file, see the top of this file
+  Person = PronounTranslation.PronounPersonEnum
+  if _format == 'csv':
+    for record in csv.DictReader(_fp):
+      msgid = record.pop('msgid')
+      msgid_plural = record.pop('msgid_plural', None) or None
+      n = record.pop('n', None)
+      person = record.pop('person', None)
+      yield ( msgid, msgid_plural, int(n) if n else None, record if len(record) > 0 else None, Person[person] if person else None )
+  elif _format == 'jsonl':
+    for line in _fp:
+      if line.strip() == '':
+        continue
+      record = json.loads(line)
+      person = record.get('person')
+      yield ( record['msgid'], record.get('msgid_plural'), record.get('n'), record.get('fields'), Person[person] if person else None )
+  else:
+    raise ValueError(f'Unknown format: {_format}')
+  return None
+
+
+def write_rows(_fp: io.TextIOBase, _format: str, _languages: list[str], _rendered: Iterable[tuple[str]]) -> int:
+# Writes the strings yielded by render, returns the number of rows
+  count = 0
+  if _format == 'csv':
+    writer = csv.writer(_fp)
+    writer.writerow(_languages)
+    for strings in _rendered:
+      writer.writerow(strings)
+      count += 1
+  elif _format == 'jsonl':
+    for strings in _rendered:
+      _fp.write(json.dumps(dict(zip(_languages, strings)), ensure_ascii = False) + '\n')
+      count += 1
+  else:
+    raise ValueError(f'Unknown format: {_format}')
+  return count
+
+
+def _file_format(_filepath: str, _format: str | None) -> str:
+  if _format != None:
+    return _format
+  return 'csv' if _filepath.lower().endswith('.csv') else 'jsonl'
+
+
+def main(_arguments: argparse.Namespace) -> int:
+  translation_domain = TranslationDomain(_arguments.domain, locdirpath = _arguments.locdir)
+  languages = [ language.split(':') for language in _arguments.languages ]
+    # 'fr_CA:fr' for TranslationLanguages('fr_CA', 'fr')
+  input_format = _file_format(_arguments.input, _arguments.input_format)
+  output_format = _file_format(_arguments.output, _arguments.output_format)
+  start = time.perf_counter()
+  with ( sys.stdin if _arguments.input == '-' else open(_arguments.input, encoding = 'utf-8', newline = '') ) as input_fp, \
+       ( sys.stdout if _arguments.output == '-' else open(_arguments.output, 'w', encoding = 'utf-8', newline = '') ) as output_fp:
+    rendered = render(read_rows(input_fp, input_format), translation_domain, languages = languages, workers = _arguments.workers, context = _arguments.context, chunk_size = _arguments.chunk_size)
+    count = write_rows(output_fp, output_format, [ codes[0] for codes in languages ], rendered)
+  seconds = time.perf_counter() - start
+  print(f'{count} rows in {len(languages)} languages in {seconds:.3f} seconds, {count * len(languages) / seconds:.0f} strings per second', file = sys.stderr)
+  return 0
+
+
+mainName = '__main__'
+
+if __name__ == mainName:
+
+  parser = argparse.ArgumentParser(prog = 'python -m i18n.bulk', description = 'Renders the rows of a JSONL or CSV file in several languages with worker processes')
+  parser.add_argument('input', help = 'JSONL or CSV file of rows, - for stdin')
+  parser.add_argument('output', help = 'JSONL or CSV file for the rendered strings, - for stdout')
+  parser.add_argument('--domain', required = True, help = 'translation domain')
+  parser.add_argument('--locdir', help = 'locale directory, the registered one of the domain if not given')
+  parser.add_argument('--languages', required = True, nargs = '+', help = "language codes, or fallback chains such as 'fr_CA:fr'")
+  parser.add_argument('--context', help = 'msgctxt of all the rows')
+  parser.add_argument('--workers', type = int, help = 'number of worker processes, 0 to render in this process (default: number of CPUs)')
+  parser.add_argument('--chunk-size', type = int, default = 1000, help = 'rows sent to a worker at a time')
+  parser.add_argument('--input-format', choices = ( 'jsonl', 'csv' ), help = 'default: from the input file extension')
+  parser.add_argument('--output-format', choices = ( 'jsonl', 'csv' ), help = 'default: from the output file extension')
+  logging.getLogger(None).setLevel(logging.ERROR)
+  arguments = parser.parse_args()
+  if arguments.locdir == None and arguments.domain not in TranslationDomain.locale_dirpaths:
+    print(f"Domain '{arguments.domain}' is not registered - give --locdir", file = sys.stderr)
+    sys.exit(errno.EINVAL)
+  sys.exit(main(arguments))
@@ -0,0 +1,204 @@
+# src/i18n/cache.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Optional cache of the rendered strings of Translation and TranslationContext get and nget:
+# a call with the same catalog, context, msgid, plural form and text_dict values as a previous
+# one returns its string without looking it up or formatting it again.
+# The plural form is the index of n in the Plural-Forms of the catalog, so all the n with the
+# same form share an entry (n itself when the fallback catalogs have other Plural-Forms).
+# Calls with text_dict values that are not hashable are rendered without the cache.
+# Entries of a catalog are dropped when it is reloaded (see TranslationReloader) or evicted from the
+# translation registry, and they refer to it weakly, so the cache does not keep catalogs in memory.
+# render_with_subject and render_many are not cached. While a TranslationInstrumentation is
+# enabled, it counts the get and nget calls and gets their strings from this cache.
+#
+# Usage:
+#   output_cache = OutputCache(max_size = 10000, ttl = 300)
+#   output_cache.enable()    # or: with OutputCache() as output_cache: ...
+#   output_cache.disable_domain('my-domain')
+#   ...
+#   output_cache.stats
+#   output_cache.disable()
+
+import threading, time, weakref
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+
+from . import text
+from .registry import translation_registry
+from .text import Translation, _catalog_plural, _render
+
+
+class OutputCache(object):
+  __slots__ = ( '_max_size', '_ttl', '_domains', '_disabled_domains', '_entries', '_plurals', '_lock', '_hits', '_misses', '_evictions', '_uncacheable' )
+  # _domains - names of the cached domains, None for all of them except _disabled_domains
+  # _entries - ( text, expiry time.monotonic() or None, msgid untranslated ) keyed by
+  #            ( weakref of the catalog, context, msgid, msgid_plural, plural form, person is None, text_dict key ), least recently used first
+  # _plurals - plural function of each catalog, None if its fallbacks have other plural functions, weakly keyed
+
+  @property
+  def enabled(self) -> bool:
+    return text._output_cache is self
+
+  @property
+  def max_size(self) -> int:
+    return self._max_size
+
+  @property
+  def ttl(self) -> float | None:
+    return self._ttl
+
+  @property
+  def stats(self) -> dict[str, int | float | None]:
+    with self._lock:
+      calls = self._hits + self._misses
+      return { 'hits': self._hits, 'misses': self._misses, 'hit_rate': self._hits / calls if calls > 0 else None, 'evictions': self._evictions, 'uncacheable': self._uncacheable, 'size': len(self._entries), 'max_size': self._max_size }
+
+  def __init__(self, max_size: int = 4096, ttl: float | None = None, *, domains: Iterable[str] | None = None) -> None:
+  # ttl - seconds an entry is used for, None for as long as it is not evicted
+  # domains - names of the cached domains, None for all of them
+    super().__init__()
+    assert isinstance(max_size, int), type(max_size)
+    assert isinstance(ttl, int | float | None), type(ttl)
+    if max_size < 1:
+      raise ValueError(f'max_size must be at least 1: {max_size}')
+    if ttl != None and ttl <= 0:
+      raise ValueError(f'ttl must be more than 0: {ttl}')
+    self._max_size = max_size
+    self._ttl = ttl
+    self._domains = None if domains == None else set(domains)
+    self._disabled_domains = set()
+    self._entries = OrderedDict()
+    self._plurals = weakref.WeakKeyDictionary()
+    self._lock = threading.Lock()
+    self._hits = 0
+    self._misses = 0
+    self._evictions = 0
+    self._uncacheable = 0
+    return None
+
+  def __enter__(self) -> 'OutputCache':
+    self.enable()
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback) -> None:
+    self.disable()
+    return None
+
+  def enable(self) -> None:
+  # Caches the calls from now on, instead of the cache enabled before if any
+    if text._output_cache is not self:
+      if text._output_cache != None:
+        text._output_cache.disable()
+      translation_registry.add_eviction_listener(self._registry_evicted)
+      text._output_cache = self
+    return None
+
+  def disable(self) -> None:
+  # Stops caching, the entries are kept
+    if text._output_cache is self:
+      text._output_cache = None
+      translation_registry.remove_eviction_listener(self._registry_evicted)
+    return None
+
+  def enable_domain(self, _domain: str) -> None:
+    with self._lock:
+      self._disabled_domains.discard(_domain)
+      if self._domains != None:
+        self._domains.add(_domain)
+    return None
+
+  def disable_domain(self, _domain: str) -> None:
+  # The entries of _domain are kept until they are evicted, and used again if it is enabled again
+    with self._lock:
+      self._disabled_domains.add(_domain)
+      if self._domains != None:
+        self._domains.discard(_domain)
+    return None
+
+  def clear(self) -> None:
+  # Drops the entries, the stats are kept
+    with self._lock:
+      self._entries.clear()
+      self._plurals.clear()
+    return None
+
+  def _discard_catalog(self, _translations) -> None:
+  # Drops the entries of a catalog that is replaced, ex: by a reloaded one
+    with self._lock:
+      for key in [ key for key in self._entries if key[0]() is _translations ]:
+        del self._entries[key]
+      self._plurals.pop(_translations, None)
+    return None
+
+  def _registry_evicted(self, _key: Hashable, _value: object) -> None:
+  # Listener of translation_registry - catalog entries are ( frame_summary, catalog, templates )
+    if _value.__class__ is tuple:
+      self._discard_catalog(_value[1])
+    return None
+
+  def _plural(self, _translations) -> object:
+  # Plural function of _translations, None if its fallbacks have other plural functions
+    plural = _catalog_plural(_translations)
+    self._plurals[_translations] = plural
+    return plural
+
+  def _render(self, _translation: Translation, _context: str | None, _msgid: str, _msgid_plural: str | None, _n: int | None, _text_dict: dict[str] | None, _person) -> str:
+  # Same as the method that called it, from the cache if the same message was rendered before
+    return self._entry(_translation, _context, _msgid, _msgid_plural, _n, _text_dict, _person)[0]
+
+  def _entry(self, _translation: Translation, _context: str | None, _msgid: str, _msgid_plural: str | None, _n: int | None, _text_dict: dict[str] | None, _person) -> tuple:
+  # ( text, expiry, msgid untranslated ) of the message, from the cache or rendered
+  # msgid untranslated is for TranslationInstrumentation, to count the misses
+    translations = _translation._translations
+    domain = _translation._translation_domain_language._translation_domain._domain
+    if domain in self._disabled_domains or ( self._domains != None and domain not in self._domains ):
+      return _uncached_entry(_translation, _context, _msgid, _msgid_plural, _n, _text_dict, _person)
+    if _msgid_plural == None:
+      form = None
+    else:
+      plural = self._plurals.get(translations, False)
+      if plural is False:
+        plural = self._plural(translations)
+      form = _n if plural == None else ( plural(_n), _n == 1 )
+        # _n == 1 - untranslated messages are msgid if n == 1, else msgid_plural
+    key = ( weakref.ref(translations), _context, _msgid, _msgid_plural, form, _person == None,
+      None if _text_dict == None else ( tuple(_text_dict.items()), tuple(map(type, _text_dict.values())) ) )
+      # The types, because 1, 1.0 and True are equal but are formatted differently
+
+    # Hits are not locked, the counts may miss a few concurrent calls
+    try:
+      entry = self._entries.get(key)
+    except TypeError:
+    # A value of _text_dict is not hashable
+      self._uncacheable += 1
+      return _uncached_entry(_translation, _context, _msgid, _msgid_plural, _n, _text_dict, _person)
+    if entry != None and ( entry[1] == None or entry[1] > time.monotonic() ):
+      try:
+        self._entries.move_to_end(key)
+      except KeyError:
+      # Evicted by another thread
+        pass
+      self._hits += 1
+      return entry
+    self._misses += 1
+    ( result, untranslated ) = _render(_translation, _context, _msgid, _msgid_plural, _n, _text_dict, _person)
+    entry = ( result, None if self._ttl == None else time.monotonic() + self._ttl, untranslated )
+    with self._lock:
+      self._entries[key] = entry
+      self._entries.move_to_end(key)
+      while len(self._entries) > self._max_size:
+        self._entries.popitem(last = False)
+        self._evictions += 1
+    return entry
+
+
+def _uncached_entry(_translation: Translation, _context: str | None, _msgid: str, _msgid_plural: str | None, _n: int | None, _text_dict: dict[str] | None, _person) -> tuple:
+# Same as get and nget, as an entry that is not cached
+  ( result, untranslated ) = _render(_translation, _context, _msgid, _msgid_plural, _n, _text_dict, _person)
+  return ( result, None, untranslated )
@@ -0,0 +1,230 @@
+# src/i18n/current.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Current languages for each request, in a context variable so that each asyncio task
+# or thread has its own, without changing the process locale (locale.setlocale)
+#
+# Usage:
+#   test_translation = CurrentTranslation(TranslationDomain('test'))   # module level
+#
+#   with CurrentLanguages('fr', 'en'):   # or @CurrentLanguages('fr', 'en') on a function or coroutine function
+#     test_translation.get('/sentence/simple')
+#
+# Module and class level strings:
+#   label = test_translation.lazy('/label/name')    # nothing is loaded or translated yet
+#   ...
+#   f'{label}: ...'                                 # translated in the current languages, then memoized for them
+#
+# Thread pools: asyncio.to_thread copies the context variables to the thread,
+# loop.run_in_executor and Executor.submit do not - use contextvars.copy_context().run
+
+import functools, inspect, weakref
+from collections.abc import Callable, Iterable, Iterator
+from contextvars import ContextVar
+from typing import ClassVar, Final
+
+from .registry import TranslationRegistry
+from .text import Translation, TranslationContext, TranslationDomain, TranslationDomainLanguage, TranslationLanguages
+
+
+_shared_instances: Final[TranslationRegistry] = TranslationRegistry(max_size = 256)
+  # TranslationLanguages and CurrentTranslation instances shared by shared_languages and shared_current_translation,
+  # apart from the catalogs in translation_registry so that they do not evict them or count in their stats
+
+_current_languages: Final[ContextVar] = ContextVar('i18n_current_languages', default = None)
+_entered_tokens: Final[ContextVar] = ContextVar('i18n_entered_tokens', default = ())
+  # Tokens of the CurrentLanguages blocks entered in this context, innermost last - kept per context, not per instance,
+  # so that one instance can be entered by several tasks or threads at once
+
+
+def shared_languages(*_language_codes: str | None) -> TranslationLanguages:
+# The same TranslationLanguages instance for the same language codes
+  return _shared_instances.get_or_load(( TranslationLanguages, _language_codes ), lambda: TranslationLanguages(*_language_codes))
+
+
+def current_languages() -> TranslationLanguages:
+# Languages set by CurrentLanguages, or the default locale if none are set
+  translation_languages = _current_languages.get()
+  if translation_languages == None:
+    translation_languages = shared_languages()
+  return translation_languages
+
+
+class CurrentLanguages(object):
+# Context manager and decorator that sets the current languages
+  __slots__ = ( '_translation_languages', )
+
+  @property
+  def translation_languages(self) -> TranslationLanguages:
+    return self._translation_languages
+
+  def __init__(self, *_language_codes: str | None | TranslationLanguages) -> None:
+  # _language_codes - same as for TranslationLanguages, or one TranslationLanguages instance
+    super().__init__()
+    if len(_language_codes) == 1 and isinstance(_language_codes[0], TranslationLanguages):
+      self._translation_languages = _language_codes[0]
+    else:
+      self._translation_languages = shared_languages(*_language_codes)
+    return None
+
+  def __enter__(self) -> TranslationLanguages:
+    _entered_tokens.set(( *_entered_tokens.get(), _current_languages.set(self._translation_languages) ))
+    return self._translation_languages
+
+  def __exit__(self, exc_type, exc_value, traceback) -> None:
+    tokens = _entered_tokens.get()
+    _entered_tokens.set(tokens[:-1])
+    _current_languages.reset(tokens[-1])
+    return None
+
+  def __call__(self, _function: Callable) -> Callable:
+  # Each call sets and resets its own token, so the decorated function can run in several tasks at once
+    translation_languages = self._translation_languages
+
+    if inspect.iscoroutinefunction(_function):
+      @functools.wraps(_function)
+      async def wrapper(*args, **kwargs):
+        token = _current_languages.set(translation_languages)
+        try:
+          return await _function(*args, **kwargs)
+        finally:
+          _current_languages.reset(token)
+    else:
+      @functools.wraps(_function)
+      def wrapper(*args, **kwargs):
+        token = _current_languages.set(translation_languages)
+        try:
+          return _function(*args, **kwargs)
+        finally:
+          _current_languages.reset(token)
+    return wrapper
+
+
+class CurrentTranslation(object):
+# Translation (or TranslationContext if a context is given) for the current languages at the time of each call
+  resolved_max_size: ClassVar[int] = 64
+    # Languages resolved by each instance that are kept, the least recently used are resolved again
+  __slots__ = ( '_translation_domain', '_context', '_resolved' )
+  # _resolved - Translation or TranslationContext for each tuple of language codes, at most resolved_max_size entries
+
+  @property
+  def language(self) -> str:
+    return self.resolve().language
+
+  def __init__(self, _translation_domain: TranslationDomain, _context: str | None = None) -> None:
+    super().__init__()
+    assert isinstance(_translation_domain, TranslationDomain), type(_translation_domain)
+    assert isinstance(_context, str | None), type(_context)
+    self._translation_domain = _translation_domain
+    self._context = _context
+    self._resolved = TranslationRegistry(max_size = CurrentTranslation.resolved_max_size)
+    return None
+
+  def _with_context(self, _translation: Translation) -> Translation | TranslationContext:
+    return _translation if self._context == None else TranslationContext(_translation, self._context)
+
+  def resolve(self, _translation_languages: TranslationLanguages | None = None) -> Translation | TranslationContext:
+  # _translation_languages - None for the current languages
+  # The catalogs are shared with the other instances through translation_registry, so reusing them is not logged
+    if _translation_languages == None:
+      _translation_languages = current_languages()
+    return self._resolved.get_or_load(_translation_languages._langs,
+      lambda: self._with_context(Translation(TranslationDomainLanguage(self._translation_domain, _translation_languages), warn_reuse = False)))
+
+  async def aresolve(self, _translation_languages: TranslationLanguages | None = None) -> Translation | TranslationContext:
+  # Same as resolve, with the catalog loaded by Translation.aload
+    if _translation_languages == None:
+      _translation_languages = current_languages()
+    resolved = self._resolved.get(_translation_languages._langs)
+    if resolved == None:
+      translation = await Translation.aload(self._translation_domain, _translation_languages)
+      resolved = self._resolved.get_or_load(_translation_languages._langs, lambda: self._with_context(translation))
+        # The instance resolved by another task while loading, if any
+    return resolved
+
+  def get(self, _msgid: str, _text_dict: dict[str] = None) -> str:
+    return self.resolve().get(_msgid, _text_dict)
+
+  def nget(self, _singular: str, _plural: str, _n: int, _text_dict: dict[str] = None, _person = None) -> str:
+    return self.resolve().nget(_singular, _plural, _n, _text_dict, _person)
+
+  def render_many(self, _rows: Iterable[tuple]) -> Iterator[str]:
+  # Languages are resolved when this is called, not for each row
+    return self.resolve().render_many(_rows)
+
+  async def arender_many(self, _rows: Iterable[tuple]) -> list[str]:
+  # Same as list(render_many(_rows)), see Translation.arender_many
+    return await (await self.aresolve()).arender_many(_rows)
+
+  def lazy(self, _msgid: str, **fields) -> 'LazyText':
+  # Same as get(_msgid, fields), when the returned LazyText is converted to str or formatted
+    return LazyText(self, _msgid, fields)
+
+
+def shared_current_translation(_translation_domain: TranslationDomain, _context: str | None = None) -> CurrentTranslation:
+# The same CurrentTranslation instance for the same domain, locale directory and context
+  return _shared_instances.get_or_load(( CurrentTranslation, _translation_domain._domain, _translation_domain._locdirpath, _context ), lambda: CurrentTranslation(_translation_domain, _context))
+
+
+class LazyText(object):
+# Message translated in the current languages each time it is converted to str or formatted
+# The text is memoized for each languages, until their catalog or the catalog of a LazyText field is reloaded
+  rendered_max_size: ClassVar[int] = 16
+    # Languages memoized by each instance, the least recently rendered are rendered again
+  __slots__ = ( '_current_translation', '_msgid', '_fields', '_rendered' )
+  # _fields - placeholder values, None if there are none - they can be LazyText instances too
+  # _rendered - ( weakrefs of the catalogs when rendered, text ) for each tuple of language codes, at most rendered_max_size entries
+  #             the catalogs of this text and of its LazyText fields, in the order of _catalogs
+
+  @property
+  def msgid(self) -> str:
+    return self._msgid
+
+  def __init__(self, _current_translation: CurrentTranslation, _msgid: str, _fields: dict[str] | None = None) -> None:
+    super().__init__()
+    assert isinstance(_current_translation, CurrentTranslation), type(_current_translation)
+    assert isinstance(_msgid, str), type(_msgid)
+    assert isinstance(_fields, dict | None), type(_fields)
+    self._current_translation = _current_translation
+    self._msgid = _msgid
+    self._fields = _fields if _fields else None
+    self._rendered = TranslationRegistry(max_size = LazyText.rendered_max_size)
+    return None
+
+  def _catalogs(self, _translation_languages: TranslationLanguages, _resolve: bool) -> list:
+  # Current catalogs of this text and of its LazyText fields, nested ones included
+  # _resolve - False to only get the languages already resolved, with None for the others
+    resolved = self._current_translation.resolve(_translation_languages) if _resolve else self._current_translation._resolved.get(_translation_languages._langs)
+    if resolved == None:
+      catalogs = [ None ]
+    else:
+      catalogs = [ ( resolved if isinstance(resolved, Translation) else resolved._translation )._translations ]
+    if self._fields != None:
+      for value in self._fields.values():
+        if isinstance(value, LazyText):
+          catalogs.extend(value._catalogs(_translation_languages, _resolve))
+    return catalogs
+
+  def __str__(self) -> str:
+    translation_languages = current_languages()
+    rendered = self._rendered.get(translation_languages._langs)
+    if rendered != None:
+      catalogs = self._catalogs(translation_languages, False)
+      if all(catalog != None and catalog is catalog_ref() for ( catalog, catalog_ref ) in zip(catalogs, rendered[0])):
+        return rendered[1]
+    catalogs = self._catalogs(translation_languages, True)
+      # Before rendering, so that a catalog reloaded while rendering is rendered again next time
+    text = self._current_translation.resolve(translation_languages).get(self._msgid, self._fields)
+    self._rendered.set(translation_languages._langs, ( tuple(map(weakref.ref, catalogs)), text ))
+    return text
+
+  def __format__(self, _format_spec: str) -> str:
+    return format(str(self), _format_spec)
+
+  def __repr__(self) -> str:
+    return f'{self.__class__.__qualname__}({self._msgid!r})'
@@ -0,0 +1,227 @@
+# src/i18n/instrument.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Optional counters of the calls of Translation and TranslationContext (get, nget,
+# render_with_subject, render_many): for each ( domain, context, msgid, language ), the number
+# of calls, of misses (the msgid is returned untranslated) and of fallbacks (translated from a
+# language after the first requested one), and a histogram of the render time of one call in
+# sample_every, for each ( domain, language ).
+# Each thread counts in its own dicts, without locks, and the counts of all the threads are
+# added up when they are read.
+# The get and nget calls are rendered through the OutputCache if one is enabled.
+#
+# Usage:
+#   instrumentation = TranslationInstrumentation()
+#   instrumentation.enable()    # or: with TranslationInstrumentation() as instrumentation: ...
+#   ...
+#   instrumentation.as_dict(), instrumentation.prometheus(), instrumentation.hot_messages(100)
+#   instrumentation.disable()
+
+import bisect, threading, time
+from collections.abc import Iterable, Iterator
+from typing import Final
+
+from . import text
+from .text import PronounTranslation, Subject, Translation, _lookup, _render, _render_with_subject
+
+
+latency_buckets: Final[tuple[float]] = ( 1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2 )
+  # Upper bounds in seconds of the latency histogram buckets, the last bucket is for longer times
+
+
+class _ThreadCounters(object):
+  __slots__ = ( 'messages', 'latencies', 'countdown' )
+  # messages - [ calls, misses, fallbacks ] keyed by ( domain, context, msgid, language )
+  # latencies - [ count in each bucket ..., count over the last bucket, sum of the seconds ] keyed by ( domain, language )
+  # countdown - calls until the next sampled one
+
+  def __init__(self) -> None:
+    super().__init__()
+    self.messages = dict()
+    self.latencies = dict()
+    self.countdown = 1
+    return None
+
+
+def _in_catalog(_translations, _key: str) -> bool:
+# True if the first catalog (without its fallbacks) has a translation for _key (msgid, or context + '\x04' + msgid)
+  catalog = getattr(_translations, '_catalog', None)
+  if catalog != None:
+    return _key in catalog or ( _key, 0 ) in catalog
+  lookup = getattr(_translations, '_lookup', None)
+    # MappedTranslations
+  return lookup != None and lookup(_key) != None
+
+
+def _label(_value: str | None) -> str:
+# Prometheus label value
+  return '' if _value == None else _value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class TranslationInstrumentation(object):
+  __slots__ = ( '_sample_every', '_local', '_threads', '_lock' )
+  # _local - _ThreadCounters of the current thread
+  # _threads - _ThreadCounters of every thread that has counted, kept when the thread ends
+
+  @property
+  def enabled(self) -> bool:
+    return text._instrumentation is self
+
+  @property
+  def sample_every(self) -> int:
+    return self._sample_every
+
+  def __init__(self, sample_every: int = 100) -> None:
+  # sample_every - the render time of one call in sample_every is added to the latency histogram, 1 for every call
+    super().__init__()
+    assert isinstance(sample_every, int), type(sample_every)
+    if sample_every < 1:
+      raise ValueError(f'sample_every must be at least 1: {sample_every}')
+    self._sample_every = sample_every
+    self._local = threading.local()
+    self._threads = []
+    self._lock = threading.Lock()
+    return None
+
+  def __enter__(self) -> 'TranslationInstrumentation':
+    self.enable()
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback) -> None:
+    self.disable()
+    return None
+
+  def enable(self) -> None:
+  # Records the calls from now on, instead of the instrumentation enabled before if any
+    text._instrumentation = self
+    return None
+
+  def disable(self) -> None:
+  # Stops recording, the counts are kept
+    if text._instrumentation is self:
+      text._instrumentation = None
+    return None
+
+  def reset(self) -> None:
+  # Counts from zero, calls in progress in other threads may still be counted
+    with self._lock:
+      self._threads = []
+      self._local = threading.local()
+    return None
+
+  def _counters(self) -> _ThreadCounters:
+    counters = getattr(self._local, 'counters', None)
+    if counters == None:
+      counters = _ThreadCounters()
+      self._local.counters = counters
+      with self._lock:
+        self._threads.append(counters)
+    return counters
+
+  def _render(self, _translation: Translation, _context: str | None, _msgid: str, _msgid_plural: str | None, _n: int | None, _text_dict: dict[str] | None, _person, _subject: Subject | None = None) -> str:
+  # Looks up and renders one message, same as the method that called it, and counts it
+  # _subject - for render_with_subject, with its keyword arguments as _text_dict
+    counters = self._counters()
+    counters.countdown -= 1
+    sampled = counters.countdown <= 0
+    if sampled:
+      counters.countdown = self._sample_every
+      start = time.perf_counter()
+
+    translations = _translation._translations
+    output_cache = text._output_cache
+    if _subject != None:
+      translated = _lookup(translations, _context, _msgid, _msgid_plural, _n)
+      result = _render_with_subject(_translation, translated, _subject, _text_dict)
+      untranslated = translated is _msgid or translated is _msgid_plural
+    elif output_cache != None:
+      ( result, expiry, untranslated ) = output_cache._entry(_translation, _context, _msgid, _msgid_plural, _n, _text_dict, _person)
+    else:
+      ( result, untranslated ) = _render(_translation, _context, _msgid, _msgid_plural, _n, _text_dict, _person)
+
+    tdl = _translation._translation_domain_language
+    domain = tdl._translation_domain._domain
+    key = ( domain, _context, _msgid, tdl._found_language )
+    counts = counters.messages.get(key)
+    if counts == None:
+      counts = [ 0, 0, 0 ]
+      counters.messages[key] = counts
+    counts[0] += 1
+    if untranslated:
+      counts[1] += 1
+    elif tdl._found_language != tdl._translation_languages._langs[0] or not _in_catalog(translations, _msgid if _context == None else f'{_context}\x04{_msgid}'):
+      counts[2] += 1
+
+    if sampled:
+      seconds = time.perf_counter() - start
+      latency = counters.latencies.get(( domain, tdl._found_language ))
+      if latency == None:
+        latency = [ 0 ] * (len(latency_buckets) + 1) + [ 0.0 ]
+        counters.latencies[( domain, tdl._found_language )] = latency
+      latency[bisect.bisect_left(latency_buckets, seconds)] += 1
+      latency[-1] += seconds
+    return result
+
+  def _render_many(self, _translation: Translation, _context: str | None, _rows: Iterable[tuple]) -> Iterator[str]:
+  # Same as render_many, counting each row
+    for ( msgid, msgid_plural, n, text_dict, person ) in _rows:
+      if msgid_plural != None and person in ( PronounTranslation.PronounPersonEnum.First_Person, PronounTranslation.PronounPersonEnum.Second_Person ):
+        n = 0
+      yield self._render(_translation, _context, msgid, msgid_plural, n, text_dict, person)
+    return None
+
+  def _totals(self) -> tuple[dict, dict]:
+  # Counts of all the threads added up, read without stopping them
+    with self._lock:
+      threads = list(self._threads)
+    messages = dict()
+    latencies = dict()
+    for counters in threads:
+      for key, counts in counters.messages.copy().items():
+        total = messages.setdefault(key, [ 0, 0, 0 ])
+        for i, count in enumerate(tuple(counts)):
+          total[i] += count
+      for key, latency in counters.latencies.copy().items():
+        total = latencies.setdefault(key, [ 0 ] * (len(latency_buckets) + 1) + [ 0.0 ])
+        for i, count in enumerate(tuple(latency)):
+          total[i] += count
+    return ( messages, latencies )
+
+  def as_dict(self) -> dict[str, list[dict]]:
+  # { 'messages': [ { domain, context, msgid, language, calls, misses, fallbacks } ... ] most called first,
+  #   'latency': [ { domain, language, buckets: { upper bound in seconds or 'inf': count }, count, sum } ... ] }
+  # bucket counts are not cumulative
+    ( messages, latencies ) = self._totals()
+    return {
+      'messages': [ { 'domain': key[0], 'context': key[1], 'msgid': key[2], 'language': key[3], 'calls': counts[0], 'misses': counts[1], 'fallbacks': counts[2] } for key, counts in sorted(messages.items(), key = lambda item: -item[1][0]) ],
+      'latency': [ { 'domain': key[0], 'language': key[1], 'buckets': dict(zip(( *latency_buckets, 'inf' ), latency[:-1])), 'count': sum(latency[:-1]), 'sum': latency[-1] } for key, latency in sorted(latencies.items()) ],
+    }
+
+  def prometheus(self, _prefix: str = 'i18n') -> str:
+  # Prometheus text exposition format
+    ( messages, latencies ) = self._totals()
+    lines = []
+    for ( i, name, description ) in ( ( 0, 'calls', 'Translation calls' ), ( 1, 'misses', 'Translation calls that returned the msgid untranslated' ), ( 2, 'fallbacks', 'Translation calls translated from a fallback language' ) ):
+      lines += [ f'# HELP {_prefix}_{name}_total {description}', f'# TYPE {_prefix}_{name}_total counter' ]
+      for key, counts in messages.items():
+        lines.append(f'{_prefix}_{name}_total{{domain="{_label(key[0])}",context="{_label(key[1])}",msgid="{_label(key[2])}",language="{_label(key[3])}"}} {counts[i]}')
+    lines += [ f'# HELP {_prefix}_render_seconds Render time of sampled translation calls', f'# TYPE {_prefix}_render_seconds histogram' ]
+    for key, latency in sorted(latencies.items()):
+      labels = f'domain="{_label(key[0])}",language="{_label(key[1])}"'
+      cumulative = 0
+      for upper_bound, count in zip(( *(repr(b) for b in latency_buckets), '+Inf' ), latency[:-1]):
+        cumulative += count
+        lines.append(f'{_prefix}_render_seconds_bucket{{{labels},le="{upper_bound}"}} {cumulative}')
+      lines.append(f'{_prefix}_render_seconds_sum{{{labels}}} {latency[-1]!r}')
+      lines.append(f'{_prefix}_render_seconds_count{{{labels}}} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+  def hot_messages(self, _limit: int | None = None) -> list[tuple[str, str | None, str, str]]:
+  # ( domain, context, msgid, language ) of the most called messages first, ex: to warm up caches when starting
+    ( messages, latencies ) = self._totals()
+    return sorted(messages, key = lambda key: -messages[key][0])[:_limit]
@@ -0,0 +1,216 @@
+# src/i18n/mo.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Machine object (*.mo) catalog that is memory mapped rather than read into a dict.
+# Strings are found with the hash table in the *.mo file (or by binary search if there is none)
+# and decoded only when they are requested, so loading takes the same time for any catalog size
+# and the pages are shared between processes.
+#
+# Usage: Translation.catalog_class = MappedTranslations
+
+import gettext, io, mmap, struct
+from typing import Final
+
+from .plural import plural_rule
+from .po import _hash_string
+
+
+class MappedTranslations(gettext.NullTranslations):
+  LE_MAGIC: Final[int] = 0x950412de
+  BE_MAGIC: Final[int] = 0xde120495
+  VERSIONS: Final[tuple[int]] = ( 0, 1 )
+  # Same instance attributes as gettext.GNUTranslations, plus:
+  #   _buffer - mmap (or bytes if the file object has no file descriptor)
+  #   _base - offset of the *.mo data in _buffer, 0 except for catalogs in a larger buffer (see from_buffer)
+  #   _entry_struct - struct.Struct for ( length, offset ) table entries
+  #   _hash_struct - struct.Struct for hash table entries
+  #   _count, _originals_offset, _translations_offset, _hash_size, _hash_offset - from the *.mo header, plus _base
+  #   _decoded - decoded translation for each msgid looked up and found, tuple of the plural forms for plural messages
+  #              misses are not kept, so it has at most one entry per message of the catalog
+
+  @classmethod
+  def from_buffer(cls, _buffer: bytes | mmap.mmap, _offset: int = 0, _length: int | None = None, *, filename: str = '<buffer>') -> 'MappedTranslations':
+  # Catalog for the *.mo data at _offset in _buffer, ex: one of the catalogs in a CatalogSnapshot
+  # _length - None for the rest of _buffer
+    translations = cls()
+    translations._parse_buffer(_buffer, _offset, len(_buffer) - _offset if _length == None else _length, filename)
+    return translations
+
+  def _parse(self, fp) -> None:
+    try:
+      buffer = mmap.mmap(fp.fileno(), 0, access = mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+      buffer = fp.read()
+    self._parse_buffer(buffer, 0, len(buffer), getattr(fp, 'name', ''))
+    return None
+
+  def _parse_buffer(self, _buffer: bytes | mmap.mmap, _base: int, _length: int, _filename: str) -> None:
+    self._buffer = buffer = _buffer
+    self._base = base = _base
+    end = base + _length
+    if _length < 28 or end > len(buffer):
+      raise OSError(0, 'File is corrupt', _filename)
+    magic = struct.unpack('<I', buffer[base : base + 4])[0]
+    if magic == self.LE_MAGIC:
+      byte_order = '<'
+    elif magic == self.BE_MAGIC:
+      byte_order = '>'
+    else:
+      raise OSError(0, 'Bad magic number', _filename)
+    ( version, self._count, originals_offset, translations_offset, self._hash_size, hash_offset ) = struct.unpack(f'{byte_order}6I', buffer[base + 4 : base + 28])
+    if version >> 16 not in self.VERSIONS:
+      raise OSError(0, f'Bad version number {version >> 16}', _filename)
+    self._originals_offset = base + originals_offset
+    self._translations_offset = base + translations_offset
+    self._hash_offset = base + hash_offset
+    if max(self._originals_offset, self._translations_offset) + self._count * 8 > end or self._hash_offset + self._hash_size * 4 > end:
+      raise OSError(0, 'File is corrupt', _filename)
+    self._entry_struct = struct.Struct(f'{byte_order}II')
+    self._hash_struct = struct.Struct(f'{byte_order}I')
+    self._decoded = dict()
+
+    self.plural = lambda n: int(n != 1) # germanic plural by default
+    index = self._find(b'')
+    if index != -1:
+      self._parse_header(self._string(self._translations_offset, index))
+    return None
+
+  def _parse_header(self, _header: bytes) -> None:
+  # Same as gettext.GNUTranslations._parse
+    lastk = None
+    for b_item in _header.split(b'\n'):
+      item = b_item.decode().strip()
+      if not item:
+        continue
+      if item.startswith('#-#-#-#-#') and item.endswith('#-#-#-#-#'):
+        continue
+      k = v = None
+      if ':' in item:
+        k, v = item.split(':', 1)
+        k = k.strip().lower()
+        v = v.strip()
+        self._info[k] = v
+        lastk = k
+      elif lastk:
+        self._info[lastk] += '\n' + item
+      if k == 'content-type':
+        self._charset = v.split('charset=')[1]
+      elif k == 'plural-forms':
+        v = v.split(';')
+        plural = v[1].split('plural=')[1]
+        self.plural = plural_rule(plural)
+    return None
+
+  def _string(self, _table_offset: int, _index: int) -> bytes:
+    ( length, offset ) = self._entry_struct.unpack_from(self._buffer, _table_offset + _index * 8)
+    offset += self._base
+    return self._buffer[offset : offset + length]
+
+  def _matches(self, _key: bytes, _index: int) -> int:
+  # Compares _key with the original string of entry _index, up to the '\0' before msgid_plural
+  # Returns < 0, 0 or > 0 as _key sorts before, same as or after the original string
+    ( length, offset ) = self._entry_struct.unpack_from(self._buffer, self._originals_offset + _index * 8)
+    offset += self._base
+    original = self._buffer[offset : offset + min(length, len(_key) + 1)]
+    if len(original) > len(_key) and original[len(_key)] == 0:
+      original = original[:len(_key)]
+    return (_key > original) - (_key < original)
+
+  def _find(self, _key: bytes) -> int:
+  # Returns the index of the entry for msgid _key, or -1 if there is none
+    if self._hash_size > 2:
+      hval = _hash_string(_key)
+      index = hval % self._hash_size
+      increment = 1 + (hval % (self._hash_size - 2))
+      while True:
+        entry = self._hash_struct.unpack_from(self._buffer, self._hash_offset + index * 4)[0]
+        if entry == 0:
+          return -1
+        if entry <= self._count and self._matches(_key, entry - 1) == 0:
+          return entry - 1
+        index = index - (self._hash_size - increment) if index >= self._hash_size - increment else index + increment
+    low = 0
+    high = self._count
+    while low < high:
+      middle = (low + high) // 2
+      comparison = self._matches(_key, middle)
+      if comparison == 0:
+        return middle
+      elif comparison < 0:
+        high = middle
+      else:
+        low = middle + 1
+    return -1
+
+  def _lookup(self, _message: str) -> str | tuple[str] | None:
+  # Translation of _message, a tuple of the plural forms for a message with msgid_plural, or None
+    try:
+      return self._decoded[_message]
+    except KeyError:
+      pass
+    charset = self._charset or 'ascii'
+    try:
+      index = self._find(_message.encode(charset))
+    except UnicodeEncodeError:
+      index = -1
+    if index == -1:
+      return None
+    ( length, offset ) = self._entry_struct.unpack_from(self._buffer, self._originals_offset + index * 8)
+    offset += self._base
+    translated = self._string(self._translations_offset, index).decode(charset)
+    decoded = tuple(translated.split('\x00')) if 0 in self._buffer[offset : offset + length] else translated
+    self._decoded[_message] = decoded
+    return decoded
+
+  def _singular(self, _message: str) -> str | None:
+    decoded = self._lookup(_message)
+    if decoded.__class__ is tuple:
+    # Same as GNUTranslations - form for n = 1 of a message with msgid_plural
+      index = self.plural(1)
+      return decoded[index] if index < len(decoded) else None
+    return decoded
+
+  def _plural(self, _message: str, _n: int) -> str | None:
+    decoded = self._lookup(_message)
+    if decoded.__class__ is tuple:
+      index = self.plural(_n)
+      if index < len(decoded):
+        return decoded[index]
+    return None
+
+  def gettext(self, message: str) -> str:
+    tmsg = self._singular(message)
+    if tmsg != None:
+      return tmsg
+    if self._fallback:
+      return self._fallback.gettext(message)
+    return message
+
+  def ngettext(self, msgid1: str, msgid2: str, n: int) -> str:
+    tmsg = self._plural(msgid1, n)
+    if tmsg != None:
+      return tmsg
+    if self._fallback:
+      return self._fallback.ngettext(msgid1, msgid2, n)
+    return msgid1 if n == 1 else msgid2
+
+  def pgettext(self, context: str, message: str) -> str:
+    tmsg = self._singular(f'{context}\x04{message}')
+    if tmsg != None:
+      return tmsg
+    if self._fallback:
+      return self._fallback.pgettext(context, message)
+    return message
+
+  def npgettext(self, context: str, msgid1: str, msgid2: str, n: int) -> str:
+    tmsg = self._plural(f'{context}\x04{msgid1}', n)
+    if tmsg != None:
+      return tmsg
+    if self._fallback:
+      return self._fallback.npgettext(context, msgid1, msgid2, n)
+    return msgid1 if n == 1 else msgid2
@@ -0,0 +1,173 @@
+# src/i18n/negotiate.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Choice of languages from an HTTP Accept-Language header (or a list of language tags),
+# among the languages that have translation files installed
+#
+# Usage:
+#   negotiator = LocaleNegotiator(TranslationDomain('my-domain'))   # module level
+#
+#   with CurrentLanguages(negotiator.languages(request.headers.get('Accept-Language'))):
+#     ...
+#
+# Language tags are normalized to the form used for locale directories:
+#   'en-us', 'en_US.UTF-8' -> 'en_US'    'zh-hant-tw' -> 'zh_Hant_TW'    'sr_RS.UTF-8@latin' -> 'sr_RS@latin'
+# and each is followed by its truncations (BCP 47 lookup): 'zh_Hant_TW' -> 'zh_Hant' -> 'zh'
+
+import functools
+from collections.abc import Iterable
+
+from .current import shared_languages
+from .text import TranslationDomain, TranslationLanguages, _locale_dir_index
+
+
+def normalize_language_code(_language_tag: str) -> str | None:
+# Returns None if _language_tag is not a language tag or locale name, ex: '*', 'C'
+  ( code, at, modifier ) = _language_tag.strip().partition('@')
+  subtags = code.split('.', 1)[0].replace('-', '_').split('_')
+    # Without the encoding, ex: '.UTF-8'
+  if not ( 2 <= len(subtags[0]) <= 8 and subtags[0].isascii() and subtags[0].isalpha() ):
+    return None
+  parts = [ subtags[0].lower() ]
+  for subtag in subtags[1:]:
+    if subtag == '' or not subtag.isascii() or not subtag.isalnum():
+      return None
+    if len(subtag) == 4 and subtag.isalpha():
+      parts.append(subtag.title())
+        # Script, ex: 'Hant'
+    elif ( len(subtag) == 2 and subtag.isalpha() ) or ( len(subtag) == 3 and subtag.isdigit() ):
+      parts.append(subtag.upper())
+        # Region, ex: 'TW', '419'
+    else:
+      parts.append(subtag.lower())
+  normalized = '_'.join(parts)
+  if modifier != '':
+    normalized = f'{normalized}@{modifier.lower()}'
+  return normalized
+
+
+def truncation_chain(_language_code: str) -> tuple[str]:
+# Normalized language code followed by its truncations, longest first
+# A single character subtag (ex: 'x' for private use) is removed with the subtag that follows it
+  ( code, at, modifier ) = _language_code.partition('@')
+  subtags = code.split('_')
+  chain = []
+  while len(subtags) > 0:
+    chain.append('_'.join(subtags))
+    subtags.pop()
+    while len(subtags) > 1 and len(subtags[-1]) == 1:
+      subtags.pop()
+  if modifier != '':
+    chain = [ f'{c}@{modifier}' for c in chain ] + chain
+  return tuple(chain)
+
+
+def parse_accept_language(_header: str) -> list[str]:
+# Normalized language codes from an Accept-Language header, highest quality value first
+# Codes with the same quality value keep their order, and q=0, '*' and invalid tags are left out
+  weighted = []
+  for i, item in enumerate(_header.split(',')):
+    ( tag, *parameters ) = item.split(';')
+    q = 1.0
+    for parameter in parameters:
+      ( name, equals, value ) = parameter.partition('=')
+      if name.strip().lower() == 'q':
+        try:
+          q = float(value)
+        except ValueError:
+          q = 0.0
+    if not q > 0:
+      continue
+    language_code = normalize_language_code(tag)
+    if language_code != None:
+      weighted.append(( -q, i, language_code ))
+  weighted.sort()
+  return list(dict.fromkeys(language_code for ( q, i, language_code ) in weighted))
+
+
+class LocaleNegotiator(object):
+# Chooses languages among those installed for all of the given translation domains
+  __slots__ = ( '_translation_domains', '_default_language', '_installed', '_by_language', '_negotiate_cached' )
+  # _installed - installed language code for each lower case normalized language code
+  # _by_language - installed language codes for each language subtag, ex: 'en' -> ( 'en', 'en_US' )
+  # _negotiate_cached - _negotiate with a least recently used cache of results for each header
+
+  @property
+  def default_language(self) -> str:
+    return self._default_language
+
+  @property
+  def installed_languages(self) -> tuple[str]:
+    return tuple(sorted(self._installed.values()))
+
+  @property
+  def stats(self) -> dict[str, int]:
+    cache_info = self._negotiate_cached.cache_info()
+    return { 'hits': cache_info.hits, 'misses': cache_info.misses, 'size': cache_info.currsize, 'max_size': cache_info.maxsize }
+
+  def __init__(self, *_translation_domains: TranslationDomain, default_language: str = 'en', max_size: int | None = 1024) -> None:
+  # default_language - last in every result, and the only language if none of the requested ones are installed
+  # max_size - number of headers to keep the result for, None for no limit
+    super().__init__()
+    assert len(_translation_domains) > 0, _translation_domains
+    for i in range(0, len(_translation_domains)):
+      assert isinstance(_translation_domains[i], TranslationDomain), f'translation_domains[{i}] invalid type: {type(_translation_domains[i])}'
+    assert isinstance(default_language, str), type(default_language)
+    self._translation_domains = _translation_domains
+    self._default_language = default_language
+    self._negotiate_cached = functools.lru_cache(maxsize = max_size)(self._negotiate)
+    self.refresh()
+    return None
+
+  def refresh(self) -> None:
+  # Rebuilds the index of installed languages, after i18n.clear_locale_cache() if translation files were added
+    installed = None
+    for translation_domain in self._translation_domains:
+      languages = set(language for language, domains in _locale_dir_index(translation_domain._locdirpath).items() if translation_domain._domain in domains)
+      installed = languages if installed == None else installed & languages
+    self._installed = dict()
+    self._by_language = dict()
+    for language in sorted(installed):
+      language_code = normalize_language_code(language)
+      if language_code != None:
+        self._installed[language_code.lower()] = language
+        self._by_language.setdefault(language_code.split('_', 1)[0].split('@', 1)[0], []).append(language)
+    self._negotiate_cached.cache_clear()
+    return None
+
+  def _negotiate(self, _header: str) -> tuple[str]:
+    chain = []
+    for language_code in parse_accept_language(_header):
+      found = False
+      for truncated_code in truncation_chain(language_code):
+        installed = self._installed.get(truncated_code.lower())
+        if installed != None:
+          found = True
+          if installed not in chain:
+            chain.append(installed)
+      if not found:
+      # Any installed language with the same language subtag, ex: 'en_US' for 'en_GB'
+        for installed in self._by_language.get(language_code.split('_', 1)[0].split('@', 1)[0], ()):
+          if installed not in chain:
+            chain.append(installed)
+    if self._default_language not in chain:
+      chain.append(self._default_language)
+    return tuple(chain)
+
+  def negotiate(self, _accept_language: str | Iterable[str] | None) -> tuple[str]:
+  # _accept_language - Accept-Language header, language tags in order of preference, or None for the default language
+  # Returns the installed language codes in order of preference, ending with the default language
+    if _accept_language == None:
+      _accept_language = ''
+    elif not isinstance(_accept_language, str):
+      _accept_language = ','.join(_accept_language)
+    return self._negotiate_cached(_accept_language)
+
+  def languages(self, _accept_language: str | Iterable[str] | None) -> TranslationLanguages:
+  # Shared TranslationLanguages for the negotiated language codes
+    return shared_languages(*self.negotiate(_accept_language))
@@ -0,0 +1,106 @@
+# src/i18n/plural.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Plural form selection, shared by all catalogs with the same Plural-Forms expression.
+# gettext.c2py compiles the expression again for every catalog; here each expression is
+# compiled once, the common rules have built-in Python versions, and the forms for small
+# numbers are looked up in a table.
+#
+# Usage: plural_rule('n != 1')(2) -> 1    evaluate_many(plural_rule('n != 1'), [ 0, 1, 2 ]) -> [ 1, 0, 1 ]
+
+import functools, gettext
+from collections.abc import Callable, Iterable
+from typing import Final
+
+
+plural_table_size: Final[int] = 256
+  # Plural forms of 0 to plural_table_size - 1 are looked up in a table
+
+
+def _normalize(_expression: str) -> str:
+# Without white space, a trailing ';' or parentheses around the whole expression
+  expression = ''.join(_expression.split()).rstrip(';')
+  while expression.startswith('(') and expression.endswith(')'):
+    depth = 0
+    for i, c in enumerate(expression):
+      depth += 1 if c == '(' else -1 if c == ')' else 0
+      if depth == 0:
+        break
+    if i != len(expression) - 1:
+      break
+    expression = expression[1:-1]
+  return expression
+
+
+_builtin_rules: Final[dict[str, Callable[[int], int]]] = { _normalize(expression): rule for ( expression, rule ) in (
+# Plural-Forms of the GNU gettext manual, same results as gettext.c2py for int values
+  ( '0', lambda n: 0 ),
+    # Chinese, Japanese, Korean, Thai, Vietnamese ...
+  ( 'n != 1', lambda n: int(n != 1) ),
+    # English, German, Dutch, Spanish, Italian ...
+  ( 'n>1', lambda n: int(n > 1) ),
+    # French, Brazilian Portuguese
+  ( 'n%10==1 && n%100!=11 ? 0 : n != 0 ? 1 : 2', lambda n: 0 if n % 10 == 1 and n % 100 != 11 else 1 if n != 0 else 2 ),
+    # Latvian
+  ( 'n==1 ? 0 : n==2 ? 1 : 2', lambda n: 0 if n == 1 else 1 if n == 2 else 2 ),
+    # Irish
+  ( 'n==1 ? 0 : (n==0 || (n%100 > 0 && n%100 < 20)) ? 1 : 2', lambda n: 0 if n == 1 else 1 if n == 0 or 0 < n % 100 < 20 else 2 ),
+    # Romanian
+  ( 'n%10==1 && n%100!=11 ? 0 : n%10>=2 && (n%100<10 || n%100>=20) ? 1 : 2', lambda n: 0 if n % 10 == 1 and n % 100 != 11 else 1 if n % 10 >= 2 and ( n % 100 < 10 or n % 100 >= 20 ) else 2 ),
+    # Lithuanian
+  ( 'n%10==1 && n%100!=11 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2', lambda n: 0 if n % 10 == 1 and n % 100 != 11 else 1 if 2 <= n % 10 <= 4 and ( n % 100 < 10 or n % 100 >= 20 ) else 2 ),
+    # Russian, Ukrainian, Belarusian, Serbian, Croatian
+  ( '(n==1) ? 0 : (n>=2 && n<=4) ? 1 : 2', lambda n: 0 if n == 1 else 1 if 2 <= n <= 4 else 2 ),
+    # Czech, Slovak
+  ( 'n==1 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2', lambda n: 0 if n == 1 else 1 if 2 <= n % 10 <= 4 and ( n % 100 < 10 or n % 100 >= 20 ) else 2 ),
+    # Polish
+  ( 'n%100==1 ? 0 : n%100==2 ? 1 : n%100==3 || n%100==4 ? 2 : 3', lambda n: 0 if n % 100 == 1 else 1 if n % 100 == 2 else 2 if n % 100 in ( 3, 4 ) else 3 ),
+    # Slovenian
+  ( 'n==0 ? 0 : n==1 ? 1 : n==2 ? 2 : n%100>=3 && n%100<=10 ? 3 : n%100>=11 ? 4 : 5', lambda n: 0 if n == 0 else 1 if n == 1 else 2 if n == 2 else 3 if 3 <= n % 100 <= 10 else 4 if n % 100 >= 11 else 5 ),
+    # Arabic
+) }
+
+
+@functools.lru_cache(maxsize = 256)
+def _compiled_rule(_expression: str) -> Callable[[int], int]:
+  compiled = gettext.c2py(_expression)
+    # Raises ValueError if the expression is not valid, and handles values that are not int the same way as gettext
+  integer = _builtin_rules.get(_expression, compiled)
+    # For int values
+  table = tuple(integer(n) for n in range(plural_table_size))
+  size = len(table)
+
+  def plural(n):
+    if n.__class__ is int:
+      return table[n] if 0 <= n < size else integer(n)
+    return compiled(n)
+
+  plural.expression = _expression
+  plural.table = table
+  return plural
+
+
+def plural_rule(_expression: str) -> Callable[[int], int]:
+# Function returning the plural form index of a number, the same function for the same expression
+# _expression - the 'plural=' part of Plural-Forms, ex: 'n != 1'
+  return _compiled_rule(_normalize(_expression))
+
+
+def share_plural_rule(_translations: gettext.NullTranslations) -> None:
+# Replaces the plural function of a catalog loaded with its own gettext.c2py function
+  plural_forms = _translations._info.get('plural-forms')
+  if plural_forms != None and 'plural=' in plural_forms:
+    _translations.plural = plural_rule(plural_forms.split('plural=', 1)[1])
+  return None
+
+
+def evaluate_many(_plural: Callable[[int], int], _counts: Iterable[int]) -> list[int]:
+# _plural(n) for each of _counts, looked up in the table of a plural_rule function when n is in it
+  table = getattr(_plural, 'table', ())
+  size = len(table)
+  return [ table[n] if n.__class__ is int and 0 <= n < size else _plural(n) for n in _counts ]
@@ -0,0 +1,270 @@
+# src/i18n/po.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Portable object (*.po) parser and machine object (*.mo) compiler, so that
+# translations can be loaded without running msgfmt
+# The compiled *.mo data ends with the hash of the *.po file it was compiled from (see mo_source_magic),
+# after the catalog, where *.mo readers do not look, so that a *.mo file is matched with its *.po file cheaply
+#
+# Usage: python -m i18n.po <input>.po <output>.mo
+
+import ast, errno, gettext, hashlib, io, logging, os, re, struct, sys, threading
+from typing import Final
+
+
+mo_magic: Final[int] = 0x950412de
+mo_cache_version: Final[bytes] = b'i18n.po 2\x00'
+  # Included in the content hash of cached *.mo files - change if compile_mo output changes
+mo_source_magic: Final[bytes] = b'I18NSRC1'
+  # Followed by the sha256 of mo_cache_version and the *.po file contents, at the end of the data written by compile_po
+_source_trailer_size: Final[int] = len(mo_source_magic) + hashlib.sha256().digest_size
+
+_compiled_from: Final[dict[bytes, bool]] = dict()
+  # mo_compiled_from result for *.mo files without a source hash, ex: compiled by msgfmt,
+  # for each content hash of a *.mo and a *.po file, so unchanged files are compared once
+
+_charset_re: Final[re.Pattern] = re.compile(rb'charset=([^\s\\"]+)')
+_keyword_re: Final[re.Pattern] = re.compile(r'(msgctxt|msgid_plural|msgid|msgstr(?:\[(\d+)\])?)\s+(".*")\s*$')
+
+
+def po_charset(_data: bytes) -> str:
+# Character set from the Content-Type in the header, ex: 'UTF-8'
+  match = _charset_re.search(_data)
+  if match == None or match.group(1) == b'CHARSET':
+    return 'ascii'
+  return match.group(1).decode('ascii')
+
+
+def _unquote(_string: str, _filename: str, _lineno: int) -> str:
+  if '\\' not in _string and _string.count('"') == 2 and _string[-1] == '"':
+    return _string[1:-1]
+  try:
+    value = ast.literal_eval(_string)
+  except (SyntaxError, ValueError):
+    value = None
+  if not isinstance(value, str):
+    raise ValueError(f'{_filename}:{_lineno}: invalid string {_string}')
+  return value
+
+
+def parse_po(_data: bytes, *, use_fuzzy: bool = False, filename: str = '<po>') -> dict[str, str]:
+# Returns the messages keyed the same way as in a *.mo file:
+#   msgid                                   -> msgstr
+#   msgctxt + '\x04' + msgid                -> msgstr
+#   msgid + '\x00' + msgid_plural           -> msgstr[0] + '\x00' + msgstr[1] + ...
+# The header is the message with msgid ''
+# Fuzzy messages (except the header) are skipped unless use_fuzzy is True, same as msgfmt
+# Obsolete (#~) messages are always skipped
+  assert isinstance(_data, bytes), type(_data)
+  text = _data.decode(po_charset(_data))
+
+  messages = dict()
+  entry = dict()
+  fuzzy = False
+  keyword = None
+  index = None
+
+  def add_entry() -> None:
+    if 'msgid' in entry:
+      msgid = entry['msgid']
+      if 'msgctxt' in entry:
+        msgid = f"{entry['msgctxt']}\x04{msgid}"
+      if 'msgid_plural' in entry:
+        msgstrs = entry.get('msgstr[]', dict())
+        msgid = f"{msgid}\x00{entry['msgid_plural']}"
+        msgstr = '\x00'.join(msgstrs[i] for i in sorted(msgstrs))
+      else:
+        msgstr = entry.get('msgstr', '')
+      if msgid == '' or not fuzzy or use_fuzzy:
+        messages[msgid] = msgstr
+    entry.clear()
+    return None
+
+  for lineno, line in enumerate(text.splitlines(), 1):
+    line = line.strip()
+    if line == '':
+      continue
+
+    if line.startswith('#'):
+    # A comment ends the previous message
+      if 'msgstr' in entry or 'msgstr[]' in entry:
+        add_entry()
+        fuzzy = False
+      if line.startswith('#,'):
+        fuzzy = fuzzy or 'fuzzy' in ( flag.strip() for flag in line[2:].split(',') )
+      keyword = None
+      continue
+
+    if line.startswith('"'):
+    # Continuation of the previous string
+      if keyword == None:
+        raise ValueError(f'{filename}:{lineno}: string without keyword')
+      value = _unquote(line, filename, lineno)
+      if index == None:
+        entry[keyword] += value
+      else:
+        entry['msgstr[]'][index] += value
+      continue
+
+    match = _keyword_re.match(line)
+    if match == None:
+      raise ValueError(f'{filename}:{lineno}: syntax error: {line}')
+    ( keyword, index, string ) = match.groups()
+    value = _unquote(string, filename, lineno)
+    if keyword in ( 'msgctxt', 'msgid' ) and ( 'msgstr' in entry or 'msgstr[]' in entry ):
+      add_entry()
+      fuzzy = False
+    if index == None:
+      entry[keyword] = value
+    else:
+      index = int(index)
+      entry.setdefault('msgstr[]', dict())[index] = value
+  add_entry()
+
+  return messages
+
+
+def _hash_string(_key: bytes) -> int:
+# hashpjw - same hash function as GNU gettext uses for the *.mo hash table
+  hval = 0
+  for c in _key:
+    hval = ((hval << 4) + c) & 0xffffffffffffffff
+    g = hval & 0xf0000000
+    if g != 0:
+      hval ^= g >> 24
+      hval ^= g
+  return hval
+
+
+def _next_prime(_n: int) -> int:
+  n = _n | 1
+  while any(n % d == 0 for d in range(3, int(n ** 0.5) + 1, 2)):
+    n += 2
+  return n
+
+
+def compile_mo(_messages: dict[str, str], _charset: str = 'utf-8') -> bytes:
+# Returns the contents of a little endian *.mo file, with a hash table like msgfmt creates
+  keys = sorted(( msgid.encode(_charset), msgstr.encode(_charset) ) for msgid, msgstr in _messages.items())
+  count = len(keys)
+  hash_size = max(3, _next_prime(count * 4 // 3))
+  originals_offset = 28
+  translations_offset = originals_offset + count * 8
+  hash_offset = translations_offset + count * 8
+  strings_offset = hash_offset + hash_size * 4
+
+  originals = []
+  translations = []
+  strings = io.BytesIO()
+  for msgid, msgstr in keys:
+    originals.append(( len(msgid), strings_offset + strings.tell() ))
+    strings.write(msgid + b'\x00')
+  for msgid, msgstr in keys:
+    translations.append(( len(msgstr), strings_offset + strings.tell() ))
+    strings.write(msgstr + b'\x00')
+
+  hash_table = [ 0 ] * hash_size
+  for i, ( msgid, msgstr ) in enumerate(keys):
+    hval = _hash_string(msgid.split(b'\x00', 1)[0])
+    index = hval % hash_size
+    increment = 1 + (hval % (hash_size - 2))
+    while hash_table[index] != 0:
+      index = index - (hash_size - increment) if index >= hash_size - increment else index + increment
+    hash_table[index] = i + 1
+
+  output = io.BytesIO()
+  output.write(struct.pack('<7I', mo_magic, 0, count, originals_offset, translations_offset, hash_size, hash_offset))
+  for entry in originals:
+    output.write(struct.pack('<2I', *entry))
+  for entry in translations:
+    output.write(struct.pack('<2I', *entry))
+  output.write(struct.pack(f'<{hash_size}I', *hash_table))
+  output.write(strings.getvalue())
+  return output.getvalue()
+
+
+def _source_hash(_data: bytes) -> bytes:
+  return hashlib.sha256(mo_cache_version + _data).digest()
+
+
+def compile_po(_data: bytes, *, use_fuzzy: bool = False, filename: str = '<po>') -> bytes:
+# *.po file contents to *.mo file contents, followed by the hash of _data
+  return compile_mo(parse_po(_data, use_fuzzy = use_fuzzy, filename = filename), po_charset(_data)) + mo_source_magic + _source_hash(_data)
+
+
+def cached_mo_filepath(_pofilepath: str, _cache_dirpath: str) -> str:
+# Compiles the *.po file into the cache directory, unless it was already compiled
+# The cached *.mo file is named by the hash of the *.po file contents, so modification times do not matter
+  with open(_pofilepath, 'rb') as fp:
+    data = fp.read()
+  mofilepath = os.path.join(_cache_dirpath, f'{_source_hash(data).hex()}.mo')
+  if not os.path.isfile(mofilepath):
+    if logging.root.isEnabledFor(logging.INFO):
+      logging.info(f"Compiling '{_pofilepath}' to '{mofilepath}'")
+    os.makedirs(_cache_dirpath, exist_ok = True)
+    tmpfilepath = f'{mofilepath}.{os.getpid()}.{threading.get_ident()}.tmp'
+      # Unique for each thread, since threads of a process can compile the same *.po file at once
+    with open(tmpfilepath, 'wb') as fp:
+      fp.write(compile_po(data, filename = _pofilepath))
+    os.replace(tmpfilepath, mofilepath)
+      # Atomic, so other processes never see a partly written file
+  return mofilepath
+
+
+def mo_compiled_from(_mofilepath: str, _pofilepath: str) -> bool:
+# Whether the *.mo file has the same catalog as the *.po file compiles to
+# Decided by the contents, so modification times do not matter (they are not kept by all copies and checkouts):
+# the source hash at the end of a *.mo file written by compile_po is compared with the hash of the *.po file,
+# other *.mo files, ex: compiled by msgfmt, are compared with the compiled *.po file, once for each content
+  with open(_pofilepath, 'rb') as fp:
+    po_data = fp.read()
+  source_hash = _source_hash(po_data)
+  with open(_mofilepath, 'rb') as fp:
+    size = fp.seek(0, os.SEEK_END)
+    if size >= _source_trailer_size:
+      fp.seek(size - _source_trailer_size)
+      trailer = fp.read()
+      if trailer.startswith(mo_source_magic):
+        return trailer[len(mo_source_magic):] == source_hash
+    fp.seek(0)
+    mo_data = fp.read()
+  key = hashlib.sha256(source_hash + mo_data).digest()
+  compiled_from = _compiled_from.get(key)
+  if compiled_from == None:
+    compiled_data = compile_po(po_data, filename = _pofilepath)
+    try:
+      compiled_from = gettext.GNUTranslations(io.BytesIO(compiled_data))._catalog == gettext.GNUTranslations(io.BytesIO(mo_data))._catalog
+    except (OSError, struct.error):
+    # The *.mo file is corrupt
+      compiled_from = False
+    _compiled_from[key] = compiled_from
+  return compiled_from
+
+
+def load_po(_pofilepath: str, _cache_dirpath: str | None = None, class_: type = gettext.GNUTranslations) -> gettext.NullTranslations:
+# _cache_dirpath - None to compile in memory every time
+# class_ - same as for gettext.translation
+  if _cache_dirpath != None:
+    with open(cached_mo_filepath(_pofilepath, _cache_dirpath), 'rb') as fp:
+      return class_(fp)
+  with open(_pofilepath, 'rb') as fp:
+    data = fp.read()
+  return class_(io.BytesIO(compile_po(data, filename = _pofilepath)))
+
+
+mainName = '__main__'
+
+if __name__ == mainName:
+
+  if len(sys.argv) != 3:
+    print(f'Usage: python -m i18n.po <input>.po <output>.mo', file = sys.stderr)
+    sys.exit(errno.EINVAL)
+  with open(sys.argv[1], 'rb') as fp:
+    mo_data = compile_po(fp.read(), filename = sys.argv[1])
+  with open(sys.argv[2], 'wb') as fp:
+    fp.write(mo_data)
@@ -0,0 +1,162 @@
+# src/i18n/registry.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Process-wide cache of loaded translations, shared by all threads
+
+import logging, threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Final
+
+
+class TranslationRegistry(object):
+  __slots__ = ( '_max_size', '_entries', '_loading', '_lock', '_hits', '_misses', '_evictions', '_eviction_listeners' )
+  # _max_size - maximum number of entries, None for no limit
+  #             the least recently used entries are evicted when the limit is exceeded
+  # _entries - loaded values, least recently used first
+  # _loading - threading.Event for each key that is being loaded by a thread
+  # _eviction_listeners - called with ( key, value ) for each value evicted or replaced, with the lock held
+
+  @property
+  def max_size(self) -> int | None:
+    return self._max_size
+
+  @max_size.setter
+  def max_size(self, _max_size: int | None) -> None:
+    assert isinstance(_max_size, int | None), type(_max_size)
+    if _max_size != None and _max_size < 1:
+      raise ValueError(f'max_size must be at least 1: {_max_size}')
+    with self._lock:
+      self._max_size = _max_size
+      self._evict_over_max_size()
+    return None
+
+  @property
+  def stats(self) -> dict[str, int]:
+    with self._lock:
+      return { 'hits': self._hits, 'misses': self._misses, 'evictions': self._evictions, 'size': len(self._entries), 'max_size': self._max_size }
+
+  def __init__(self, max_size: int | None = 1024) -> None:
+    super().__init__()
+    self._lock = threading.Lock()
+    self._entries = OrderedDict()
+    self._loading = dict()
+    self._hits = 0
+    self._misses = 0
+    self._evictions = 0
+    self._eviction_listeners = ()
+    self._max_size = None
+    self.max_size = max_size
+    return None
+
+  def __contains__(self, _key: Hashable) -> bool:
+    return _key in self._entries
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def add_eviction_listener(self, _listener: Callable[[Hashable, object], None]) -> None:
+  # _listener(key, value) is called for each value evicted or replaced, ex: to drop what was derived from it
+  # It is called with the lock of the registry held, so it must not use the registry
+    with self._lock:
+      self._eviction_listeners = ( *self._eviction_listeners, _listener )
+    return None
+
+  def remove_eviction_listener(self, _listener: Callable[[Hashable, object], None]) -> None:
+    with self._lock:
+      self._eviction_listeners = tuple(listener for listener in self._eviction_listeners if listener != _listener)
+    return None
+
+  def _evicted(self, _key: Hashable, _value: object) -> None:
+  # Called with self._lock held
+    for listener in self._eviction_listeners:
+      listener(_key, _value)
+    return None
+
+  def _evict_over_max_size(self) -> None:
+  # Called with self._lock held
+    if self._max_size != None:
+      while len(self._entries) > self._max_size:
+        ( key, value ) = self._entries.popitem(last = False)
+        self._evictions += 1
+        self._evicted(key, value)
+        if logging.root.isEnabledFor(logging.DEBUG):
+          logging.debug(f'Evicted ({key}) from translation registry')
+    return None
+
+  def get(self, _key: Hashable, _default: object = None) -> object:
+  # Does not load, and does not count as a hit or miss
+    with self._lock:
+      return self._entries.get(_key, _default)
+
+  def items(self) -> list[tuple[Hashable, object]]:
+  # ( key, value ) of the entries, least recently used first - does not count as hits
+    with self._lock:
+      return list(self._entries.items())
+
+  def get_or_load(self, _key: Hashable, _loader: Callable[[], object]) -> object:
+  # Returns the value for _key, calling _loader() to create it if it is not in the registry
+  # Only one thread calls _loader() for the same key - other threads wait for it to finish
+    while True:
+      with self._lock:
+        if _key in self._entries:
+          self._entries.move_to_end(_key)
+          self._hits += 1
+          return self._entries[_key]
+        event = self._loading.get(_key)
+        if event == None:
+          event = threading.Event()
+          self._loading[_key] = event
+          self._misses += 1
+          break
+      event.wait()
+    # If the loading thread failed, this thread tries to load it
+
+    try:
+      value = _loader()
+      with self._lock:
+        self._entries[_key] = value
+        self._evict_over_max_size()
+    finally:
+      with self._lock:
+        del self._loading[_key]
+      event.set()
+    return value
+
+  def set(self, _key: Hashable, _value: object) -> None:
+  # Adds or replaces the value for _key, ex: with a reloaded one
+  # Other threads get either the previous or the new value, never a partly loaded one
+    with self._lock:
+      previous = self._entries.get(_key)
+      self._entries[_key] = _value
+      self._entries.move_to_end(_key)
+      if previous != None and previous is not _value:
+        self._evicted(_key, previous)
+      self._evict_over_max_size()
+    return None
+
+  def evict(self, _key: Hashable) -> bool:
+  # Returns False if _key was not in the registry
+    with self._lock:
+      if _key not in self._entries:
+        return False
+      value = self._entries.pop(_key)
+      self._evictions += 1
+      self._evicted(_key, value)
+    return True
+
+  def clear(self) -> None:
+    with self._lock:
+      self._evictions += len(self._entries)
+      for ( key, value ) in self._entries.items():
+        self._evicted(key, value)
+      self._entries.clear()
+    return None
+
+
+translation_registry: Final[TranslationRegistry] = TranslationRegistry()
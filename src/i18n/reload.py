@@ -0,0 +1,255 @@
+# src/i18n/reload.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Reloads translation catalogs when their *.mo or *.po files change, without restarting.
+# A background thread waits for changes in the LC_MESSAGES directories (inotify on Linux,
+# otherwise it checks the files every interval seconds), loads the changed catalogs and then
+# swaps them into the translation registry and into every Translation using them.
+# The catalogs in the translation registry are watched, so the next Translation created for a
+# catalog gets the reloaded one, and so are those of Translation instances still in use.
+# Calls in progress finish with the previous catalog.
+#
+# Usage:
+#   reloader = TranslationReloader()
+#   reloader.start()   # or: with TranslationReloader(): ...
+#   ...
+#   reloader.stop()
+#
+# Replace translation files atomically (write another file and rename it), so that a partly
+# written file is never loaded - a file that fails to load counts as a failure and the previous
+# catalog is kept.
+
+import ctypes, ctypes.util, functools, logging, os, select, threading, time
+from typing import Final
+
+from .registry import translation_registry
+from .text import Translation, _live_translations, _live_translations_lock, clear_locale_cache, message_locale_category_dirname
+
+
+_inotify_mask: Final[int] = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+  # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+@functools.cache
+def _inotify_libc() -> ctypes.CDLL | None:
+# None if inotify is not available, ex: not Linux
+  try:
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno = True)
+    libc.inotify_init1
+    libc.inotify_add_watch
+  except (OSError, AttributeError):
+    return None
+  return libc
+
+
+class _Inotify(object):
+  __slots__ = ( '_libc', '_fd', '_watched' )
+  # _watched - directories that are watched
+
+  def __init__(self) -> None:
+    super().__init__()
+    self._libc = _inotify_libc()
+    if self._libc == None:
+      raise OSError(0, 'inotify is not available')
+    self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if self._fd < 0:
+      raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+    self._watched = set()
+    return None
+
+  def watch(self, _dirpath: str) -> None:
+  # Directories that do not exist are tried again on the next call
+    if _dirpath not in self._watched and self._libc.inotify_add_watch(self._fd, os.fsencode(_dirpath), _inotify_mask) >= 0:
+      self._watched.add(_dirpath)
+    return None
+
+  def wait(self, _timeout: float) -> bool:
+  # Returns True if a watched directory changed within _timeout seconds
+    ( readable, writable, exceptional ) = select.select([ self._fd ], [], [], _timeout)
+    if len(readable) == 0:
+      return False
+    try:
+      while len(os.read(self._fd, 65536)) > 0:
+        pass
+    except BlockingIOError:
+      pass
+    return True
+
+  def close(self) -> None:
+    os.close(self._fd)
+    return None
+
+
+class TranslationReloader(object):
+  __slots__ = ( '_interval', '_use_inotify', '_signatures', '_dirpaths', '_generations', '_failures', '_last_latency', '_max_latency', '_lock', '_stop_event', '_thread' )
+  # _signatures - ( mtime, size, inode ) of the watched files of each registry key ( locale directory, domain, languages ),
+  #               None for a file that does not exist
+  # _dirpaths - LC_MESSAGES directories of the watched files
+  # _generations - number of times the catalog of each registry key was reloaded
+  # _last_latency, _max_latency - seconds from finding a changed file to the new catalog being in use
+
+  @property
+  def stats(self) -> dict[str, int | float]:
+    with self._lock:
+      return { 'generation': sum(self._generations.values()), 'failures': self._failures, 'last_latency': self._last_latency, 'max_latency': self._max_latency, 'watched': len(self._signatures) }
+
+  @property
+  def generations(self) -> dict[str, int]:
+    with self._lock:
+      return dict(self._generations)
+
+  @property
+  def running(self) -> bool:
+    return self._thread != None and self._thread.is_alive()
+
+  def __init__(self, interval: float = 1.0, *, use_inotify: bool | None = None) -> None:
+  # interval - seconds between checks of the files
+  #            with inotify, changes are reloaded at once and the interval is only for newly created Translation instances
+  # use_inotify - None to use inotify if it is available, False to only check the files every interval
+    super().__init__()
+    assert isinstance(interval, int | float), type(interval)
+    assert isinstance(use_inotify, bool | None), type(use_inotify)
+    self._interval = interval
+    self._use_inotify = use_inotify
+    self._signatures = dict()
+    self._dirpaths = set()
+    self._generations = dict()
+    self._failures = 0
+    self._last_latency = None
+    self._max_latency = None
+    self._lock = threading.RLock()
+    self._stop_event = threading.Event()
+    self._thread = None
+    return None
+
+  def __enter__(self) -> 'TranslationReloader':
+    self.start()
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback) -> None:
+    self.stop()
+    return None
+
+  @staticmethod
+  def _watched_filepaths(_key: tuple[str, str, tuple[str]]) -> list[str]:
+  # *.mo and *.po files of the found language and of the fallback languages after it
+    ( locdirpath, domain, languages ) = _key
+    filepaths = []
+    for l in languages:
+      filepath = os.path.join(locdirpath, l, message_locale_category_dirname, domain)
+      filepaths += [ f'{filepath}.mo', f'{filepath}.po' ]
+    return filepaths
+
+  @staticmethod
+  def _watched_keys() -> list[tuple[str, str, tuple[str]]]:
+  # Registry keys of the catalogs in translation_registry, and of the Translation instances still in use
+    keys = dict.fromkeys(key for ( key, value ) in translation_registry.items() if value.__class__ is tuple)
+      # Catalog entries are ( frame_summary, catalog, templates ), the registry has other instances too
+    with _live_translations_lock:
+      keys.update(dict.fromkeys(translation._translation_domain_language.key for translation in _live_translations))
+    return list(keys)
+
+  @staticmethod
+  def _signature(_filepaths: list[str]) -> tuple:
+    signature = []
+    for filepath in _filepaths:
+      try:
+        stat_result = os.stat(filepath)
+        signature.append(( stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino ))
+      except FileNotFoundError:
+        signature.append(None)
+    return tuple(signature)
+
+  def check(self) -> int:
+  # Reloads the catalogs with files that changed since the previous check, returns the number reloaded
+  # Files are only compared from the first check that finds their catalog, and until it is evicted and no Translation uses it
+    with self._lock:
+      changed = []
+      signatures = dict()
+      dirpaths = set()
+      for key in self._watched_keys():
+        filepaths = self._watched_filepaths(key)
+        dirpaths.update(os.path.dirname(filepath) for filepath in filepaths)
+        signatures[key] = self._signature(filepaths)
+        if key in self._signatures and self._signatures[key] != signatures[key]:
+          changed.append(key)
+      self._signatures = signatures
+      self._dirpaths = dirpaths
+      if len(changed) > 0:
+        clear_locale_cache()
+          # Which files exist, and whether a *.mo file was compiled from its *.po file, may have changed
+
+      reloaded = 0
+      for key in changed:
+        start = time.perf_counter()
+        try:
+          translations = Translation._load_catalog(*key)
+        except Exception:
+          self._failures += 1
+          logging.exception(f'Failed to reload ({key}) - keeping the previous catalog')
+          continue
+        templates = dict()
+        entry = translation_registry.get(key)
+        if entry != None:
+        # Not if it was evicted since, the next Translation loads it again
+          translation_registry.set(key, ( entry[0], translations, templates ))
+        with _live_translations_lock:
+          live_translations = [ translation for translation in _live_translations if translation._translation_domain_language.key == key ]
+        for translation in live_translations:
+          translation._swap(translations, templates)
+        latency = time.perf_counter() - start
+        self._last_latency = latency
+        self._max_latency = latency if self._max_latency == None else max(self._max_latency, latency)
+        self._generations[key] = self._generations.get(key, 0) + 1
+        reloaded += 1
+        if logging.root.isEnabledFor(logging.INFO):
+          logging.info(f'Reloaded ({key}) generation {self._generations[key]} in {latency:.6f} seconds')
+      return reloaded
+
+  def start(self) -> None:
+  # Checks the files once, then starts the background thread
+    if self.running:
+      return None
+    self.check()
+    self._stop_event.clear()
+    self._thread = threading.Thread(target = self._run, name = 'i18n-reloader', daemon = True)
+    self._thread.start()
+    return None
+
+  def stop(self) -> None:
+  # Waits up to one interval for the background thread to finish
+    self._stop_event.set()
+    if self._thread != None:
+      self._thread.join()
+      self._thread = None
+    return None
+
+  def _run(self) -> None:
+    inotify = None
+    if self._use_inotify != False:
+      try:
+        inotify = _Inotify()
+      except OSError as e:
+        if self._use_inotify == True:
+          logging.warning(f'Checking translation files every {self._interval} seconds - {e}')
+    try:
+      while not self._stop_event.is_set():
+        if inotify == None:
+          self._stop_event.wait(self._interval)
+        else:
+          for dirpath in tuple(self._dirpaths):
+            inotify.watch(dirpath)
+          if inotify.wait(self._interval):
+            self._stop_event.wait(0.01)
+              # Events usually come in bursts, ex: create, write and close
+        if not self._stop_event.is_set():
+          self.check()
+    finally:
+      if inotify != None:
+        inotify.close()
+    return None
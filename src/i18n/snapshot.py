@@ -0,0 +1,173 @@
+# src/i18n/snapshot.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# One file with the catalogs of all the domains and languages of an application, built
+# ahead of time, then memory mapped when the application starts: no *.po compiling,
+# no file for each catalog, and each catalog is a MappedTranslations on the shared mapping.
+# Contexts, plural forms and the hash table are in the *.mo data of each catalog.
+# The catalogs are keyed by locale directory, domain and language. A domain of a locale directory
+# that is in the snapshot is only loaded from it: its language directories are not scanned.
+#
+# Build: python -m i18n.snapshot <output> <locale directory> <domain> [<domain> ...]
+# Usage: use_snapshot('<output>')
+#
+# File layout:
+#   0  magic (snapshot_magic)
+#   8  length of the index (unsigned 32 bit little endian)
+#   12 0 (unsigned 32 bit)
+#   16 index - UTF-8 JSON list of [ locale directory, domain, language, offset, length ]
+#   the *.mo data of each catalog, from the first multiple of 8 after the index
+#      locale directory is relative to the directory of the snapshot file, so that they can be moved together
+#      offset is from the start of the *.mo data of the first catalog, and is a multiple of 8
+
+import errno, io, json, logging, mmap, os, struct, sys
+from collections.abc import Iterable
+from typing import Final
+
+from .mo import MappedTranslations
+from .po import compile_po
+from .text import Translation, TranslationDomain, _locale_dir_index, _po_to_compile, clear_locale_cache, message_locale_category_dirname
+
+
+snapshot_magic: Final[bytes] = b'I18NSNP1'
+_header_struct: Final[struct.Struct] = struct.Struct('<8sII')
+
+
+def _data_offset(_index_length: int) -> int:
+  return (_header_struct.size + _index_length + 7) & ~7
+
+
+def _relative_dirpath(_dirpath: str, _start: str) -> str:
+  try:
+    return os.path.relpath(_dirpath, _start)
+  except ValueError:
+  # On another drive
+    return os.path.abspath(_dirpath)
+
+
+def build_snapshot(_filepath: str, _translation_domains: Iterable[TranslationDomain], _languages: Iterable[str] | str = 'all') -> int:
+# Writes the catalogs of _translation_domains and of the 'i18n' and 'pronouns' domains used by this package
+# _languages - 'all' for every language installed for each domain, or language codes
+# Returns the number of catalogs
+  translation_domains = dict()
+  for translation_domain in ( *_translation_domains, TranslationDomain('i18n'), TranslationDomain('pronouns') ):
+    translation_domains.setdefault(( os.path.abspath(translation_domain._locdirpath), translation_domain._domain ), translation_domain)
+
+  catalogs = []
+  for ( ( locdirpath, domain ), translation_domain ) in translation_domains.items():
+    for language, domains in sorted(_locale_dir_index(translation_domain._locdirpath).items()):
+      if domain not in domains or ( _languages != 'all' and language not in _languages ):
+        continue
+      pofilepath = _po_to_compile(domains, domain)
+      filepath = os.path.join(translation_domain._locdirpath, language, message_locale_category_dirname, f'{domain}.mo') if pofilepath == None else pofilepath
+      with open(filepath, 'rb') as fp:
+        data = fp.read()
+      if pofilepath != None:
+        data = compile_po(data, filename = filepath)
+      catalogs.append(( locdirpath, domain, language, data ))
+
+  snapshot_dirpath = os.path.dirname(os.path.abspath(_filepath))
+  index = []
+  offset = 0
+  for ( locdirpath, domain, language, data ) in catalogs:
+    index.append([ _relative_dirpath(locdirpath, snapshot_dirpath), domain, language, offset, len(data) ])
+    offset += (len(data) + 7) & ~7
+  index_data = json.dumps(index, ensure_ascii = False, separators = ( ',', ':' )).encode('utf-8')
+  data_offset = _data_offset(len(index_data))
+
+  tmpfilepath = f'{_filepath}.{os.getpid()}.tmp'
+  with open(tmpfilepath, 'wb') as fp:
+    fp.write(_header_struct.pack(snapshot_magic, len(index_data), 0))
+    fp.write(index_data)
+    for ( entry, ( locdirpath, domain, language, data ) ) in zip(index, catalogs):
+      fp.write(b'\x00' * (data_offset + entry[3] - fp.tell()))
+      fp.write(data)
+  os.replace(tmpfilepath, _filepath)
+    # Atomic, so processes starting while it is built never see a partly written file
+  return len(catalogs)
+
+
+class CatalogSnapshot(object):
+  __slots__ = ( '_filepath', '_buffer', '_index', '_languages', '_dirpaths' )
+  # _buffer - mmap of the file (or bytes if it cannot be memory mapped)
+  # _index - ( offset in _buffer, length ) for each ( absolute locale directory, domain, language )
+  # _languages - languages of each ( absolute locale directory, domain ), in the order of the index
+  # _dirpaths - absolute path of each locale directory path looked up, so that it is made absolute once
+
+  @property
+  def filepath(self) -> str:
+    return self._filepath
+
+  def __init__(self, _filepath: str) -> None:
+    super().__init__()
+    self._filepath = _filepath
+    with open(_filepath, 'rb') as fp:
+      try:
+        self._buffer = mmap.mmap(fp.fileno(), 0, access = mmap.ACCESS_READ)
+      except (OSError, ValueError, io.UnsupportedOperation):
+        self._buffer = fp.read()
+    if len(self._buffer) < _header_struct.size:
+      raise OSError(0, 'File is corrupt', _filepath)
+    ( magic, index_length, reserved ) = _header_struct.unpack_from(self._buffer, 0)
+    if magic != snapshot_magic:
+      raise OSError(0, 'Bad magic number', _filepath)
+    index = json.loads(self._buffer[_header_struct.size : _header_struct.size + index_length].decode('utf-8'))
+    data_offset = _data_offset(index_length)
+    snapshot_dirpath = os.path.dirname(os.path.abspath(_filepath))
+    self._index = dict()
+    self._languages = dict()
+    for ( locdirpath, domain, language, offset, length ) in index:
+      locdirpath = os.path.normpath(os.path.join(snapshot_dirpath, locdirpath))
+      self._index[( locdirpath, domain, language )] = ( data_offset + offset, length )
+      self._languages[( locdirpath, domain )] = ( *self._languages.get(( locdirpath, domain ), ()), language )
+    self._dirpaths = dict()
+    return None
+
+  def _dirpath(self, _locdirpath: str) -> str:
+    dirpath = self._dirpaths.get(_locdirpath)
+    if dirpath == None:
+      dirpath = os.path.abspath(_locdirpath)
+      self._dirpaths[_locdirpath] = dirpath
+    return dirpath
+
+  def __contains__(self, _key: tuple[str, str, str]) -> bool:
+  # _key - ( locale directory, domain, language )
+    ( locdirpath, domain, language ) = _key
+    return ( self._dirpath(locdirpath), domain, language ) in self._index
+
+  def __len__(self) -> int:
+    return len(self._index)
+
+  def languages(self, _locdirpath: str, _domain: str) -> tuple[str]:
+  # Languages of _domain in the locale directory, empty if the snapshot does not have it
+    return self._languages.get(( self._dirpath(_locdirpath), _domain ), ())
+
+  def catalog(self, _locdirpath: str, _domain: str, _language: str) -> MappedTranslations:
+  # A new MappedTranslations for each call, since fallbacks are added to it
+    ( offset, length ) = self._index[( self._dirpath(_locdirpath), _domain, _language )]
+    return MappedTranslations.from_buffer(self._buffer, offset, length, filename = f'{self._filepath}:{_domain}:{_language}')
+
+
+def use_snapshot(_filepath: str | None) -> CatalogSnapshot | None:
+# Translations created after this are loaded from the snapshot file, for the domains and languages it has
+# None to load them from the locale directories again
+  Translation.snapshot = None if _filepath == None else CatalogSnapshot(_filepath)
+  clear_locale_cache()
+  return Translation.snapshot
+
+
+mainName = '__main__'
+
+if __name__ == mainName:
+
+  if len(sys.argv) < 4:
+    print(f'Usage: python -m i18n.snapshot <output> <locale directory> <domain> [<domain> ...]', file = sys.stderr)
+    sys.exit(errno.EINVAL)
+  logging.getLogger(None).setLevel(logging.ERROR)
+  count = build_snapshot(sys.argv[1], [ TranslationDomain(domain, locdirpath = sys.argv[2]) for domain in sys.argv[3:] ])
+  print(f"{count} catalogs written to '{sys.argv[1]}'")
@@ -0,0 +1,84 @@
+# src/i18n/template.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Translated strings are parsed once into a MessageTemplate, so that rendering
+# does not have to parse the format string again on every call
+
+import string
+from typing import Final
+
+
+_formatter: Final[string.Formatter] = string.Formatter()
+
+
+class MessageTemplate(object):
+  __slots__ = ( '_text', '_parts', '_fields', '_simple', '_pronoun_placeholder', '_subject_field_names' )
+    # _parts - literal segments, with None in the positions of the field slots
+    # _fields - tuple of ( index in _parts, field name, conversion, format spec ) for each field slot
+    # _simple - False if the text uses anything that str.format must handle itself
+    #           (positional, attribute or index fields, nested format specs, malformed braces)
+    # _subject_field_names - names of the {names}, {determiner} and {pronoun...} fields, filled in by render_with_subject
+
+  @property
+  def text(self) -> str:
+    return self._text
+
+  @property
+  def field_names(self) -> tuple[str]:
+    return tuple(dict.fromkeys(f[1] for f in self._fields))
+
+  @property
+  def pronoun_placeholder(self) -> str | None:
+  # ex: '{pronoun}' if the text contains a pronoun placeholder, otherwise None
+    return self._pronoun_placeholder
+
+  @property
+  def subject_field_names(self) -> tuple[str]:
+    return self._subject_field_names
+
+  def __init__(self, _text: str) -> None:
+    super().__init__()
+    assert isinstance(_text, str), type(_text)
+    self._text = _text
+
+    index = _text.find('{pronoun')
+    self._pronoun_placeholder = None if index == -1 else _text[index : _text.find('}', index) + 1]
+
+    parts = []
+    fields = []
+    simple = True
+    try:
+      for literal, field_name, format_spec, conversion in _formatter.parse(_text):
+        if literal:
+          parts.append(literal)
+        if field_name is not None:
+          if not field_name.isidentifier() or '{' in format_spec or conversion not in ( None, 'r', 's', 'a' ):
+            simple = False
+          fields.append(( len(parts), field_name, conversion, format_spec ))
+          parts.append(None)
+    except ValueError:
+      simple = False
+    self._subject_field_names = tuple(dict.fromkeys(f[1] for f in fields if f[1] in ( 'names', 'determiner' ) or f[1].startswith('pronoun')))
+    self._parts = tuple(parts) if simple else ( _text, )
+    self._fields = tuple(fields) if simple else ( )
+    self._simple = simple
+    return None
+
+  def format(self, _text_dict: dict[str]) -> str:
+  # Same result as self.text.format(**_text_dict)
+    if not self._simple:
+      return self._text.format(**_text_dict)
+    if not self._fields:
+      return self._parts[0] if len(self._parts) == 1 else ''.join(self._parts)
+    parts = list(self._parts)
+    for i, name, conversion, format_spec in self._fields:
+      value = _text_dict[name]
+      if conversion is not None:
+        value = repr(value) if conversion == 'r' else ascii(value) if conversion == 'a' else str(value)
+      parts[i] = value if value.__class__ is str and not format_spec else format(value, format_spec)
+    return ''.join(parts)
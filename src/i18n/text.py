@@ -10,198 +10,501 @@
 # Use lower(...) to convert to lower case
 # Use title(...) to convert to title case
 
-import errno, gettext, inspect, locale, logging, os, sys, traceback
+import asyncio, errno, functools, gettext, inspect, itertools, locale, logging, os, sys, threading, traceback, weakref
+from collections.abc import Callable, Hashable, Iterable, Iterator
 from enum import Enum
-from types import FrameType
+from types import FrameType, MappingProxyType
 from typing import ClassVar, Final
 
+from .plural import evaluate_many, share_plural_rule
+from .po import load_po, mo_compiled_from
+from .registry import translation_registry
+from .template import MessageTemplate
+
 
 message_locale_category: Final[int] = locale.LC_MESSAGES
 message_locale_category_dirname: Final[str] = 'LC_MESSAGES'
 
 
+def _caller_frame_summary(_depth: int) -> traceback.FrameSummary | None:
+# Where the caller of the function calling this was called from, only if Translation.capture_caller is True
+# Takes the same time for any stack depth, and does not read the source line
+  if not Translation.capture_caller:
+    return None
+  frame = sys._getframe(_depth + 1)
+  return traceback.FrameSummary(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name, lookup_line = False)
+
+
+@functools.lru_cache(maxsize = 1024)
+def _language_chain(_language_codes: tuple[str | None]) -> tuple[str]:
+# Language codes to look for, in order, for the language codes given to TranslationLanguages
+# Cached for the process, so the locale is only read the first time each combination is used
+  if logging.root.isEnabledFor(logging.INFO):
+    logging.info(f"Default shared locale directory is '{sys.base_prefix}/share/locales'")
+  for i in range(0, len(_language_codes)):
+    assert isinstance(_language_codes[i], str | None), f'language_codes[{i}] invalid type: {type(_language_codes[i])}'
+  if len(_language_codes) == 0 or None in _language_codes:
+    if logging.root.isEnabledFor(logging.INFO):
+      ( language_code, encoding ) = locale.getdefaultlocale()
+      logging.info(f"( default locale ) language_code: {language_code} encoding: {encoding}")
+      for lc in (locale.LC_COLLATE, locale.LC_CTYPE, locale.LC_MONETARY, locale.LC_NUMERIC, locale.LC_TIME, locale.LC_MESSAGES, ):
+        ( language_code, encoding ) = locale.getlocale(category = lc)
+        logging.info(f"locale category: {lc} language_code: {language_code} encoding: {encoding}")
+    ( language_code, encoding ) = locale.getlocale(category = message_locale_category)
+    if language_code == None:
+      ( language_code, encoding ) = locale.getdefaultlocale()
+      # language_code - ex: 'en_US' for US, encoding - 'UTF-8'
+    assert language_code != None, language_code
+    if len(_language_codes) == 0:
+      langs = ( language_code, )
+    else:
+    # Replace "None" with the default language code
+      i = _language_codes.index(None)
+      if language_code in _language_codes:
+        langs = tuple(filter(lambda l: l is not None, _language_codes))
+      else:
+        langs = _language_codes[:i] + ( language_code, ) + _language_codes[i + 1:]
+    # Check for another instance of "None"
+      if None in langs:
+        raise ValueError(f'More than one of the supplied language_codes is None')
+  else:
+    langs = _language_codes
+
+# Fallback language is English ('en')
+  if 'en' in _language_codes:
+    return tuple(langs)
+  return ( *langs, 'en' )
+
+
+def _scan_locale_dir(_locdirpath: str) -> dict[str, dict[str, str | tuple[str, str] | None]]:
+# For each language directory, the domains that have translation object files:
+#   None to load '<domain>.mo', the path of '<domain>.po' to compile, or ( *.mo path, *.po path ) if there are both (see _po_to_compile)
+# One os.scandir of the locale directory and of each '<language>/LC_MESSAGES' directory, the files are not read
+  index = dict()
+  with os.scandir(_locdirpath) as language_entries:
+    for language_entry in language_entries:
+      if not language_entry.is_dir():
+        continue
+      try:
+        with os.scandir(os.path.join(language_entry.path, message_locale_category_dirname)) as entries:
+          files = { entry.name: entry for entry in entries if entry.is_file() }
+      except (FileNotFoundError, NotADirectoryError):
+        continue
+      domains = dict()
+      for name, entry in files.items():
+        ( domain, extension ) = os.path.splitext(name)
+        if extension == '.mo':
+          po_entry = files.get(f'{domain}.po')
+          domains[domain] = None if po_entry == None else ( entry.path, po_entry.path )
+        elif extension == '.po' and f'{domain}.mo' not in files:
+          domains[domain] = entry.path
+      index[language_entry.name] = domains
+  return index
+
+
+def _po_to_compile(_domains: dict[str, str | tuple[str, str] | None], _domain: str) -> str | None:
+# *.po file to compile for _domain, from the domains of a language in _scan_locale_dir, None to load the *.mo file
+# With both files, the *.mo file is loaded if it was compiled from the *.po file - decided only for the languages that are used,
+# the first time, then kept in _domains until clear_locale_cache
+  filepaths = _domains[_domain]
+  if filepaths.__class__ is not tuple:
+    return filepaths
+  ( mofilepath, pofilepath ) = filepaths
+  try:
+    compiled_from = mo_compiled_from(mofilepath, pofilepath)
+  except ValueError:
+  # The *.po file is invalid, compiling it when loading raises the error
+    compiled_from = False
+  if not compiled_from and logging.root.isEnabledFor(logging.INFO):
+    logging.info(f"Translation portable object file '{pofilepath}' differs from machine object file '{mofilepath}'")
+  _domains[_domain] = None if compiled_from else pofilepath
+  return _domains[_domain]
+
+
+_locale_dir_indexes: Final[dict[str, dict]] = dict()
+  # _scan_locale_dir for each locale directory, so that finding a language does no system calls
+
+
+def _locale_dir_index(_locdirpath: str) -> dict[str, dict[str, str | tuple[str, str] | None]]:
+  index = _locale_dir_indexes.get(_locdirpath)
+  if index == None:
+    try:
+      index = _scan_locale_dir(_locdirpath)
+    except (FileNotFoundError, NotADirectoryError):
+      raise ValueError(f"Locale directory '{_locdirpath}' does not exist") from None
+    _locale_dir_indexes[_locdirpath] = index
+  return index
+
+
+@functools.lru_cache(maxsize = 1024)
+def _expanded_languages(_langs: tuple[str]) -> tuple[str]:
+# Language directories to look for, in order, same as gettext.translation: each code is normalized and followed by its
+# less specific variants, ex: 'fr_FR.UTF-8' -> 'fr_FR.UTF-8', 'fr_FR', 'fr.UTF-8', 'fr' - and 'fr-FR' is read as 'fr_FR'
+  expanded = []
+  for l in _langs:
+    if l == 'C':
+      break
+    for e in gettext._expand_lang(l.replace('-', '_')):
+      if e not in expanded:
+        expanded.append(e)
+  return tuple(expanded)
+
+
+def _snapshot_languages(_locdirpath: str, _domain: str) -> tuple[str]:
+# Languages of _domain in Translation.snapshot, empty if there is no snapshot or the domain is not in it
+# The locale directory of a domain that is in the snapshot is not scanned
+  if Translation.snapshot == None:
+    return ()
+  return Translation.snapshot.languages(_locdirpath, _domain)
+
+
+@functools.lru_cache(maxsize = 4096)
+def _find_language(_locdirpath: str, _domain: str, _langs: tuple[str]) -> tuple[str, str | None, tuple[str]]:
+# First of the expanded _langs that has translation object files for _domain, the *.po file path (None for the *.mo file),
+# and the expanded languages from it, whose catalogs are loaded as its fallbacks
+  snapshot_languages = _snapshot_languages(_locdirpath, _domain)
+  index = _locale_dir_index(_locdirpath) if len(snapshot_languages) == 0 else None
+  expanded = _expanded_languages(_langs)
+  for ( i, l ) in enumerate(expanded):
+    if index == None:
+      if l in snapshot_languages:
+        if logging.root.isEnabledFor(logging.INFO):
+          logging.info(f"Found translation catalog for domain '{_domain}' language '{l}' of '{_locdirpath}' in '{Translation.snapshot.filepath}'")
+        return ( l, None, expanded[i:] )
+      continue
+    domains = index.get(l)
+    if domains != None and _domain in domains:
+      if logging.root.isEnabledFor(logging.INFO):
+        logging.info(f"Found translation object file for domain '{_domain}' language '{l}' in '{_locdirpath}'")
+      return ( l, _po_to_compile(domains, _domain), expanded[i:] )
+    elif logging.root.isEnabledFor(logging.INFO):
+      logging.info(f"Translation object files for domain '{_domain}' language '{l}' do not exist in '{_locdirpath}'")
+  raise FileNotFoundError(errno.ENOENT, f"Translation object files do not exist", _locdirpath)
+
+
+def clear_locale_cache() -> None:
+# Call after adding, removing or changing translation object files while running
+  _locale_dir_indexes.clear()
+  _find_language.cache_clear()
+  return None
+
+
 class TranslationLanguages(object):
-  i18n_contexts: Final[dict] = dict()
-  __slots__: ( '_langs' )
+  __slots__ = ( '_langs', '_pronoun_translation', '_list_patterns' )
+  # _list_patterns - for each conjunction, ( Translation, its catalog, patterns ) - see _list_pattern_parts
       # _langs is a tuple or list of language codes
       # called "language code" for (language_code, encoding) = locale.getDefaultLocale()
       # called "languages" in gettext.translation(domain, localedir=None, languages=None, class_=None, fallback=False)
 
   def _i18n_context(self, _context: str):
-    if _context not in self.i18n_contexts:
-      self.i18n_contexts[_context] = TranslationContext(Translation(TranslationDomainLanguage(TranslationDomain('i18n'), self)), _context)
-    return self.i18n_contexts[_context]
+  # Shared by all instances with the same language codes
+    return translation_registry.get_or_load(( self._langs, 'i18n', _context ), lambda: TranslationContext(Translation(TranslationDomainLanguage(TranslationDomain('i18n'), self)), _context))
 
   @property
   def conjunctions(self):
-    return self._i18n_context('conjunctions')
+    return self._i18n_context('/conjunctions')
+      # Same msgctxt as in i18n.po
 
   @property
   def pronouns(self):
-    return PronounTranslation(self, frame_summary = traceback.extract_stack(limit = 2)[0])
+  # Created on first access, then reused
+    if self._pronoun_translation == None:
+      self._pronoun_translation = PronounTranslation(self, frame_summary = _caller_frame_summary(1))
+    return self._pronoun_translation
+
+  def _list_pattern_parts(self, _conjunction: str) -> tuple:
+  # ( before {0}, between {0} and {1}, after {1} ) of the list patterns for 2 items, and for the start, middle and end of 3 or more,
+  # then ( separator, last separator ) if the patterns for 3 or more are only separators, the same for start and middle, otherwise None
+  # Patterns that are not translated default to '{0} <conjunction> {1}', and '{0}, {1}' for the start and middle
+  # Cached until the conjunctions catalog is reloaded
+    entry = self._list_patterns.get(_conjunction)
+    if entry != None and entry[0]._translations is entry[1]:
+      return entry[2]
+    ctc = self.conjunctions
+    conjunction = ctc.get(_conjunction)
+    parts = []
+    for ( position, default ) in ( ( '2', f'{{0}} {conjunction} {{1}}' ), ( 'start', '{0}, {1}' ), ( 'middle', '{0}, {1}' ), ( 'end', f'{{0}} {conjunction} {{1}}' ) ):
+      msgid = f'/list/{_conjunction}/{position}'
+      pattern = ctc.get(msgid)
+      if pattern == msgid or pattern.count('{0}') != 1 or pattern.count('{1}') != 1 or pattern.index('{0}') > pattern.index('{1}'):
+        pattern = default
+      ( before, rest ) = pattern.split('{0}')
+      parts.append(( before, *rest.split('{1}') ))
+    ( two, start, middle, end ) = parts
+    separators = ( start[1], end[1] ) if start[1] == middle[1] and ''.join(( *start[::2], *middle[::2], *end[::2] )) == '' else None
+    entry = ( ctc._translation, ctc._translation._translations, ( *parts, separators ) )
+    self._list_patterns[_conjunction] = entry
+    return entry[2]
+
+  @classmethod
+  async def aresolve(cls, *_language_codes: str | None) -> 'TranslationLanguages':
+  # Same as shared_languages(*_language_codes) (see current.py), with the default locale read in the default executor
+  # of the running event loop when a language code is None or there are none
+    if len(_language_codes) > 0 and None not in _language_codes:
+      return current.shared_languages(*_language_codes)
+    return await _run_coalesced(( TranslationLanguages, _language_codes ), current.shared_languages, *_language_codes)
+
+  def join_names(self, _names: Iterable[str], _conjunction: str = 'and') -> str:
+  # Names joined as a list in the language, ex: 'John, Kenny and Martin'
+  # _conjunction - 'and' or 'or', the msgid in the conjunctions context
+    names = _names if _names.__class__ in ( list, tuple ) else list(_names)
+    count = len(names)
+    if count < 2:
+      return names[0] if count == 1 else ''
+    ( two, start, middle, end, separators ) = self._list_pattern_parts(_conjunction)
+    if count == 2:
+      return f'{two[0]}{names[0]}{two[1]}{names[1]}{two[2]}'
+    if separators != None:
+      return f'{separators[0].join(names[:-1])}{separators[1]}{names[-1]}'
+    parts = [ start[0], names[0], start[1] ]
+    for i in range(1, count - 2):
+      parts += ( middle[0], names[i], middle[1] )
+    parts += ( end[0], names[-2], end[1], names[-1], end[2], middle[2] * (count - 3), start[2] )
+    return ''.join(parts)
 
   def __init__(self, *_language_codes: tuple[str] | list[str]) -> None:
     super().__init__()
-    logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
-    logging.info(f"Default shared locale directory is '{sys.base_prefix}/share/locales'")
-
-    for i in range(0, len(_language_codes)):
-      assert isinstance(_language_codes[i], str | None), f'language_codes[{i}] invalid type: {type(_language_codes[i])}'
-    if len(_language_codes) == 0 or None in _language_codes:
-      ( language_code, encoding ) = locale.getdefaultlocale()
-      logging.info(f"( default locale ) language_code: {language_code} encoding: {encoding}")
-      for lc in (locale.LC_COLLATE, locale.LC_CTYPE, locale.LC_MONETARY, locale.LC_NUMERIC, locale.LC_TIME, locale.LC_MESSAGES, ):
-        ( language_code, encoding ) = locale.getlocale(category = lc)
-        logging.info(f"locale category: {lc} language_code: {language_code} encoding: {encoding}")
-      ( language_code, encoding ) = locale.getlocale(category = message_locale_category)
-      if language_code == None:
-        ( language_code, encoding ) = locale.getdefaultlocale()
-        # language_code - ex: 'en_US' for US, encoding - 'UTF-8'
-      assert language_code != None, language_code
-      if len(_language_codes) == 0:
-        langs = ( language_code, )
-      else:
-      # Replace "None" with the default language code
-        i = _language_codes.index(None)
-        if language_code in _language_codes:
-          langs = filter(lambda l: l is not None, _language_codes)
-        else:
-          langs = _language_codes[:i] + ( language_code, ) + _language_codes[i + 1:]
-      # Check for another instance of "None"
-        if None in langs:
-          raise ValueError(f'More than one of the supplied language_codes is None')
-    else:
-      langs = _language_codes
-
-  # Fallback language is English ('en')
-    if 'en' in _language_codes:
-      self._langs = langs
-    else:
-      self._langs = ( *langs, 'en' )
-
+    if logging.root.isEnabledFor(logging.DEBUG):
+      logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
+    self._pronoun_translation = None
+    self._list_patterns = dict()
+    self._langs = _language_chain(_language_codes)
     return None
 
 
 class TranslationDomain(object):
-  __slots__: ( '_domain', '_locdirpath' )
+  locale_dirpaths: Final[dict[str, str]] = dict()
+    # Locale directory for each registered domain
+  __slots__ = ( '_domain', '_locdirpath' )
 
-  def __init__(self, _domain: str) -> None:
+  @classmethod
+  def register(cls, _domain: str, _locdirpath: str) -> None:
+  # Locale directory for TranslationDomain(_domain) when locdirpath is not given
+    assert isinstance(_domain, str), type(_domain)
+    assert isinstance(_locdirpath, str), type(_locdirpath)
+    if len(_snapshot_languages(_locdirpath, _domain)) == 0:
+      _locale_dir_index(_locdirpath)
+        # Raises ValueError if the directory does not exist
+    cls.locale_dirpaths[_domain] = _locdirpath
+    return None
+
+  def __init__(self, _domain: str, locdirpath: str | None = None) -> None:
+  # locdirpath - locale directory, ex: '.../i18n/locales'
+  #              if None, the directory registered for the domain,
+  #              or if none is registered, 'i18n/locales' under the directory of the calling module
     super().__init__()
-    logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
+    if logging.root.isEnabledFor(logging.DEBUG):
+      logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
     assert isinstance(_domain, str), type(_domain)
+    assert isinstance(locdirpath, str | None), type(locdirpath)
     self._domain = _domain
-#    moddirpath = os.path.dirname(os.path.abspath(__file__))
-    framedirpath = os.path.dirname(os.path.abspath(inspect.currentframe().f_back.f_code.co_filename))
-    self._locdirpath = os.path.join(framedirpath, 'i18n', 'locales')
-    if not os.path.isdir(self._locdirpath):
-      raise ValueError(f"Locale directory '{self._locdirpath}' does not exist")
+    if locdirpath == None:
+      locdirpath = TranslationDomain.locale_dirpaths.get(_domain)
+    if locdirpath == None:
+      framedirpath = os.path.dirname(os.path.abspath(sys._getframe(1).f_code.co_filename))
+      locdirpath = os.path.join(framedirpath, 'i18n', 'locales')
+    self._locdirpath = locdirpath
+    if len(_snapshot_languages(self._locdirpath, _domain)) == 0:
+      _locale_dir_index(self._locdirpath)
+        # Raises ValueError if the directory does not exist
     return None
 
 
 class TranslationDomainLanguage(object):
 # TranslationDomain with one of the languages from TranslationLanguages
-  __slots__ = ( '_translation_domain', '_translation_languages', '_found_language' )
+  __slots__ = ( '_translation_domain', '_translation_languages', '_found_language', '_pofilepath', '_languages' )
+  # _pofilepath - *.po file to compile when loading, None to load the *.mo file
+  # _languages - expanded language codes from _found_language, the catalog and its fallbacks
 
   @property
   def language(self):
     return self._found_language
 
   @property
-  def key(self) -> str:
-    return f'translation_domain: {self._translation_domain._domain} language_code: {self._found_language}'
+  def key(self) -> tuple[str, str, tuple[str]]:
+  # Key of the catalog in translation_registry - the same domain in another locale directory,
+  # or the same language with other fallbacks, is another catalog
+    return ( self._translation_domain._locdirpath, self._translation_domain._domain, self._languages )
 
   def __init__(self, _translation_domain: TranslationDomain, _translation_languages: TranslationLanguages) -> None:
     super().__init__()
-    logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
+    if logging.root.isEnabledFor(logging.DEBUG):
+      logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
     assert isinstance(_translation_domain, TranslationDomain), type(_translation_domain)
     assert isinstance(_translation_languages, TranslationLanguages), type(_translation_languages)
     self._translation_domain = _translation_domain
     self._translation_languages = _translation_languages
 
-    found_lang = None
-    for l in _translation_languages._langs:
-      mofilepath = os.path.join(_translation_domain._locdirpath, l, message_locale_category_dirname, f'{_translation_domain._domain}.mo')
-      if os.path.isfile(mofilepath):
-        logging.info(f"Found translation machine object file '{mofilepath}'")
-        found_lang = l
-        break
-      else:
-        logging.info(f"Translation machine object file '{mofilepath}' does not exist")
+    ( self._found_language, self._pofilepath, self._languages ) = _find_language(_translation_domain._locdirpath, _translation_domain._domain, _translation_languages._langs)
+# TO DO: if not found, fall back to customizable default language
 
-    if found_lang == None:
+    return None
 
-      found = False
-      for l in _translation_languages._langs:
-        pofilepath = os.path.join(_translation_domain._locdirpath, l, message_locale_category_dirname, f'{_translation_domain._domain}.po')
-        if os.path.isfile(pofilepath):
-          logging.info(f"Found translation portable object file '{pofilepath}'")
-          found = True
-          break
-        else:
-          logging.info(f"Translation portable object file '{pofilepath}' does not exist")
-      if found:
-        mofilepath = f"{pofilepath.rsplit('.', 1)[0]}.mo"
-        raise FileNotFoundError(errno.ENOENT, f"Translation portable object file exists but machine object file does not exist - need to run msgfmt", pofilepath, None, mofilepath)
-      else:
-        raise FileNotFoundError(errno.ENOENT, f"Translation object files do not exist", _translation_domain._locdirpath)
-# TO DO: if not found, fall back to customizable default language
 
-    pofilepath = f"{mofilepath.rsplit('.', 1)[0]}.po"
-    if os.path.getmtime(pofilepath) > os.path.getmtime(mofilepath):
-      # exception OSError(errno, strerror[, filename[, winerror[, filename2]]])
-      raise OSError(None, f"Translation portable object file is more recent than machine object file - need to run msgfmt", pofilepath, None, mofilepath)
+preload_frame_summary: Final[traceback.FrameSummary] = traceback.FrameSummary('<preload>', 0, 'preload', lookup_line = False)
+  # frame_summary of the Translation instances created by preload - reusing their catalogs is expected, so it is not logged
 
-    self._found_language = found_lang
+_live_translations: Final[weakref.WeakSet] = weakref.WeakSet()
+  # Every Translation instance that is still in use, for reloading their catalogs
+_live_translations_lock: Final[threading.Lock] = threading.Lock()
+_templates_lock: Final[threading.Lock] = threading.Lock()
+  # Held to add a template to Translation._templates, so that concurrent misses do not evict from it at once
 
-    return None
+_executor_calls: Final[dict[tuple, asyncio.Future]] = dict()
+  # Calls running in an executor, keyed by ( event loop, key ), so that concurrent async loads of the same catalog wait for one call
+
+_render_many_batch_size: Final[int] = 256
+  # Rows of render_many whose plural forms are evaluated at once
+
+_instrumentation = None
+  # TranslationInstrumentation recording the calls while it is enabled, see instrument.py
+  # None when disabled, the only cost of the instrumentation then is testing it once per call
+_output_cache = None
+  # OutputCache of the get and nget calls while it is enabled, see cache.py
 
 
 class Translation(object):
-  translations_dict: Final[dict] = dict()
-  __slots__: ( '_translation_domain_language', '_translations' )
+  template_cache_size: ClassVar[int] = 1024
+  mo_cache_dirpath: ClassVar[str | None] = None
+    # Directory for *.mo files compiled from *.po files, None to compile them in memory
+  catalog_class: ClassVar[type] = gettext.GNUTranslations
+    # Class of _translations, ex: MappedTranslations to memory map the *.mo files
+  snapshot: ClassVar[object] = None
+    # CatalogSnapshot to load catalogs from instead of the locale directories, set by use_snapshot
+  capture_caller: ClassVar[bool] = False
+    # Diagnostic - True to log where each Translation was created when its gettext.translation instance is reused
+  __slots__ = ( '_translation_domain_language', '_translations', '_templates', '_original_frame_summary', '__weakref__' )
   # _translation - a gettext.GNUTranslations instance based on the domain, localedir, and languages (language codes)
+  # _templates - MessageTemplate instances keyed by translated text, at most template_cache_size entries
+  #              shared by all instances with the same _translation
 
   @property
   def language(self):
     return self._translation_domain_language.language
 
-  def __init__(self, _translation_domain_language: TranslationDomainLanguage, *, frame_summary: traceback.FrameSummary = None) -> None:
+  def __init__(self, _translation_domain_language: TranslationDomainLanguage, *, frame_summary: traceback.FrameSummary = None, warn_reuse: bool = True) -> None:
+  # warn_reuse - False when reusing a loaded catalog is expected, ex: by Translation.aload or CurrentTranslation
     super().__init__()
-    logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
+    if logging.root.isEnabledFor(logging.DEBUG):
+      logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
     assert isinstance(_translation_domain_language, TranslationDomainLanguage), f'Wrong type {type(_translation_domain_language).__qualname__} for translation_domain_language'
     if frame_summary == None:
-      frame_summary = traceback.extract_stack(limit = 2)[0]
-    self._translation_domain_language = _translation_domain_language
-
-    key = str(_translation_domain_language.key)
-    if key in Translation.translations_dict:
+      frame_summary = _caller_frame_summary(1)
 
-      ( original_frame_summary, self._translations ) = Translation.translations_dict[key]
+    key = _translation_domain_language.key
+    loaded = False
 
-      logging.warning(f'Already created Translation for ({key}) - reusing gettext.translation instance from cache')
-      logging.warning(f'  Originally created at file "{original_frame_summary.filename}" line {original_frame_summary.lineno} in {original_frame_summary.name}')
-      logging.warning(f'  Current invocation at file "{frame_summary.filename}" line {frame_summary.lineno} in {frame_summary.name}')
+    def load() -> tuple:
+      nonlocal loaded
+      loaded = True
+      return ( frame_summary, Translation._load(_translation_domain_language), dict() )
 
-    else:
+    self._set_entry(_translation_domain_language, translation_registry.get_or_load(key, load))
+    if not loaded and warn_reuse and self._original_frame_summary is not preload_frame_summary and frame_summary is not preload_frame_summary and logging.root.isEnabledFor(logging.WARNING):
 
-      self._original_frame_summary = frame_summary
+      logging.warning(f'Already created Translation for ({key}) - reusing gettext.translation instance from cache')
+      if self._original_frame_summary != None:
+        logging.warning(f'  Originally created at file "{self._original_frame_summary.filename}" line {self._original_frame_summary.lineno} in {self._original_frame_summary.name}')
+      if frame_summary != None:
+        logging.warning(f'  Current invocation at file "{frame_summary.filename}" line {frame_summary.lineno} in {frame_summary.name}')
 
-      self._translations = gettext.translation(_translation_domain_language._translation_domain._domain, _translation_domain_language._translation_domain._locdirpath, languages =_translation_domain_language._translation_languages._langs, fallback = False)
-        # fallback = True returns NullTranslation which returns the supplied message, not the default language
-        # fallback = False raises OSError if no *.mo file is found
-      logging.debug(f'domain: {_translation_domain_language._translation_domain._domain} language: {_translation_domain_language._found_language} _translations type: {type(self._translations)}') # gettext.GNUTranslations
+    return None
 
-      Translation.translations_dict[key] = ( frame_summary, self._translations )
+  def _set_entry(self, _translation_domain_language: TranslationDomainLanguage, _entry: tuple) -> None:
+  # _entry - ( frame_summary, catalog, templates ) of translation_registry
+    self._translation_domain_language = _translation_domain_language
+    ( self._original_frame_summary, self._translations, self._templates ) = _entry
+    with _live_translations_lock:
+      _live_translations.add(self)
+    return None
 
+  @classmethod
+  async def aload(cls, _translation_domain: TranslationDomain, _translation_languages: TranslationLanguages, *, frame_summary: traceback.FrameSummary = None) -> 'Translation':
+  # Same as Translation(TranslationDomainLanguage(_translation_domain, _translation_languages)), without blocking the running event loop:
+  # the locale directory is scanned and the catalog is loaded in its default executor, if they are not cached yet
+  # Concurrent calls for the same catalog wait for the same load, and return the same instance
+  # Reusing a loaded catalog is expected, ex: once per request, so it is not logged as for Translation()
+    locdirpath = _translation_domain._locdirpath
+    if locdirpath not in _locale_dir_indexes:
+      await _run_coalesced(( _locale_dir_index, locdirpath ), _locale_dir_index, locdirpath)
+    translation_domain_language = TranslationDomainLanguage(_translation_domain, _translation_languages)
+    key = translation_domain_language.key
+    entry = translation_registry.get(key)
+    if entry != None:
+    # Never loads on the event loop, even if the catalog is evicted meanwhile
+      translation = cls.__new__(cls)
+      translation._set_entry(translation_domain_language, entry)
+      return translation
+    if frame_summary == None:
+      frame_summary = _caller_frame_summary(1)
+    return await _run_coalesced(( cls, key ), functools.partial(cls, translation_domain_language, frame_summary = frame_summary, warn_reuse = False))
+
+  @staticmethod
+  def _load(_translation_domain_language: TranslationDomainLanguage) -> gettext.NullTranslations:
+  # Catalog of the found language, with the catalogs of the languages after it as fallbacks, same as gettext.translation
+    return Translation._load_catalog(*_translation_domain_language.key)
+
+  @staticmethod
+  def _load_catalog(_locdirpath: str, _domain: str, _languages: tuple[str]) -> gettext.NullTranslations:
+  # Catalog of the registry key ( _locdirpath, _domain, _languages ), see TranslationDomainLanguage.key
+  # The files are opened directly - gettext.translation keeps each catalog in a cache of its own, so it would not see changed files
+  # The catalogs of a domain that is in Translation.snapshot are loaded from it, without scanning the locale directory
+    snapshot_languages = _snapshot_languages(_locdirpath, _domain)
+    index = _locale_dir_index(_locdirpath) if len(snapshot_languages) == 0 else None
+    translations = None
+    for l in _languages:
+      domains = None if index == None else index.get(l)
+      if l in snapshot_languages:
+        catalog = Translation.snapshot.catalog(_locdirpath, _domain, l)
+      elif domains == None or _domain not in domains:
+        continue
+      elif _po_to_compile(domains, _domain) != None:
+        pofilepath = domains[_domain]
+        if logging.root.isEnabledFor(logging.INFO):
+          logging.info(f"Compiling translation portable object file '{pofilepath}'")
+        catalog = load_po(pofilepath, Translation.mo_cache_dirpath, class_ = Translation.catalog_class)
+      else:
+        with open(os.path.join(_locdirpath, l, message_locale_category_dirname, f'{_domain}.mo'), 'rb') as fp:
+          catalog = Translation.catalog_class(fp)
+      share_plural_rule(catalog)
+      if translations == None:
+        translations = catalog
+      else:
+        translations.add_fallback(catalog)
+    if translations == None:
+      raise FileNotFoundError(errno.ENOENT, f"Translation object files do not exist", _locdirpath)
+    if logging.root.isEnabledFor(logging.DEBUG):
+      logging.debug(f'domain: {_domain} language: {_languages[0]} _translations type: {type(translations)}') # gettext.GNUTranslations
+    return translations
+
+  def _swap(self, _translations: gettext.NullTranslations, _templates: dict) -> None:
+  # Replaces the catalog of this instance, ex: with a reloaded one
+  # Calls already in progress finish with the previous catalog
+    if _output_cache != None and _translations is not self._translations:
+      _output_cache._discard_catalog(self._translations)
+    self._templates = _templates
+    self._translations = _translations
     return None
 
+  def _template(self, _text: str) -> MessageTemplate:
+  # Hits are not locked - only the misses add to and evict from _templates
+    template = self._templates.get(_text)
+    if template == None:
+      template = MessageTemplate(_text)
+      templates = self._templates
+        # Replaced by _swap, not changed, when the catalog is reloaded
+      with _templates_lock:
+        if _text not in templates:
+          while len(templates) >= self.template_cache_size and len(templates) > 0:
+          # Evict the oldest entry
+            del templates[next(iter(templates))]
+        templates[_text] = template
+    return template
+
   def get(self, _msgid: str, _text_dict: dict[str] = None):
     assert isinstance(_msgid, str)
     assert isinstance(_text_dict, dict | None)
-    text = self._translations.gettext(_msgid)
-    if _text_dict != None:
-      text = text.format(**_text_dict)
-    return text
+    return _get(self, None, _msgid, None, None, _text_dict, None)
 
 #  def nget(self, _singular: str, _plural: str, _n: int, _text_dict: dict[str] = None, _person: PronounTranslation.PronounPersonEnum = None):
   def nget(self, _singular: str, _plural: str, _n: int, _text_dict: dict[str] = None, _person = None):
@@ -215,34 +518,82 @@ class Translation(object):
     assert isinstance(_person, PronounTranslation.PronounPersonEnum | None), type(_person)
 #    assert isinstance(_gender, PronounTranslation.GenderEnum | None), type(_gender)
     n = 0 if _person in (PronounTranslation.PronounPersonEnum.First_Person, PronounTranslation.PronounPersonEnum.Second_Person) else _n
-    text = self._translations.ngettext(_singular, _plural, n)
-    index = text.find('{pronoun')
-    if index != -1:
-      placeholder = text[index : text.find('}', index) + 1]
-      if _person == None:
-        raise ValueError(f'PronounPerson must be specified when text contains {placeholder}')
-# Neutral gender "they" can be singular, same as "he" or "she"
-#      elif n == 1 and _person == PronounTranslation.PronounPersonEnum.Third_Person:
-#        if _gender == None:
-#          raise ValueError(f'Gender must be specified when text contains {placeholder}, n = 1 and person is {_person}')
-#        elif _gender == PronounTranslation.GenderEnum.Neutral:
-#          text = self._translations.ngettext(_singular, _plural, 0)
-    if _text_dict != None:
-      text = text.format(**_text_dict)
-    return text
+    return _get(self, None, _singular, _plural, n, _text_dict, _person)
+
+  def render_with_subject(self, _msgid: str, _msgid_plural: str | None, *, subject: 'Subject', **fields) -> str:
+  # The message with its {names}, {determiner} and {pronoun...} placeholders filled in for subject, and its other placeholders from fields
+  # _msgid_plural None - the message has no plural forms
+    assert isinstance(_msgid, str), type(_msgid)
+    assert isinstance(_msgid_plural, str | None), type(_msgid_plural)
+    if _instrumentation != None:
+      return _instrumentation._render(self, None, _msgid, _msgid_plural, subject._plural_n, fields, None, subject)
+    return _render_with_subject(self, _lookup(self._translations, None, _msgid, _msgid_plural, subject._plural_n), subject, fields)
+
+  def lazy(self, _msgid: str, **fields):
+  # LazyText of _msgid in this domain, translated in the current languages (see current.py) when it is converted to str,
+  # not in the languages of this instance
+    return current.shared_current_translation(self._translation_domain_language._translation_domain).lazy(_msgid, **fields)
+
+  def plural_indexes(self, _counts: Iterable[int]) -> list[int]:
+  # Plural form index in this catalog for each of _counts, ex: to group rows by the form they need
+    return evaluate_many(self._translations.plural, _counts)
+
+  def render_many(self, _rows: Iterable[tuple]) -> Iterator[str]:
+  # _rows - ( msgid, msgid_plural, n, text_dict, person ) for each string, same order as the nget arguments
+  #         msgid_plural None - same as get(msgid, text_dict), n and person are ignored
+  # Returns a generator of the rendered strings, in the same order as _rows
+    if _instrumentation != None:
+      return _instrumentation._render_many(self, None, _rows)
+    return _render_many(self, self._translations.gettext, self._translations.ngettext, _rows)
+
+  async def arender_many(self, _rows: Iterable[tuple]) -> list[str]:
+  # Same as list(render_many(_rows)), rendered in the default executor of the running event loop, so that a large batch does not block it
+    return await asyncio.get_running_loop().run_in_executor(None, list, self.render_many(_rows))
 
 
 class PronounTranslation(Translation):
-  PronounTypeEnum: Final[Enum] = Enum('PronounType', { 'Subject': 'subject', 'Object': 'object', 'Possessive': 'possessive', 'Reflexive': 'reflexive' } )
-  PronounPersonEnum: Final[Enum] = Enum('PronounPerson', { 'First_Person': 'first', 'Second_Person': 'second', 'Third_Person': 'third' })
-  GenderEnum: Final[Enum] = Enum('Gender', { 'Male': 'male', 'Female': 'female', 'Neutral': 'neutral' })
-  __slots__ = ( )
+  PronounTypeEnum: Final[Enum] = Enum('PronounType', { 'Subject': 'subject', 'Object': 'object', 'Possessive': 'possessive', 'Reflexive': 'reflexive' }, qualname = 'PronounTranslation.PronounTypeEnum')
+  PronounPersonEnum: Final[Enum] = Enum('PronounPerson', { 'First_Person': 'first', 'Second_Person': 'second', 'Third_Person': 'third' }, qualname = 'PronounTranslation.PronounPersonEnum')
+  GenderEnum: Final[Enum] = Enum('Gender', { 'Male': 'male', 'Female': 'female', 'Neutral': 'neutral' }, qualname = 'PronounTranslation.GenderEnum')
+  pronoun_table_numbers: ClassVar[int] = 10
+  __slots__ = ( '_pronoun_table', '_subject_values' )
+  # _pronoun_table - translated pronouns and determiners keyed by ( type, person, number, gender )
+  #                  gender is None except for Third_Person with number 1 and gender Male or Female
+  #                  number is from 0 to pronoun_table_numbers - 1, other numbers are translated on each call
+  # _subject_values - values of the subject placeholders keyed by ( field name, Subject._key ), for numbers in the table
+
+  @property
+  def pronoun_table(self) -> MappingProxyType:
+    return MappingProxyType(self._pronoun_table)
 
   def __init__(self, _translation_languages: TranslationLanguages, *, frame_summary: traceback.FrameSummary = None) -> None:
-    super().__init__(TranslationDomainLanguage(TranslationDomain('pronouns'), _translation_languages), frame_summary = traceback.extract_stack(limit = 2)[0] if frame_summary == None else frame_summary)
-    logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
+    super().__init__(TranslationDomainLanguage(TranslationDomain('pronouns'), _translation_languages), frame_summary = _caller_frame_summary(1) if frame_summary == None else frame_summary)
+    if logging.root.isEnabledFor(logging.DEBUG):
+      logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
+    self._pronoun_table = self._build_pronoun_table(self._translations)
+    self._subject_values = dict()
+    return None
+
+  def _swap(self, _translations: gettext.NullTranslations, _templates: dict) -> None:
+  # The pronoun table is built before it replaces the previous one
+    pronoun_table = self._build_pronoun_table(_translations)
+    super()._swap(_translations, _templates)
+    self._pronoun_table = pronoun_table
+    self._subject_values = dict()
     return None
 
+  def _build_pronoun_table(self, _translations: gettext.NullTranslations) -> dict:
+    table = dict()
+    for _type in ( *(t.value for t in PronounTranslation.PronounTypeEnum), 'determiner' ):
+      for _person in PronounTranslation.PronounPersonEnum:
+        msgid = f'{_person.value}_person/{_type}'
+        for n in range(self.pronoun_table_numbers):
+          table[( _type, _person, n, None )] = _translations.ngettext(msgid, msgid, n)
+        if _person == PronounTranslation.PronounPersonEnum.Third_Person:
+          for _gender in ( PronounTranslation.GenderEnum.Male, PronounTranslation.GenderEnum.Female ):
+            table[( _type, _person, 1, _gender )] = _translations.gettext(f'{msgid}/{_gender.value}')
+    return table
+
   def _pronoun_or_determiner(self, _type: str, _person: PronounPersonEnum, _number: int, _gender: GenderEnum):
     assert isinstance(_type, str), type(_type)
     assert isinstance(_person, PronounTranslation.PronounPersonEnum), type(_person)
@@ -251,10 +602,13 @@ class PronounTranslation(Translation):
     if _person == PronounTranslation.PronounPersonEnum.Third_Person and _number == 1 and _gender != PronounTranslation.GenderEnum.Neutral:
       if  _gender == None:
         raise ValueError('Gender must be specified when person is Third_Person and number of persons is 1')
-      return self.get(f'{_person.value}_person/{_type}/{_gender.value}')
+      return self._pronoun_table[( _type, _person, 1, _gender )]
     else:
-      msgid = f'{_person.value}_person/{_type}'
-      return self.nget(msgid, msgid, _number)
+      text = self._pronoun_table.get(( _type, _person, _number, None ))
+      if text == None:
+        msgid = f'{_person.value}_person/{_type}'
+        text = self.nget(msgid, msgid, _number)
+      return text
 
   def pronoun(self, _type: PronounTypeEnum, _person: PronounPersonEnum, _number: int = 1, *, gender: GenderEnum = None):
     return self._pronoun_or_determiner(_type.value, _person, _number, gender)
@@ -265,9 +619,77 @@ class PronounTranslation(Translation):
   def determiner(self, _person: PronounPersonEnum, _number: int = 1, /, gender: GenderEnum = None):
     return self._pronoun_or_determiner('determiner', _person, _number, gender)
 
+  def _subject_field(self, _field_name: str, _subject: 'Subject') -> str:
+  # Value of a {names}, {determiner} or {pronoun...} placeholder
+    if _field_name == 'names' and _subject._names != None:
+      return self._translation_domain_language._translation_languages.join_names(_subject._names)
+    key = ( _field_name, _subject._key )
+    text = self._subject_values.get(key)
+    if text == None:
+      if _field_name == 'names':
+        ( _type, number ) = ( 'subject', 1 if _subject._count == 1 else 0 )
+          # Same as pronoun_subject
+      elif _field_name == 'determiner':
+        ( _type, number ) = ( 'determiner', _subject._count )
+      else:
+        ( _type, number ) = ( _subject._pronoun_type.value, _subject._count )
+      text = self._pronoun_or_determiner(_type, _subject._person, number, _subject._gender)
+        # Raises ValueError if the gender is missing
+      if 0 <= _subject._count < self.pronoun_table_numbers:
+        self._subject_values[key] = text
+    return text
+
+
+class Subject(object):
+# Who a message is about, for render_with_subject, ex: Subject(PronounPersonEnum.Third_Person, names = [ 'John', 'Jane' ])
+  _plural_zero_persons: ClassVar[frozenset] = frozenset(( PronounTranslation.PronounPersonEnum.First_Person, PronounTranslation.PronounPersonEnum.Second_Person ))
+  __slots__ = ( '_person', '_count', '_gender', '_names', '_pronoun_type', '_plural_n', '_key' )
+  # _plural_n - number for the plural form of the message, 0 for First_Person and Second_Person as in nget
+  # _key - ( person, count, gender, pronoun type ), everything but the names that the placeholder values depend on
+  #        with the values of the enums, which hash faster than the enums
+
+  @property
+  def person(self) -> PronounTranslation.PronounPersonEnum:
+    return self._person
+
+  @property
+  def count(self) -> int:
+    return self._count
+
+  @property
+  def gender(self) -> PronounTranslation.GenderEnum | None:
+    return self._gender
+
+  @property
+  def names(self) -> tuple[str] | None:
+    return self._names
+
+  @property
+  def pronoun_type(self) -> PronounTranslation.PronounTypeEnum:
+    return self._pronoun_type
+
+  def __init__(self, _person: PronounTranslation.PronounPersonEnum, _count: int | None = None, _gender: PronounTranslation.GenderEnum | None = None, _names: Iterable[str] | None = None, *, pronoun_type: PronounTranslation.PronounTypeEnum = PronounTranslation.PronounTypeEnum.Subject) -> None:
+  # _count - number of persons, None for the number of _names (1 without _names)
+  # _gender - needed for Third_Person with _count 1, unless the message has no pronouns
+  # _names - names for the {names} placeholder, joined with TranslationLanguages.join_names, None to use the subject pronoun
+  # pronoun_type - type of the pronouns for the {pronoun...} placeholders
+    super().__init__()
+    assert isinstance(_person, PronounTranslation.PronounPersonEnum), type(_person)
+    assert isinstance(_count, int | None), type(_count)
+    assert isinstance(_gender, PronounTranslation.GenderEnum | None), type(_gender)
+    assert isinstance(pronoun_type, PronounTranslation.PronounTypeEnum), type(pronoun_type)
+    self._person = _person
+    self._names = _names if _names == None or _names.__class__ is tuple else tuple(_names)
+    self._count = _count if _count != None else 1 if _names == None else len(self._names)
+    self._gender = _gender
+    self._pronoun_type = pronoun_type
+    self._plural_n = 0 if _person in Subject._plural_zero_persons else self._count
+    self._key = ( _person._value_, self._count, None if _gender == None else _gender._value_, pronoun_type._value_ )
+    return None
+
 
 class TranslationContext(object):
-  __slots__: ( '_translation', '_context' )
+  __slots__ = ( '_translation', '_context' )
 
   @property
   def language(self):
@@ -275,7 +697,8 @@ class TranslationContext(object):
 
   def __init__(self, _translation: Translation, _context: str) -> None:
     super().__init__()
-    logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
+    if logging.root.isEnabledFor(logging.DEBUG):
+      logging.debug(f'{self.__class__.__qualname__} {inspect.currentframe().f_code.co_qualname}')
     assert isinstance(_translation, Translation), f'Wrong type {type(_translation).__qualname__} for translation'
     assert isinstance(_context, str), f'Wrong type {type(_context).__qualname__} for context'
     self._translation = _translation
@@ -285,10 +708,7 @@ class TranslationContext(object):
   def get(self, _msgid: str, _text_dict: dict[str] = None):
     assert isinstance(_msgid, str)
     assert isinstance(_text_dict, dict | None)
-    text = self._translation._translations.pgettext(self._context, _msgid)
-    if _text_dict != None:
-      text = text.format(**_text_dict)
-    return text
+    return _get(self._translation, self._context, _msgid, None, None, _text_dict, None)
 
   def nget(self, _singular: str, _plural: str, _n: int, _text_dict: dict[str] = None, _person: PronounTranslation.PronounPersonEnum = None):
   # arguments - Optional string arguments which can be referenced in the message
@@ -301,18 +721,157 @@ class TranslationContext(object):
     assert isinstance(_person, PronounTranslation.PronounPersonEnum | None), type(_person)
 #    assert isinstance(_gender, PronounTranslation.GenderEnum | None), type(_gender)
     n = 0 if _person in (PronounTranslation.PronounPersonEnum.First_Person, PronounTranslation.PronounPersonEnum.Second_Person) else _n
-    text = self._translation._translations.npgettext(self._context, _singular, _plural, n)
-    index = text.find('{pronoun')
-    if index != -1:
-      placeholder = text[index : text.find('}', index) + 1]
-      if _person == None:
-        raise ValueError(f'PronounPerson must be specified when text contains {placeholder}')
+    return _get(self._translation, self._context, _singular, _plural, n, _text_dict, _person)
+
+  def render_with_subject(self, _msgid: str, _msgid_plural: str | None, *, subject: Subject, **fields) -> str:
+  # Same as Translation.render_with_subject, with this context
+    assert isinstance(_msgid, str), type(_msgid)
+    assert isinstance(_msgid_plural, str | None), type(_msgid_plural)
+    if _instrumentation != None:
+      return _instrumentation._render(self._translation, self._context, _msgid, _msgid_plural, subject._plural_n, fields, None, subject)
+    return _render_with_subject(self._translation, _lookup(self._translation._translations, self._context, _msgid, _msgid_plural, subject._plural_n), subject, fields)
+
+  def lazy(self, _msgid: str, **fields):
+  # Same as Translation.lazy, with this context
+    return current.shared_current_translation(self._translation._translation_domain_language._translation_domain, self._context).lazy(_msgid, **fields)
+
+  def render_many(self, _rows: Iterable[tuple]) -> Iterator[str]:
+  # Same as Translation.render_many, with this context
+    if _instrumentation != None:
+      return _instrumentation._render_many(self._translation, self._context, _rows)
+    translations = self._translation._translations
+    return _render_many(self._translation, functools.partial(translations.pgettext, self._context), functools.partial(translations.npgettext, self._context), _rows)
+
+  async def arender_many(self, _rows: Iterable[tuple]) -> list[str]:
+  # Same as Translation.arender_many, with this context
+    return await asyncio.get_running_loop().run_in_executor(None, list, self.render_many(_rows))
+
+
+def _render_many(_translation: Translation, _gettext: Callable, _ngettext: Callable, _rows: Iterable[tuple]) -> Iterator[str]:
+# The rows are taken _render_many_batch_size at a time, and the plural forms of a batch are evaluated at once, as by plural_indexes
+# The text of each distinct ( msgid, msgid_plural, plural form ) is looked up, type checked and parsed once
+  plural = _catalog_plural(_translation._translations)
+  templates = dict()
+  rows = iter(_rows)
+  while True:
+    batch = list(itertools.islice(rows, _render_many_batch_size))
+    if len(batch) == 0:
+      break
+    counts = [ 0 if person in (PronounTranslation.PronounPersonEnum.First_Person, PronounTranslation.PronounPersonEnum.Second_Person) else n
+      for ( msgid, msgid_plural, n, text_dict, person ) in batch if msgid_plural != None ]
+    assert all(isinstance(n, int) for n in counts), [ type(n) for n in counts ]
+    if plural == None:
+      forms = counts
+    else:
+      forms = [ ( form, n == 1 ) for ( form, n ) in zip(evaluate_many(plural, counts), counts) ]
+        # n == 1 - untranslated messages are msgid if n == 1, else msgid_plural
+    i = 0
+    for ( msgid, msgid_plural, n, text_dict, person ) in batch:
+      if msgid_plural == None:
+        key = ( msgid, None, None )
+      else:
+        key = ( msgid, msgid_plural, forms[i] )
+        n = counts[i]
+        i += 1
+      template = templates.get(key)
+      if template == None:
+        assert isinstance(msgid, str), type(msgid)
+        assert isinstance(msgid_plural, str | None), type(msgid_plural)
+        if msgid_plural == None:
+          template = _translation._template(_gettext(msgid))
+        else:
+          template = _translation._template(_ngettext(msgid, msgid_plural, n))
+        if len(templates) >= _translation.template_cache_size:
+          templates.clear()
+        templates[key] = template
+      if msgid_plural != None and template.pronoun_placeholder != None and person == None:
+        raise ValueError(f'PronounPerson must be specified when text contains {template.pronoun_placeholder}')
+      yield template.text if text_dict == None else template.format(text_dict)
+  return None
+
+
+def _catalog_plural(_translations: gettext.NullTranslations) -> Callable[[int], int] | None:
+# Plural function of _translations, None if it has none or if its fallbacks have other plural functions,
+# so that the messages with the same plural form for it are the same for any n
+  plural = getattr(_translations, 'plural', None)
+  fallback = _translations._fallback
+  while plural != None and fallback != None:
+    if getattr(fallback, 'plural', plural) is not plural:
+      plural = None
+    fallback = fallback._fallback
+  return plural
+
+
+def _get(_translation: Translation, _context: str | None, _msgid: str, _msgid_plural: str | None, _n: int | None, _text_dict: dict[str] | None, _person) -> str:
+# get (_msgid_plural None) and nget of Translation and TranslationContext, through the instrumentation and the output cache
+# when they are enabled - both of them wrap _render
+  if _instrumentation != None:
+    return _instrumentation._render(_translation, _context, _msgid, _msgid_plural, _n, _text_dict, _person)
+  if _output_cache != None:
+    return _output_cache._render(_translation, _context, _msgid, _msgid_plural, _n, _text_dict, _person)
+  return _render(_translation, _context, _msgid, _msgid_plural, _n, _text_dict, _person)[0]
+
+
+def _lookup(_translations: gettext.NullTranslations, _context: str | None, _msgid: str, _msgid_plural: str | None, _n: int | None) -> str:
+# Translated text of the message, same as gettext, ngettext, pgettext or npgettext
+  if _context == None:
+    return _translations.gettext(_msgid) if _msgid_plural == None else _translations.ngettext(_msgid, _msgid_plural, _n)
+  return _translations.pgettext(_context, _msgid) if _msgid_plural == None else _translations.npgettext(_context, _msgid, _msgid_plural, _n)
+
+
+def _render(_translation: Translation, _context: str | None, _msgid: str, _msgid_plural: str | None, _n: int | None, _text_dict: dict[str] | None, _person) -> tuple[str, bool]:
+# ( text, msgid untranslated ) of get and nget, untranslated for TranslationInstrumentation to count the misses
+  text = _lookup(_translation._translations, _context, _msgid, _msgid_plural, _n)
+  untranslated = text is _msgid or text is _msgid_plural
+  if _msgid_plural != None:
+    return ( _format_plural(_translation, text, _text_dict, _person), untranslated )
+  if _text_dict != None:
+    text = _translation._template(text).format(_text_dict)
+  return ( text, untranslated )
+
+
+def _format_plural(_translation: Translation, _text: str, _text_dict: dict[str] | None, _person) -> str:
+# The translated text of nget, formatted
+  template = _translation._template(_text)
+  if template.pronoun_placeholder != None:
+    if _person == None:
+      raise ValueError(f'PronounPerson must be specified when text contains {template.pronoun_placeholder}')
 # Neutral gender "they" can be singular, same as "he" or "she"
-#      elif n == 1 and _person == PronounTranslation.PronounPersonEnum.Third_Person:
-#        if _gender == None:
-#          raise ValueError(f'Gender must be specified when text contains {placeholder}, n = 1 and person is {_person}')
-#        elif _gender == PronounTranslation.GenderEnum.Neutral:
-#          text = self._translations.ngettext(_singular, _plural, 0)
-    if _text_dict != None:
-      text = text.format(**_text_dict)
-    return text
+#    elif n == 1 and _person == PronounTranslation.PronounPersonEnum.Third_Person:
+#      if _gender == None:
+#        raise ValueError(f'Gender must be specified when text contains {placeholder}, n = 1 and person is {_person}')
+#      elif _gender == PronounTranslation.GenderEnum.Neutral:
+#        text = self._translations.ngettext(_singular, _plural, 0)
+  return _text if _text_dict == None else template.format(_text_dict)
+
+
+def _render_with_subject(_translation: Translation, _text: str, _subject: Subject, _fields: dict[str]) -> str:
+# Only the subject placeholders the template has are looked up, and added to _fields (the keyword arguments, a new dict for each call)
+  assert isinstance(_subject, Subject), type(_subject)
+  template = _translation._template(_text)
+  subject_field_names = template._subject_field_names
+  if subject_field_names:
+    pt = _translation._translation_domain_language._translation_languages.pronouns
+    for name in subject_field_names:
+      _fields[name] = pt._subject_field(name, _subject)
+  return template.format(_fields)
+
+
+async def _run_coalesced(_key: Hashable, _function: Callable, *_args) -> object:
+# _function(*_args) in the default executor of the running event loop, or the result of the call for _key already running in it
+# Cancelling one of the callers does not cancel the call for the others
+  loop = asyncio.get_running_loop()
+  key = ( loop, _key )
+  future = _executor_calls.get(key)
+  if future == None:
+    future = loop.run_in_executor(None, _function, *_args)
+    _executor_calls[key] = future
+    future.add_done_callback(lambda _future: _executor_calls.pop(key, None))
+  return await asyncio.shield(future)
+
+
+from . import current
+  # For the lazy methods - after the classes, which current.py imports
+
+TranslationDomain.register('i18n', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'i18n', 'locales'))
+TranslationDomain.register('pronouns', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'i18n', 'locales'))
@@ -0,0 +1,88 @@
+# src/i18n/warmup.py
+#
+# License: GNU LESSER GENERAL PUBLIC LICENSE
+#   https://www.gnu.org/software/gettext/manual/html_node/GNU-LGPL.html
+#
+# This file and its contents and all others related to this software are provided
+# AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
+#
+# Loads translations before they are first used, ex: in the master process of a pre-fork
+# server (gunicorn with preload_app, uWSGI without lazy-apps), so that the workers share the
+# loaded catalogs copy-on-write instead of each loading them on its first requests
+#
+# Usage, when the application is imported by the master process:
+#   i18n.preload([ TranslationDomain('my-domain') ], 'all', templates = True, freeze = True)
+
+import gc
+from collections.abc import Iterable, Iterator
+
+from .current import shared_languages
+from .text import Translation, TranslationDomain, TranslationDomainLanguage, _locale_dir_index, preload_frame_summary
+
+
+def _catalog_texts(_translations) -> Iterator[str]:
+# Translated texts of a catalog and of its fallbacks
+# Catalogs without a dict of their messages (ex: MappedTranslations) are skipped
+  while _translations != None:
+    catalog = getattr(_translations, '_catalog', None)
+    if catalog != None:
+      for key, text in catalog.items():
+        if key != '':
+          yield text
+    _translations = getattr(_translations, '_fallback', None)
+  return None
+
+
+def preload(_domains: Iterable[TranslationDomain | str], _languages: Iterable[str | tuple[str]] | str = 'all', *, locale_roots: Iterable[str] | None = None, templates: bool = False, freeze: bool = False) -> list[Translation]:
+# _domains - TranslationDomain instances, or names of domains registered with TranslationDomain.register or in locale_roots
+# _languages - 'all' for every language installed for each domain,
+#              or language codes, or tuples of language codes as given to TranslationLanguages
+# locale_roots - locale directories to look for the domain names in, None for the registered directories
+# templates - True to also create the MessageTemplate of every translated text, up to Translation.template_cache_size
+# freeze - True to call gc.freeze() at the end, so that garbage collections in the forked workers
+#          do not write to (and copy) the pages of everything loaded so far
+# The PronounTranslation and the conjunctions TranslationContext are also created for each of the languages
+# Returns the Translation instances, which keep their catalogs loaded even if the translation registry evicts them
+  translation_domains = []
+  for domain in _domains:
+    if isinstance(domain, TranslationDomain):
+      translation_domains.append(domain)
+    elif locale_roots == None:
+      if domain not in TranslationDomain.locale_dirpaths:
+        raise ValueError(f"Domain '{domain}' is not registered - give a TranslationDomain or locale_roots")
+      translation_domains.append(TranslationDomain(domain))
+    else:
+      found = False
+      for locale_root in locale_roots:
+        if any(domain in domains for domains in _locale_dir_index(locale_root).values()):
+          translation_domains.append(TranslationDomain(domain, locdirpath = locale_root))
+          found = True
+      if not found:
+        raise ValueError(f"Domain '{domain}' not found in locale directories {locale_roots}")
+
+  translations = []
+  preloaded_language_codes = dict()
+  for translation_domain in translation_domains:
+    if _languages == 'all':
+      language_codes = [ ( l, ) for l, domains in sorted(_locale_dir_index(translation_domain._locdirpath).items()) if translation_domain._domain in domains ]
+    else:
+      language_codes = [ ( l, ) if isinstance(l, str) else tuple(l) for l in _languages ]
+    for codes in language_codes:
+      translations.append(Translation(TranslationDomainLanguage(translation_domain, shared_languages(*codes)), frame_summary = preload_frame_summary))
+      preloaded_language_codes[codes] = None
+  for codes in preloaded_language_codes:
+    translation_languages = shared_languages(*codes)
+    translations.append(translation_languages.pronouns)
+    translations.append(translation_languages.conjunctions._translation)
+
+  if templates:
+    for translation in translations:
+      for text in _catalog_texts(translation._translations):
+        if len(translation._templates) >= Translation.template_cache_size:
+          break
+        translation._template(text)
+
+  if freeze:
+    gc.collect()
+    gc.freeze()
+  return translations
@@ -33,9 +33,6 @@ async def main() -> None:
       pt = t_langs.pronouns
         # generates warning if same language as a prior loop iteration
 
-      ctc = t_langs.conjunctions
-      and_conj = ctc.get('and')
-
       test_td = i18n.TranslationDomain('test')
       test_tdl = i18n.TranslationDomainLanguage(test_td, t_langs)
       if test_tdl.language in done_langs:
@@ -43,7 +40,8 @@ async def main() -> None:
       else:
         done_langs.add(test_tdl.language)
 
-      tt = i18n.Translation(test_tdl)
+      tt = await i18n.Translation.aload(test_td, t_langs)
+        # same as i18n.Translation(test_tdl), without blocking the event loop while the catalog is loaded
         # generates warning if same language as a prior loop iteration
 
       text_dict.clear()
@@ -66,7 +64,7 @@ async def main() -> None:
             with self.subTest(langs = langs, pronoun_type = s.pronoun_type, person = s.person, gender = s.gender):
               text_dict['names'] = pt.pronoun_subject(s.person, gender = s.gender)
           else:
-            text_dict['names'] = f' {and_conj} '.join(', '.join(name for name in s.names).rsplit(', ', 1))
+            text_dict['names'] = t_langs.join_names(s.names)
           text_dict['food'] = 'pizza'
 
           if s.person != prev_person:
@@ -85,7 +83,7 @@ async def main() -> None:
             if s.names == None:
               text_dict['names'] = pt.pronoun_subject(s.person, n, gender = s.gender)
             else:
-              text_dict['names'] = f' {and_conj} '.join(', '.join(name for name in s.names).rsplit(', ', 1))
+              text_dict['names'] = t_langs.join_names(s.names)
             text_dict['food'] = 'a burger' if n % 2 == 0 else 'pizza'
 
             if s.person != prev_person:
@@ -114,7 +112,7 @@ async def main() -> None:
             if s.names == None:
               text_dict['names'] = pt.pronoun_subject(s.person, gender = s.gender)
             else:
-              text_dict['names'] = f' {and_conj} '.join(', '.join(name for name in s.names).rsplit(', ', 1))
+              text_dict['names'] = t_langs.join_names(s.names)
             text_dict['food'] = 'pizza'
 
             if s.person != prev_person:
@@ -133,7 +131,7 @@ async def main() -> None:
               if s.names == None:
                 text_dict['names'] = pt.pronoun_subject(s.person, n, gender = s.gender)
               else:
-                text_dict['names'] = f' {and_conj} '.join(', '.join(name for name in s.names).rsplit(', ', 1))
+                text_dict['names'] = t_langs.join_names(s.names)
               text_dict['food'] = 'a burger' if n % 2 == 0 else 'pizza'
 
               if s.person != prev_person:
@@ -163,23 +161,13 @@ async def main() -> None:
         # The following code is a good example use - part 2
           if len(who_likes_it) > 0:
             n = len(who_likes_it)
-            text_dict.clear()
-            text_dict['names'] = f' {and_conj} '.join(', '.join(p.name for p in who_likes_it).rsplit(', ', 1))
-            text_dict['food'] = food
+            gender = who_likes_it[0].gender if n == 1 else None
 
           # With names as first subject
-            if n == 1:
-              text_dict['pronoun'] = pt.pronoun(pronoun_type, pronoun_person, n, gender = who_likes_it[0].gender)
-            else:
-              text_dict['pronoun'] = pt.pronoun(pronoun_type, pronoun_person, n)
-            print(tt.nget(msgid, msgid_plural, n, text_dict, pronoun_person))
+            print(tt.render_with_subject(msgid, msgid_plural, subject = i18n.Subject(pronoun_person, n, gender, [ p.name for p in who_likes_it ], pronoun_type = pronoun_type), food = food))
 
           # With pronoun rather than names as first subject
-            if n == 1:
-              text_dict['names'] = pt.pronoun_subject(pronoun_person, n, gender = who_likes_it[0].gender)
-            else:
-              text_dict['names'] = pt.pronoun_subject(pronoun_person, n)
-            print(tt.nget(msgid, msgid_plural, n, text_dict, pronoun_person))
+            print(tt.render_with_subject(msgid, msgid_plural, subject = i18n.Subject(pronoun_person, n, gender, pronoun_type = pronoun_type), food = food))
 
     print('')
     return None
@@ -6,7 +6,9 @@
 # This file and its contents and all others related to this software are provided
 # AS IS, WITHOUT ANY WARRANTY OR CONDITION, EXPRESS OR IMPLIED.
 
-import i18n, logging, unittest
+import argparse, asyncio, gc, gettext, glob, i18n, io, logging, os, shutil, sys, tempfile, threading, time, unittest, weakref
+from i18n import bulk, plural, po
+from unittest import mock
 from typing import ClassVar, Final
 from test.sample_strings import people, StringWithPronoun
 
@@ -125,6 +127,7 @@ class TestPronouns(unittest.TestCase):
               text_dict['names'] = pt.pronoun_subject(s.person, gender = s.gender)
           else:
             text_dict['names'] = f' {and_conj} '.join(', '.join(name for name in s.names).rsplit(', ', 1))
+            self.assertEqual(t_langs.join_names(s.names), text_dict['names'])
           text_dict['food'] = 'pizza'
 
           with self.subTest(langs = langs, msgid = s.msgid):
@@ -143,6 +146,7 @@ class TestPronouns(unittest.TestCase):
               text_dict['names'] = pt.pronoun_subject(s.person, n, gender = s.gender)
             else:
               text_dict['names'] = f' {and_conj} '.join(', '.join(name for name in s.names).rsplit(', ', 1))
+              self.assertEqual(t_langs.join_names(s.names), text_dict['names'])
             text_dict['food'] = 'pizza'
 
             with self.subTest(langs = langs, msgid = s.msgid, n = n, person = s.person, gender = s.gender):
@@ -198,6 +202,7 @@ class TestPronouns(unittest.TestCase):
               text_dict['names'] = pt.pronoun_subject(s.person, gender = s.gender)
             else:
               text_dict['names'] = f' {and_conj} '.join(', '.join(name for name in s.names).rsplit(', ', 1))
+              self.assertEqual(t_langs.join_names(s.names), text_dict['names'])
             text_dict['food'] = 'pizza'
 
             with self.subTest(context = context, langs = langs, msgid = s.msgid):
@@ -216,6 +221,7 @@ class TestPronouns(unittest.TestCase):
                 text_dict['names'] = pt.pronoun_subject(s.person, n, gender = s.gender)
               else:
                 text_dict['names'] = f' {and_conj} '.join(', '.join(name for name in s.names).rsplit(', ', 1))
+                self.assertEqual(t_langs.join_names(s.names), text_dict['names'])
               text_dict['food'] = 'pizza'
 
               with self.subTest(context = context, langs = langs, msgid = s.msgid, n = n, person = s.person, gender = s.gender):
@@ -283,6 +289,7 @@ class TestPronouns(unittest.TestCase):
 
         # With pronoun rather than names as first subject
           text_dict['names'] = f' {and_conj} '.join(', '.join(p.name for p in who_likes_it).rsplit(', ', 1))
+          self.assertEqual(t_langs.join_names([ p.name for p in who_likes_it ]), text_dict['names'])
           key = f'{tt.language} {j} {n} {pronoun_person} {food}{gender}'
           with self.subTest(lang = tt.language, j = j, n = n, pronoun_person = pronoun_person, gender = who_likes_it[0].gender if n == 1 else None, food = food):
             self.assertEqual(tt.nget(msgid, msgid_plural, n, text_dict, pronoun_person), TestPronouns.get_translation(key))
@@ -298,6 +305,1319 @@ class TestPronouns(unittest.TestCase):
 
     return None
 
+  def test_pronouns_reused(self) -> None:
+
+    t_langs = i18n.TranslationLanguages('en')
+    pt = t_langs.pronouns
+    self.assertIsInstance(pt, i18n.PronounTranslation)
+    self.assertIs(t_langs.pronouns, pt)
+
+    return None
+
+  def test_conjunctions_per_language(self) -> None:
+
+    ctc = i18n.TranslationLanguages('en').conjunctions
+    self.assertIs(i18n.TranslationLanguages('en').conjunctions, ctc)
+    self.assertIs(i18n.TranslationLanguages(None, 'en').conjunctions, i18n.TranslationLanguages(None, 'en').conjunctions)
+    self.assertIsNot(i18n.TranslationLanguages('en_US', 'en').conjunctions, ctc)
+
+    return None
+
+  def test_join_names(self) -> None:
+
+    t_langs = i18n.TranslationLanguages('en')
+    self.assertEqual(t_langs.conjunctions.get('/list/and/end'), '{0} and {1}')
+    names = [ 'Alex', 'Kenny', 'Martin', 'Sam', 'Jo' ]
+    self.assertEqual([ t_langs.join_names(names[:n]) for n in range(6) ], [ '', 'Alex', 'Alex and Kenny', 'Alex, Kenny and Martin', 'Alex, Kenny, Martin and Sam', 'Alex, Kenny, Martin, Sam and Jo' ])
+    self.assertEqual(t_langs.join_names(iter(names[:3]), 'or'), 'Alex, Kenny or Martin')
+    self.assertIs(t_langs._list_pattern_parts('and'), t_langs._list_pattern_parts('and'))
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      os.makedirs(os.path.join(dirpath, 'xx', 'LC_MESSAGES'))
+      po_filepath = os.path.join(dirpath, 'xx', 'LC_MESSAGES', 'i18n.po')
+      with open(po_filepath, 'w', encoding = 'utf-8') as fp:
+        fp.write('msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n\n'
+          'msgctxt "/conjunctions"\nmsgid "and"\nmsgstr "y"\n\n'
+          'msgctxt "/conjunctions"\nmsgid "/list/and/end"\nmsgstr "{0}, y {1}"\n\n'
+          'msgctxt "/conjunctions"\nmsgid "/list/and/middle"\nmsgstr "{1}"\n\n'
+          'msgctxt "/conjunctions"\nmsgid "/list/or/start"\nmsgstr "{0} / {1}"\n\n'
+          'msgctxt "/conjunctions"\nmsgid "/list/or/middle"\nmsgstr "({0}, {1})"\n')
+          # Untranslated 2 and start patterns, and a middle pattern without {0}, use the defaults
+      saved_dirpath = i18n.TranslationDomain.locale_dirpaths['i18n']
+      i18n.TranslationDomain.register('i18n', dirpath)
+      t_langs = i18n.TranslationLanguages('xx')
+      try:
+        self.assertEqual([ t_langs.join_names(names[:n]) for n in range(2, 5) ], [ 'Alex y Kenny', 'Alex, Kenny, y Martin', 'Alex, Kenny, Martin, y Sam' ])
+        self.assertEqual(t_langs.join_names(names, 'or'), 'Alex / (Kenny, (Martin, Sam or Jo))')
+        ctc = t_langs.conjunctions
+        with open(po_filepath, 'a', encoding = 'utf-8') as fp:
+          fp.write('\nmsgctxt "/conjunctions"\nmsgid "/list/and/2"\nmsgstr "{0} & {1}"\n')
+        ctc._translation._swap(i18n.Translation._load(ctc._translation._translation_domain_language), dict())
+        self.assertEqual(t_langs.join_names(names[:2]), 'Alex & Kenny')
+      finally:
+        i18n.TranslationDomain.register('i18n', saved_dirpath)
+        i18n.translation_registry.evict(( t_langs._langs, 'i18n', '/conjunctions' ))
+        i18n.translation_registry.evict(ctc._translation._translation_domain_language.key)
+
+    return None
+
+  def test_pronoun_table(self) -> None:
+
+    t_langs = i18n.TranslationLanguages('en')
+    pt = t_langs.pronouns
+    table = pt.pronoun_table
+    Person = i18n.PronounTranslation.PronounPersonEnum
+    Gender = i18n.PronounTranslation.GenderEnum
+    Subject = i18n.PronounTranslation.PronounTypeEnum.Subject
+
+    self.assertEqual(table[( 'subject', Person.Third_Person, 1, Gender.Female )], 'she')
+    self.assertEqual(table[( 'object', Person.First_Person, 2, None )], 'both of us')
+    self.assertEqual(pt.pronoun(Subject, Person.Third_Person, 1, gender = Gender.Male), 'he')
+    self.assertEqual(pt.pronoun(Subject, Person.Third_Person, 1, gender = Gender.Neutral), 'they')
+    self.assertEqual(pt.pronoun(Subject, Person.First_Person, 3), 'we all')
+    self.assertEqual(pt.pronoun(Subject, Person.First_Person, pt.pronoun_table_numbers + 5), 'we all')
+    self.assertEqual(pt.pronoun_subject(Person.Second_Person, 3), 'you')
+    self.assertEqual(pt.determiner(Person.Third_Person, 1, gender = Gender.Female), 'her')
+    with self.assertRaises(ValueError):
+      pt.pronoun(Subject, Person.Third_Person, 1)
+
+    return None
+
+
+class TestTranslationDomain(unittest.TestCase):
+
+  def test_locale_directory(self) -> None:
+
+    test_locdirpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'i18n', 'locales')
+    self.assertEqual(i18n.TranslationDomain('test')._locdirpath, test_locdirpath)
+    self.assertEqual(i18n.TranslationDomain('other', locdirpath = test_locdirpath)._locdirpath, test_locdirpath)
+    self.assertEqual(i18n.TranslationDomain('pronouns')._locdirpath, os.path.join(os.path.dirname(os.path.abspath(i18n.text.__file__)), 'i18n', 'locales'))
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      i18n.TranslationDomain.register('registered', dirpath)
+      try:
+        self.assertEqual(i18n.TranslationDomain('registered')._locdirpath, dirpath)
+      finally:
+        del i18n.TranslationDomain.locale_dirpaths['registered']
+      with self.assertRaises(ValueError):
+        i18n.TranslationDomain('test', locdirpath = os.path.join(dirpath, 'missing'))
+
+    return None
+
+  def test_capture_caller(self) -> None:
+
+    tdl = i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), i18n.TranslationLanguages('en'))
+    i18n.translation_registry.evict(tdl.key)
+    self.assertIsNone(i18n.Translation(tdl)._original_frame_summary)
+
+    i18n.translation_registry.evict(tdl.key)
+    i18n.Translation.capture_caller = True
+    try:
+      frame_summary = i18n.Translation(tdl)._original_frame_summary
+    finally:
+      i18n.Translation.capture_caller = False
+    self.assertEqual(frame_summary.filename, __file__)
+    self.assertEqual(frame_summary.name, 'test_capture_caller')
+
+    return None
+
+  def test_cached_resolution(self) -> None:
+
+    t_domain = i18n.TranslationDomain('test')
+    t_langs = i18n.TranslationLanguages('fr', None)
+    self.assertEqual(i18n.TranslationDomainLanguage(t_domain, t_langs).language, 'en')
+    with mock.patch('os.scandir', side_effect = AssertionError), mock.patch('os.stat', side_effect = AssertionError), mock.patch('locale.getlocale', side_effect = AssertionError):
+      self.assertIs(i18n.TranslationLanguages('fr', None)._langs, t_langs._langs)
+      self.assertEqual(i18n.TranslationDomainLanguage(t_domain, i18n.TranslationLanguages('fr', None)).language, 'en')
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      for lang in ( 'en', 'fr' ):
+        os.makedirs(os.path.join(dirpath, lang, 'LC_MESSAGES'))
+      with open(os.path.join(dirpath, 'en', 'LC_MESSAGES', 'new.mo'), 'wb') as fp:
+        fp.write(b'')
+      t_domain = i18n.TranslationDomain('new', locdirpath = dirpath)
+      t_langs = i18n.TranslationLanguages('fr', 'en')
+      tdl = i18n.TranslationDomainLanguage(t_domain, t_langs)
+      self.assertEqual(( tdl.language, tdl._pofilepath ), ( 'en', None ))
+
+      pofilepath = os.path.join(dirpath, 'fr', 'LC_MESSAGES', 'new.po')
+      with open(pofilepath, 'wb') as fp:
+        fp.write(b'')
+      self.assertEqual(i18n.TranslationDomainLanguage(t_domain, t_langs).language, 'en')
+      i18n.clear_locale_cache()
+      tdl = i18n.TranslationDomainLanguage(t_domain, t_langs)
+      self.assertEqual(( tdl.language, tdl._pofilepath ), ( 'fr', pofilepath ))
+      i18n.clear_locale_cache()
+
+    return None
+
+  def test_expanded_languages(self) -> None:
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      for ( lang, label ) in ( ( 'en', 'Name' ), ( 'fr', 'Nom' ) ):
+        os.makedirs(os.path.join(dirpath, lang, 'LC_MESSAGES'))
+        with open(os.path.join(dirpath, lang, 'LC_MESSAGES', 'expand.po'), 'w', encoding = 'utf-8') as fp:
+          fp.write(f'msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n\nmsgid "/label"\nmsgstr "{label}"\n')
+      t_domain = i18n.TranslationDomain('expand', locdirpath = dirpath)
+      for code in ( 'fr_FR', 'fr_FR.UTF-8', 'fr-FR' ):
+        tt = i18n.Translation(i18n.TranslationDomainLanguage(t_domain, i18n.TranslationLanguages(code)))
+        self.assertEqual(( tt.language, tt.get('/label') ), ( 'fr', 'Nom' ), code)
+      i18n.clear_locale_cache()
+
+    return None
+
+  def test_registry_key(self) -> None:
+  # The same domain in two locale directories, and the same language with other fallbacks, are different catalogs
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      for ( locdirname, lang, label ) in ( ( 'first', 'fr', 'first' ), ( 'second', 'fr', 'second' ), ( 'second', 'de', 'Name' ) ):
+        os.makedirs(os.path.join(dirpath, locdirname, lang, 'LC_MESSAGES'))
+        with open(os.path.join(dirpath, locdirname, lang, 'LC_MESSAGES', 'keyed.po'), 'w', encoding = 'utf-8') as fp:
+          fp.write(f'msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n\nmsgid "/label"\nmsgstr "{label}"\n\nmsgid "/{lang}"\nmsgstr "{lang}"\n')
+      tdls = [ i18n.TranslationDomainLanguage(i18n.TranslationDomain('keyed', locdirpath = os.path.join(dirpath, locdirname)), i18n.TranslationLanguages(*langs))
+        for ( locdirname, langs ) in ( ( 'first', ( 'fr', ) ), ( 'second', ( 'fr', ) ), ( 'second', ( 'fr_CA', 'fr', 'de' ) ) ) ]
+      try:
+        translations = [ i18n.Translation(tdl) for tdl in tdls ]
+        self.assertEqual([ tt.get('/label') for tt in translations ], [ 'first', 'second', 'second' ])
+        self.assertEqual(tdls[2].key[:2], ( os.path.join(dirpath, 'second'), 'keyed' ))
+        self.assertEqual(( tdls[2].key[2][0], 'de' in tdls[2].key[2], 'de' in tdls[1].key[2] ), ( 'fr', True, False ))
+        self.assertEqual([ tt.get('/de') for tt in translations ], [ '/de', '/de', 'de' ])
+          # Only the last one has the de fallback
+      finally:
+        for tdl in tdls:
+          i18n.translation_registry.evict(tdl.key)
+        i18n.clear_locale_cache()
+
+    return None
+
+  def test_slots(self) -> None:
+  # The instances have no __dict__, so the attributes not in __slots__ cannot be set
+
+    t_langs = i18n.TranslationLanguages('en')
+    t_domain = i18n.TranslationDomain('test')
+    tdl = i18n.TranslationDomainLanguage(t_domain, t_langs)
+    tt = i18n.Translation(tdl)
+    for obj in ( t_langs, t_domain, tdl, tt, i18n.TranslationContext(tt, 'test_context'), t_langs.pronouns,
+        i18n.Subject(i18n.PronounTranslation.PronounPersonEnum.Third_Person), i18n.MessageTemplate('{x}') ):
+      self.assertFalse(hasattr(obj, '__dict__'), type(obj))
+      with self.assertRaises(AttributeError):
+        obj.unknown_attribute = None
+
+    return None
+
+
+class TestMessageTemplate(unittest.TestCase):
+
+  def test_format_matches_str_format(self) -> None:
+
+    text_dict = { 'names': 'John and Jane', 'pronoun': 'they', 'food': 'pizza', 'n': 3, 'x': 1.5 }
+    for text in (
+      '',
+      'No placeholders',
+      'When {names} go out to eat, {pronoun} usually order {food}.',
+      '{names}{pronoun}',
+      'Escaped {{names}} and {food}',
+      '{n:>4} {x:.2f} {food!r} {names!s:10}',
+      '{0} positional',
+      '{names.upper} attribute',
+      '{food:{n}} nested',
+      ):
+      with self.subTest(text = text):
+        try:
+          expected = text.format(**text_dict)
+        except Exception as e:
+          with self.assertRaises(type(e)):
+            i18n.MessageTemplate(text).format(text_dict)
+        else:
+          self.assertEqual(i18n.MessageTemplate(text).format(text_dict), expected)
+
+    with self.assertRaises(KeyError):
+      i18n.MessageTemplate('{missing}').format(text_dict)
+
+    return None
+
+  def test_pronoun_placeholder(self) -> None:
+
+    self.assertEqual(i18n.MessageTemplate('When {names} goes out, {pronoun1} orders.').pronoun_placeholder, '{pronoun1}')
+    self.assertIsNone(i18n.MessageTemplate('When {names} goes out.').pronoun_placeholder)
+    self.assertEqual(i18n.MessageTemplate('{names} {food} {names}').field_names, ( 'names', 'food' ))
+
+    return None
+
+  def test_translation_template_cache(self) -> None:
+
+    t_langs = i18n.TranslationLanguages('en')
+    tt = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), t_langs))
+    msgid = '/sentence/with_pronoun/subject/test1'
+    person = i18n.PronounTranslation.PronounPersonEnum.Third_Person
+
+    text_dict = { 'names': 'John', 'pronoun': 'he', 'food': 'pizza' }
+    self.assertEqual(tt.nget(msgid, msgid, 1, text_dict, person), 'When John goes out to eat, he usually orders pizza.')
+    template = tt._template(tt._translations.ngettext(msgid, msgid, 1))
+    self.assertIs(tt._template(template.text), template)
+    with self.assertRaises(ValueError):
+      tt.nget(msgid, msgid, 1, text_dict)
+
+    template_cache_size = i18n.Translation.template_cache_size
+    i18n.Translation.template_cache_size = 2
+    try:
+      for i in range(5):
+        tt._template(f'{{names}} {i}')
+      self.assertEqual(len(tt._templates), 2)
+
+      # Threads adding and evicting templates at once, switching as often as possible
+      i18n.Translation.template_cache_size = 8
+      errors = []
+      def add_templates(_thread_index: int) -> None:
+        try:
+          for i in range(2000):
+            text = f'{{names}} {_thread_index} {i % 50}'
+            self.assertEqual(tt._template(text).text, text)
+        except Exception as exception:
+          errors.append(exception)
+        return None
+      switch_interval = sys.getswitchinterval()
+      sys.setswitchinterval(1e-6)
+      try:
+        threads = [ threading.Thread(target = add_templates, args = ( i, )) for i in range(8) ]
+        for thread in threads:
+          thread.start()
+        for thread in threads:
+          thread.join()
+      finally:
+        sys.setswitchinterval(switch_interval)
+      self.assertEqual(errors, [])
+      self.assertLessEqual(len(tt._templates), 8)
+    finally:
+      i18n.Translation.template_cache_size = template_cache_size
+
+    return None
+
+
+class TestRenderMany(unittest.TestCase):
+
+  def test_render_many_matches_nget(self) -> None:
+
+    t_langs = i18n.TranslationLanguages('en')
+    pt = t_langs.pronouns
+    tt = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), t_langs))
+    ttc = i18n.TranslationContext(tt, 'test_context')
+    pronoun_type = i18n.PronounTranslation.PronounTypeEnum.Subject
+
+    rows = []
+    for s in StringWithPronoun.strings_without_context:
+      for n in s.numbers:
+        text_dict = { 'pronoun': pt.pronoun(pronoun_type, s.person, n, gender = s.gender), 'names': 'Alex', 'food': 'pizza' }
+        rows.append(( s.msgid, s.msgid_plural, n, text_dict, s.person ))
+    rows.append(( '/sentence/untranslated', None, None, None, None ))
+
+    for t in ( tt, ttc ):
+      with self.subTest(t = t):
+        rendered = t.render_many(iter(rows))
+        self.assertNotIsInstance(rendered, list)
+        expected = [ t.get(msgid, text_dict) if msgid_plural == None else t.nget(msgid, msgid_plural, n, text_dict, person) for ( msgid, msgid_plural, n, text_dict, person ) in rows ]
+        self.assertEqual(list(rendered), expected)
+
+    with self.assertRaises(ValueError):
+      list(tt.render_many([ ( rows[0][0], rows[0][1], 1, rows[0][3], None ) ]))
+
+    # The plural forms are evaluated once per batch, and each form is looked up once
+    msgid = '/sentence/4'
+    counts = list(range(1000))
+    with mock.patch.object(i18n.text, 'evaluate_many', wraps = i18n.text.evaluate_many) as evaluate_many, \
+        mock.patch.object(tt._translations, 'ngettext', wraps = tt._translations.ngettext) as ngettext:
+      rendered = list(tt.render_many(( msgid, msgid + '/plural', n, None, None ) for n in counts))
+    self.assertEqual(evaluate_many.call_count, -(-len(counts) // i18n.text._render_many_batch_size))
+    self.assertEqual(ngettext.call_count, len(set(tt.plural_indexes(counts))))
+    self.assertEqual(rendered, [ tt.nget(msgid, msgid + '/plural', n) for n in counts ])
+
+    return None
+
+
+class TestRenderWithSubject(unittest.TestCase):
+
+  def test_sample_strings(self) -> None:
+
+    t_langs = i18n.TranslationLanguages('en')
+    tt = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), t_langs))
+    for ( context, strings ) in ( ( None, StringWithPronoun.strings_without_context ), *StringWithPronoun.strings_with_context_dict.items() ):
+      t = tt if context == None else i18n.TranslationContext(tt, context)
+      for s in strings:
+        for n in s.numbers:
+          with self.subTest(context = context, msgid = s.msgid, n = n, person = s.person, gender = s.gender):
+            subject = i18n.Subject(s.person, n, s.gender, s.names, pronoun_type = s.pronoun_type)
+            self.assertEqual(t.render_with_subject(s.msgid, s.msgid_plural, subject = subject, food = 'pizza'), s.get_translation_for_language('en'))
+
+    return None
+
+  def test_subject_fields(self) -> None:
+
+    t_langs = i18n.TranslationLanguages('en')
+    tt = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), t_langs))
+    Person = i18n.PronounTranslation.PronounPersonEnum
+    Gender = i18n.PronounTranslation.GenderEnum
+
+    self.assertEqual(i18n.MessageTemplate('{names} {pronoun1} {food} {pronoun-for-actor} {determiner} {pronoun1}').subject_field_names, ( 'names', 'pronoun1', 'pronoun-for-actor', 'determiner' ))
+    subject = i18n.Subject(Person.Third_Person, _names = [ 'John', 'Jane', 'Alex' ])
+    self.assertEqual(subject.count, 3)
+    self.assertEqual(tt.render_with_subject('{names} and {pronoun-for-actor}', None, subject = subject), 'John, Jane and Alex and they all')
+    self.assertEqual(tt.render_with_subject('{names}: {determiner} {food}', None, subject = i18n.Subject(Person.Third_Person, 1, Gender.Female), food = 'pizza'), f"she: {t_langs.pronouns.determiner(Person.Third_Person, 1, gender = Gender.Female)} pizza")
+    self.assertEqual(tt.render_with_subject('{pronoun}', None, subject = i18n.Subject(Person.First_Person, 40)), t_langs.pronouns.pronoun(i18n.PronounTranslation.PronounTypeEnum.Subject, Person.First_Person, 40))
+      # Number not in the pronoun table
+    self.assertEqual(tt.render_with_subject('{food}', None, subject = i18n.Subject(Person.Third_Person), food = 'tacos'), 'tacos')
+    with self.assertRaises(ValueError):
+      tt.render_with_subject('{pronoun}', None, subject = i18n.Subject(Person.Third_Person, 1))
+    with self.assertRaises(KeyError):
+      tt.render_with_subject('{food}', None, subject = subject)
+
+    return None
+
+
+class TestTranslationInstrumentation(unittest.TestCase):
+  maxDiff = None
+
+  def test_counts(self) -> None:
+
+    t_langs = i18n.TranslationLanguages('en')
+    tt = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), t_langs))
+    ttc = i18n.TranslationContext(tt, 'test_context')
+    tt_fr = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), i18n.TranslationLanguages('fr', 'en')))
+    msgid = '/sentence/with_pronoun/subject/test1'
+    person = i18n.PronounTranslation.PronounPersonEnum.Third_Person
+    text_dict = { 'names': 'John', 'pronoun': 'he', 'food': 'pizza' }
+    expected = tt.nget(msgid, msgid, 1, text_dict, person)
+
+    with i18n.TranslationInstrumentation(sample_every = 1) as instrumentation:
+      self.assertTrue(instrumentation.enabled)
+      for i in range(3):
+        self.assertEqual(tt.nget(msgid, msgid, 1, text_dict, person), expected)
+      self.assertEqual(ttc.nget(msgid, msgid, 1, text_dict, person), expected)
+      self.assertEqual(tt.get('/missing', text_dict), '/missing')
+      self.assertEqual(tt_fr.nget(msgid, msgid, 1, text_dict, person), expected)
+      self.assertEqual(list(tt.render_many([ ( msgid, msgid, 1, text_dict, person ), ( '/missing', None, None, None, None ) ])), [ expected, '/missing' ])
+      with self.assertRaises(ValueError):
+        tt.nget(msgid, msgid, 1, text_dict)
+
+      threads = [ threading.Thread(target = lambda: [ ttc.get('/missing') for i in range(100) ]) for i in range(4) ]
+      for thread in threads:
+        thread.start()
+      for thread in threads:
+        thread.join()
+    self.assertFalse(instrumentation.enabled)
+    tt.get('/missing')
+
+    messages = { ( m['domain'], m['context'], m['msgid'], m['language'] ): ( m['calls'], m['misses'], m['fallbacks'] ) for m in instrumentation.as_dict()['messages'] }
+    self.assertEqual(messages, {
+      ( 'test', None, msgid, 'en' ): ( 5, 0, 1 ),
+        # Not the call that raised ValueError, the 'fr' one is a fallback
+      ( 'test', 'test_context', msgid, 'en' ): ( 1, 0, 0 ),
+      ( 'test', None, '/missing', 'en' ): ( 2, 2, 0 ),
+      ( 'test', 'test_context', '/missing', 'en' ): ( 400, 400, 0 ),
+    })
+    self.assertEqual(instrumentation.hot_messages(1), [ ( 'test', 'test_context', '/missing', 'en' ) ])
+    latency = instrumentation.as_dict()['latency']
+    self.assertEqual([ ( l['domain'], l['language'], l['count'] ) for l in latency ], [ ( 'test', 'en', 408 ) ])
+
+    prometheus = instrumentation.prometheus()
+    self.assertIn(f'i18n_calls_total{{domain="test",context="",msgid="{msgid}",language="en"}} 5\n', prometheus)
+    self.assertIn('i18n_misses_total{domain="test",context="test_context",msgid="/missing",language="en"} 400\n', prometheus)
+    self.assertIn('i18n_render_seconds_bucket{domain="test",language="en",le="+Inf"} 408\n', prometheus)
+    self.assertIn('i18n_render_seconds_count{domain="test",language="en"} 408\n', prometheus)
+
+    instrumentation.reset()
+    self.assertEqual(instrumentation.as_dict(), { 'messages': [], 'latency': [] })
+
+    return None
+
+
+class TestOutputCache(unittest.TestCase):
+
+  def test_cache(self) -> None:
+
+    tt = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), i18n.TranslationLanguages('en')))
+    ttc = i18n.TranslationContext(tt, 'test_context')
+    msgid = '/sentence/with_pronoun/subject/test1'
+    person = i18n.PronounTranslation.PronounPersonEnum.Third_Person
+    text_dict = { 'names': 'Alex', 'pronoun': 'they', 'food': 'pizza' }
+    expected = { n: tt.nget(msgid, msgid, n, text_dict, person) for n in ( 1, 2 ) }
+
+    with i18n.OutputCache(max_size = 4) as output_cache:
+      self.assertTrue(output_cache.enabled)
+      for n in ( 1, 2, 3, 1, 2 ):
+        self.assertEqual(tt.nget(msgid, msgid, n, text_dict, person), expected[min(n, 2)])
+      self.assertEqual(output_cache.stats, { 'hits': 3, 'misses': 2, 'hit_rate': 0.6, 'evictions': 0, 'uncacheable': 0, 'size': 2, 'max_size': 4 })
+        # n = 3 has the same plural form as n = 2
+      with mock.patch.object(tt._translations, 'ngettext', side_effect = AssertionError), mock.patch.object(i18n.MessageTemplate, 'format', side_effect = AssertionError):
+        self.assertEqual(tt.nget(msgid, msgid, 5, text_dict, person), expected[2])
+      with self.assertRaises(ValueError):
+        tt.nget(msgid, msgid, 5, text_dict)
+      self.assertEqual(ttc.nget(msgid, msgid, 1, text_dict, person), 'When Alex goes out to eat, they usually orders pizza.')
+      self.assertEqual(tt.get('/missing', { 'x': 1 }), '/missing')
+      self.assertEqual(tt.get('/missing', { 'x': 1.0 }), '/missing')
+      self.assertEqual(tt.get('/missing', { 'x': [] }), '/missing')
+      stats = output_cache.stats
+      self.assertEqual(( stats['misses'], stats['evictions'], stats['uncacheable'], stats['size'] ), ( 6, 1, 1, 4 ))
+
+      output_cache.disable_domain('test')
+      tt.get('/missing')
+      self.assertEqual(output_cache.stats['misses'], 6)
+      output_cache.enable_domain('test')
+      tt.get('/missing')
+      self.assertEqual(output_cache.stats['misses'], 7)
+
+      tt._swap(i18n.Translation._load(tt._translation_domain_language), dict())
+        # Same as TranslationReloader
+      self.assertEqual(output_cache.stats['size'], 0)
+      self.assertEqual(tt.nget(msgid, msgid, 2, text_dict, person), expected[2])
+      self.assertEqual(output_cache.stats['misses'], 8)
+    self.assertFalse(output_cache.enabled)
+
+    with i18n.OutputCache(ttl = 60) as output_cache, mock.patch('time.monotonic', return_value = 1000.0) as monotonic:
+      tt.get('/missing')
+      tt.get('/missing')
+      monotonic.return_value = 1061.0
+      tt.get('/missing')
+      self.assertEqual(( output_cache.stats['hits'], output_cache.stats['misses'] ), ( 1, 2 ))
+
+    with i18n.OutputCache() as output_cache, i18n.TranslationInstrumentation() as instrumentation:
+    # The instrumented calls are cached, and the misses are still counted
+      for i in range(3):
+        self.assertEqual(tt.nget(msgid, msgid, 2, text_dict, person), expected[2])
+        self.assertEqual(tt.get('/missing'), '/missing')
+      self.assertEqual(( output_cache.stats['hits'], output_cache.stats['misses'] ), ( 4, 2 ))
+      counts = { ( m['msgid'], m['calls'], m['misses'] ) for m in instrumentation.as_dict()['messages'] }
+      self.assertEqual(counts, { ( msgid, 3, 0 ), ( '/missing', 3, 3 ) })
+
+    with self.assertRaises(ValueError):
+      i18n.OutputCache(ttl = 0)
+
+    return None
+
+  def test_evicted_catalogs(self) -> None:
+  # The cache does not keep the catalogs evicted from the translation registry
+
+    tdl = i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), i18n.TranslationLanguages('en'))
+    catalogs = []
+    with i18n.OutputCache(max_size = 10) as output_cache:
+      for i in range(20):
+        tt = i18n.Translation(tdl)
+        tt.get('/missing')
+        tt.nget('/missing', '/missings', 2)
+        catalogs.append(weakref.ref(tt._translations))
+        i18n.translation_registry.evict(tdl.key)
+        self.assertEqual(output_cache.stats['size'], 0)
+        del tt
+      gc.collect()
+      self.assertEqual([ catalog for catalog in catalogs if catalog() != None ], [])
+    self.assertNotIn(output_cache._registry_evicted, i18n.translation_registry._eviction_listeners)
+
+    return None
+
+
+class TestTranslationRegistry(unittest.TestCase):
+
+  def test_single_flight(self) -> None:
+
+    registry = i18n.TranslationRegistry()
+    calls = []
+
+    def loader():
+      calls.append(threading.get_ident())
+      time.sleep(0.05)
+      return object()
+
+    results = []
+    threads = [ threading.Thread(target = lambda: results.append(registry.get_or_load('key', loader))) for i in range(8) ]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertEqual(len(calls), 1)
+    self.assertEqual(len(results), 8)
+    for result in results:
+      self.assertIs(result, results[0])
+    self.assertEqual(registry.stats['misses'], 1)
+    self.assertEqual(registry.stats['hits'], 7)
+
+    return None
+
+  def test_failed_load_not_cached(self) -> None:
+
+    registry = i18n.TranslationRegistry()
+
+    def loader():
+      raise OSError('not found')
+
+    with self.assertRaises(OSError):
+      registry.get_or_load('key', loader)
+    self.assertNotIn('key', registry)
+    self.assertEqual(registry.get_or_load('key', lambda: 'value'), 'value')
+
+    return None
+
+  def test_eviction(self) -> None:
+
+    registry = i18n.TranslationRegistry(max_size = 2)
+    for key in ( 'a', 'b', 'a', 'c' ):
+      registry.get_or_load(key, lambda: key.upper())
+    # 'b' is the least recently used
+    self.assertNotIn('b', registry)
+    self.assertEqual(registry.get('a'), 'A')
+    self.assertEqual(registry.stats['evictions'], 1)
+
+    self.assertTrue(registry.evict('a'))
+    self.assertFalse(registry.evict('a'))
+    registry.clear()
+    self.assertEqual(len(registry), 0)
+    self.assertEqual(registry.stats['evictions'], 3)
+
+    with self.assertRaises(ValueError):
+      registry.max_size = 0
+
+    return None
+
+  def test_translation_uses_registry(self) -> None:
+
+    t_langs = i18n.TranslationLanguages('en')
+    tdl = i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), t_langs)
+    tt = i18n.Translation(tdl)
+    self.assertIs(i18n.translation_registry.get(tdl.key)[1], tt._translations)
+    self.assertIs(i18n.Translation(tdl)._translations, tt._translations)
+
+    i18n.translation_registry.evict(tdl.key)
+    self.assertIsNot(i18n.Translation(tdl)._translations, tt._translations)
+
+    return None
+
+
+class TestPo(unittest.TestCase):
+
+  po_data: Final[bytes] = r"""# Comment
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\n"
+"Plural-Forms: nplurals=2; plural=n != 1;\n"
+
+#: file.py:1
+msgid "simple"
+msgstr "Simple \"quoted\"\tstring "
+"continued é"
+
+msgctxt "my-context"
+msgid "simple"
+msgstr "With context"
+
+msgid "one"
+msgid_plural "many"
+msgstr[0] "{n} item"
+msgstr[1] "{n} items"
+
+#, fuzzy, python-format
+msgid "fuzzy"
+msgstr "Not ready"
+
+#~ msgid "obsolete"
+#~ msgstr "Removed"
+""".encode('utf-8')
+
+  def test_parse(self) -> None:
+
+    messages = po.parse_po(TestPo.po_data)
+    self.assertEqual(messages['simple'], 'Simple "quoted"\tstring continued é')
+    self.assertEqual(messages['my-context\x04simple'], 'With context')
+    self.assertEqual(messages['one\x00many'], '{n} item\x00{n} items')
+    self.assertNotIn('fuzzy', messages)
+    self.assertNotIn('obsolete', messages)
+    self.assertIn('Plural-Forms', messages[''])
+    self.assertEqual(po.parse_po(TestPo.po_data, use_fuzzy = True)['fuzzy'], 'Not ready')
+
+    with self.assertRaises(ValueError):
+      po.parse_po(b'msgid "unterminated\nmsgstr ""\n')
+
+    return None
+
+  def test_compile(self) -> None:
+
+    translations = gettext.GNUTranslations(io.BytesIO(po.compile_po(TestPo.po_data)))
+    self.assertEqual(translations.pgettext('my-context', 'simple'), 'With context')
+    self.assertEqual(translations.ngettext('one', 'many', 2), '{n} items')
+
+    # Same catalogs as the *.mo files compiled by msgfmt
+    for mofilepath in glob.glob(os.path.join(os.path.dirname(__file__), '..', '**', '*.mo'), recursive = True):
+      with self.subTest(mofilepath = mofilepath):
+        with open(mofilepath, 'rb') as fp:
+          expected = gettext.GNUTranslations(fp)._catalog
+        self.assertEqual(po.load_po(f"{mofilepath.rsplit('.', 1)[0]}.po")._catalog, expected)
+
+    return None
+
+  def test_po_without_mo(self) -> None:
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      lc_messages_dirpath = os.path.join(dirpath, 'en', 'LC_MESSAGES')
+      os.makedirs(lc_messages_dirpath)
+      with open(os.path.join(lc_messages_dirpath, 'po_only.po'), 'wb') as fp:
+        fp.write(TestPo.po_data)
+
+      td = i18n.TranslationDomain('po_only', locdirpath = dirpath)
+      mo_cache_dirpath = i18n.Translation.mo_cache_dirpath
+      i18n.Translation.mo_cache_dirpath = os.path.join(dirpath, 'cache')
+      try:
+        tdl = i18n.TranslationDomainLanguage(td, i18n.TranslationLanguages('en'))
+        tt = i18n.Translation(tdl)
+      finally:
+        i18n.Translation.mo_cache_dirpath = mo_cache_dirpath
+        i18n.translation_registry.evict(tdl.key)
+      self.assertEqual(tt.get('simple'), 'Simple "quoted"\tstring continued é')
+      self.assertEqual(len(os.listdir(os.path.join(dirpath, 'cache'))), 1)
+
+      cache_dirpath = os.path.join(dirpath, 'threads')
+      tmpfilepaths = set()
+      open_file = open
+      def record_open(_filepath, *args, **kwargs):
+        if _filepath.endswith('.tmp'):
+          tmpfilepaths.add(_filepath)
+          time.sleep(0.05)
+            # So that the threads write their files at the same time
+        return open_file(_filepath, *args, **kwargs)
+      with mock.patch('builtins.open', side_effect = record_open):
+        threads = [ threading.Thread(target = po.cached_mo_filepath, args = ( os.path.join(lc_messages_dirpath, 'po_only.po'), cache_dirpath )) for i in range(4) ]
+        for thread in threads:
+          thread.start()
+        for thread in threads:
+          thread.join()
+      self.assertEqual(len(tmpfilepaths), 4)
+      self.assertEqual(len(os.listdir(cache_dirpath)), 1)
+
+    return None
+
+  def test_po_and_mo(self) -> None:
+  # The *.mo file is loaded when it was compiled from the *.po file, whatever their modification times
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      lc_messages_dirpath = os.path.join(dirpath, 'en', 'LC_MESSAGES')
+      os.makedirs(lc_messages_dirpath)
+      ( pofilepath, mofilepath ) = ( os.path.join(lc_messages_dirpath, f'both.{extension}') for extension in ( 'po', 'mo' ) )
+      with open(mofilepath, 'wb') as fp:
+        fp.write(po.compile_po(TestPo.po_data))
+      with open(pofilepath, 'wb') as fp:
+        fp.write(TestPo.po_data)
+      os.utime(mofilepath, ( 0, 0 ))
+      with mock.patch('i18n.text.mo_compiled_from', side_effect = AssertionError):
+      # Scanning does not read the files
+        index = i18n.text._scan_locale_dir(dirpath)
+      self.assertEqual(index, { 'en': { 'both': ( mofilepath, pofilepath ) } })
+      with mock.patch.object(po, 'compile_po', side_effect = AssertionError):
+      # The source hash at the end of the *.mo file is compared, without compiling
+        self.assertIsNone(i18n.text._po_to_compile(index['en'], 'both'))
+      self.assertEqual(index, { 'en': { 'both': None } })
+
+      with open(pofilepath, 'wb') as fp:
+        fp.write(TestPo.po_data.replace(b'With context', b'Changed'))
+      os.utime(pofilepath, ( 0, 0 ))
+      self.assertFalse(po.mo_compiled_from(mofilepath, pofilepath))
+      self.assertEqual(i18n.text._po_to_compile(i18n.text._scan_locale_dir(dirpath)['en'], 'both'), pofilepath)
+
+      with open(mofilepath, 'wb') as fp:
+      # Without a source hash, ex: compiled by msgfmt - the catalogs are compared
+        fp.write(po.compile_mo(po.parse_po(TestPo.po_data), 'UTF-8'))
+      self.assertFalse(po.mo_compiled_from(mofilepath, pofilepath))
+      with open(pofilepath, 'wb') as fp:
+        fp.write(TestPo.po_data.replace(b'# Comment', b'# Other comment'))
+      self.assertTrue(po.mo_compiled_from(mofilepath, pofilepath))
+      with mock.patch.object(po, 'compile_po', side_effect = AssertionError):
+      # Once for each content
+        self.assertTrue(po.mo_compiled_from(mofilepath, pofilepath))
+
+      with open(pofilepath, 'wb') as fp:
+        fp.write(b'msgid "invalid\n')
+      self.assertEqual(i18n.text._po_to_compile(i18n.text._scan_locale_dir(dirpath)['en'], 'both'), pofilepath)
+
+    return None
+
+
+class TestMappedTranslations(unittest.TestCase):
+
+  def assert_same_translations(self, _mapped: gettext.NullTranslations, _expected: gettext.GNUTranslations) -> None:
+    self.assertEqual(_mapped.info(), _expected.info())
+    for key in ( *_expected._catalog, 'missing', ( 'missing', 0 ) ):
+      if isinstance(key, tuple):
+        ( msgid, n ) = key
+        for n in range(5):
+          if '\x04' in msgid:
+            ( context, msgid ) = msgid.split('\x04')
+            self.assertEqual(_mapped.npgettext(context, msgid, 'plural', n), _expected.npgettext(context, msgid, 'plural', n))
+          else:
+            self.assertEqual(_mapped.ngettext(msgid, 'plural', n), _expected.ngettext(msgid, 'plural', n))
+      elif '\x04' in key:
+        ( context, msgid ) = key.split('\x04')
+        self.assertEqual(_mapped.pgettext(context, msgid), _expected.pgettext(context, msgid))
+      else:
+        self.assertEqual(_mapped.gettext(key), _expected.gettext(key))
+    return None
+
+  def test_same_as_gnu_translations(self) -> None:
+
+    for mofilepath in glob.glob(os.path.join(os.path.dirname(__file__), '..', '**', '*.mo'), recursive = True):
+      with self.subTest(mofilepath = mofilepath):
+        with open(mofilepath, 'rb') as fp:
+          expected = gettext.GNUTranslations(fp)
+        with open(mofilepath, 'rb') as fp:
+          mapped = i18n.MappedTranslations(fp)
+        self.assert_same_translations(mapped, expected)
+
+      # Without a hash table, binary search
+        with open(mofilepath, 'rb') as fp:
+          data = bytearray(fp.read())
+        data[20:24] = bytes(4)
+        self.assert_same_translations(i18n.MappedTranslations(io.BytesIO(bytes(data))), expected)
+
+    return None
+
+  def test_catalog_class(self) -> None:
+
+    catalog_class = i18n.Translation.catalog_class
+    i18n.Translation.catalog_class = i18n.MappedTranslations
+    try:
+      tdl = i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), i18n.TranslationLanguages('en'))
+      i18n.translation_registry.evict(tdl.key)
+      tt = i18n.Translation(tdl)
+    finally:
+      i18n.Translation.catalog_class = catalog_class
+      i18n.translation_registry.evict(tdl.key)
+    self.assertIsInstance(tt._translations, i18n.MappedTranslations)
+    msgid = '/sentence/with_pronoun/subject/test1'
+    self.assertEqual(tt.nget(msgid, msgid, 2, { 'names': 'they', 'pronoun': 'they both', 'food': 'pizza' }, i18n.PronounTranslation.PronounPersonEnum.Third_Person), 'When they go out to eat, they both usually order pizza.')
+
+    return None
+
+  def test_from_buffer(self) -> None:
+
+    mo_data = po.compile_po(TestPo.po_data)
+    buffer = b'\x00' * 24 + mo_data + b'\xff' * 8
+    mapped = i18n.MappedTranslations.from_buffer(buffer, 24, len(mo_data))
+    self.assert_same_translations(mapped, gettext.GNUTranslations(io.BytesIO(mo_data)))
+    for i in range(100):
+      self.assertEqual(mapped.gettext(f'/missing/{i}'), f'/missing/{i}')
+    self.assertLessEqual(len(mapped._decoded), mapped._count)
+      # Misses are not kept
+    with self.assertRaises(OSError):
+      i18n.MappedTranslations.from_buffer(buffer, 24, 20)
+
+    return None
+
+
+class TestCatalogSnapshot(unittest.TestCase):
+
+  def test_snapshot(self) -> None:
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      locdirpath = os.path.join(dirpath, 'locales')
+      for ( lang, version ) in ( ( 'en', 'English' ), ( 'fr', 'French' ) ):
+        os.makedirs(os.path.join(locdirpath, lang, 'LC_MESSAGES'))
+        with open(os.path.join(locdirpath, lang, 'LC_MESSAGES', 'snap.po'), 'wb') as fp:
+          fp.write(TestPo.po_data.replace(b'With context', version.encode('utf-8')))
+      snapshot_filepath = os.path.join(dirpath, 'app.snapshot')
+      t_domain = i18n.TranslationDomain('snap', locdirpath = locdirpath)
+      self.assertEqual(i18n.build_snapshot(snapshot_filepath, [ t_domain ]), 4)
+
+      snapshot = i18n.CatalogSnapshot(snapshot_filepath)
+      self.assertEqual(len(snapshot), 4)
+      self.assertEqual(snapshot.languages(locdirpath, 'snap'), ( 'en', 'fr' ))
+      self.assertEqual(snapshot.languages(os.path.join(dirpath, 'other'), 'snap'), ())
+      self.assertIn(( i18n.TranslationDomain('pronouns')._locdirpath, 'pronouns', 'en' ), snapshot)
+      self.assertEqual(snapshot.catalog(locdirpath, 'snap', 'fr').pgettext('my-context', 'simple'), 'French')
+      with open(os.path.join(locdirpath, 'en', 'LC_MESSAGES', 'snap.po'), 'rb') as fp:
+        expected = gettext.GNUTranslations(io.BytesIO(po.compile_po(fp.read())))
+      TestMappedTranslations.assert_same_translations(self, snapshot.catalog(locdirpath, 'snap', 'en'), expected)
+
+      shutil.rmtree(os.path.join(locdirpath, 'fr'))
+      i18n.clear_locale_cache()
+      tdl = i18n.TranslationDomainLanguage(t_domain, i18n.TranslationLanguages('fr'))
+      i18n.translation_registry.evict(tdl.key)
+      self.assertIs(i18n.use_snapshot(snapshot_filepath), i18n.Translation.snapshot)
+      try:
+        tdl = i18n.TranslationDomainLanguage(t_domain, i18n.TranslationLanguages('fr'))
+        self.assertEqual(tdl.language, 'fr')
+        t_context = i18n.TranslationContext(i18n.Translation(tdl), 'my-context')
+        self.assertIsInstance(t_context._translation._translations, i18n.MappedTranslations)
+        self.assertEqual(t_context.get('simple'), 'French')
+        self.assertEqual(t_context._translation.nget('one', 'many', 2, { 'n': 2 }), '2 items')
+        i18n.translation_registry.evict(tdl.key)
+
+        i18n.clear_locale_cache()
+        with mock.patch('i18n.text._scan_locale_dir', side_effect = AssertionError):
+        # The locale directory of a domain in the snapshot is not scanned
+          tdl = i18n.TranslationDomainLanguage(i18n.TranslationDomain('snap', locdirpath = locdirpath), i18n.TranslationLanguages('fr_CA'))
+          self.assertEqual(tdl.language, 'fr')
+          self.assertEqual(i18n.TranslationContext(i18n.Translation(tdl), 'my-context').get('simple'), 'French')
+          i18n.translation_registry.evict(tdl.key)
+
+        other_locdirpath = os.path.join(dirpath, 'other')
+        os.makedirs(os.path.join(other_locdirpath, 'fr', 'LC_MESSAGES'))
+        with open(os.path.join(other_locdirpath, 'fr', 'LC_MESSAGES', 'snap.po'), 'wb') as fp:
+          fp.write(TestPo.po_data.replace(b'With context', b'Other'))
+        tdl = i18n.TranslationDomainLanguage(i18n.TranslationDomain('snap', locdirpath = other_locdirpath), i18n.TranslationLanguages('fr'))
+          # Same domain in a locale directory that is not in the snapshot
+        self.assertEqual(tdl._pofilepath, os.path.join(other_locdirpath, 'fr', 'LC_MESSAGES', 'snap.po'))
+      finally:
+        i18n.use_snapshot(None)
+
+      with open(snapshot_filepath, 'r+b') as fp:
+        fp.write(b'NOTSNAP')
+      with self.assertRaises(OSError):
+        i18n.CatalogSnapshot(snapshot_filepath)
+
+    return None
+
+
+class TestPluralRules(unittest.TestCase):
+
+  def test_same_as_c2py(self) -> None:
+
+    numbers = ( *range(-3, 1000), 1001, 10011, 123456789, 2 ** 70 )
+    for expression in ( *plural._builtin_rules, 'n%10==1 ? 0 : 1', '(n==1 ? 0 : n<7 ? 1 : 2)' ):
+      with self.subTest(expression = expression):
+        expected = gettext.c2py(expression)
+        rule = plural.plural_rule(expression)
+        self.assertEqual([ rule(n) for n in numbers ], [ expected(n) for n in numbers ])
+        self.assertEqual(plural.evaluate_many(rule, numbers), [ expected(n) for n in numbers ])
+    with self.assertRaises(ValueError):
+      plural.plural_rule('n ++ 1')
+
+    return None
+
+  def test_shared(self) -> None:
+
+    self.assertIs(plural.plural_rule('n != 1'), plural.plural_rule(' ( n!=1 );'))
+    self.assertIsNot(plural.plural_rule('(n==1) ? 0 : (n>=2 && n<=4) ? 1 : 2'), plural.plural_rule('(n==1) ? 0 : (n>=2 && n<=5) ? 1 : 2'))
+    t_langs = i18n.TranslationLanguages('en')
+    tt = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), t_langs))
+    self.assertIs(tt._translations.plural, t_langs.conjunctions._translation._translations.plural)
+    self.assertIs(tt._translations.plural, plural.plural_rule('n != 1'))
+    self.assertEqual(tt.plural_indexes([ 0, 1, 2, 1000 ]), [ 1, 0, 1, 1 ])
+
+    return None
+
+
+class TestCurrentLanguages(unittest.TestCase):
+
+  msgid: Final[str] = '/sentence/with_pronoun/subject/test1'
+  text_dict: Final[dict] = { 'names': 'Alex', 'pronoun': 'they', 'food': 'pizza' }
+
+  def test_context_manager(self) -> None:
+
+    with i18n.CurrentLanguages('en_US', 'en') as t_langs:
+      self.assertIs(i18n.current_languages(), t_langs)
+      self.assertEqual(t_langs._langs, ( 'en_US', 'en' ))
+      with i18n.CurrentLanguages('en'):
+        self.assertEqual(i18n.current_languages()._langs, ( 'en', ))
+      self.assertIs(i18n.current_languages(), t_langs)
+    self.assertIs(i18n.current_languages(), i18n.shared_languages())
+    self.assertIs(i18n.CurrentLanguages('en').translation_languages, i18n.shared_languages('en'))
+    stats = i18n.translation_registry.stats
+    i18n.shared_languages('en_US', 'en', 'xx')
+    i18n.shared_current_translation(i18n.TranslationDomain('test'))
+    self.assertEqual(i18n.translation_registry.stats, stats)
+
+    return None
+
+  def test_current_translation(self) -> None:
+
+    tt = i18n.CurrentTranslation(i18n.TranslationDomain('test'))
+    ttc = i18n.CurrentTranslation(i18n.TranslationDomain('test'), 'test_context')
+    person = i18n.PronounTranslation.PronounPersonEnum.Third_Person
+
+    with i18n.CurrentLanguages('en'):
+      resolved = tt.resolve()
+      self.assertIsInstance(resolved, i18n.Translation)
+      self.assertIs(tt.resolve(), resolved)
+      self.assertEqual(tt.language, 'en')
+      self.assertEqual(tt.nget(self.msgid, self.msgid, 3, self.text_dict, person), 'When Alex go out to eat, they usually order pizza.')
+      self.assertIsInstance(ttc.resolve(), i18n.TranslationContext)
+      self.assertEqual(ttc.nget(self.msgid, self.msgid, 1, self.text_dict, person), 'When Alex goes out to eat, they usually orders pizza.')
+    with i18n.CurrentLanguages('en_US', 'en'):
+      self.assertIsNot(tt.resolve(), resolved)
+
+    with self.assertNoLogs(level = logging.WARNING), mock.patch.object(i18n.CurrentTranslation, 'resolved_max_size', 2):
+    # The catalogs loaded by tt are reused without a warning, and at most resolved_max_size languages are kept
+      tb = i18n.CurrentTranslation(i18n.TranslationDomain('test'))
+      for codes in ( ( 'en', ), ( 'en_US', 'en' ), ( 'en_GB', 'en' ), ( 'en', ) ):
+        self.assertEqual(tb.resolve(i18n.shared_languages(*codes))._translations, tt.resolve(i18n.shared_languages(*codes))._translations)
+      self.assertEqual(len(tb._resolved), 2)
+
+    return None
+
+  def test_tasks_and_decorator(self) -> None:
+
+    @i18n.CurrentLanguages('en_US', 'en')
+    async def task(_language_codes: tuple[str]) -> tuple[str]:
+      with i18n.CurrentLanguages(*_language_codes):
+        await asyncio.sleep(0.01)
+        return i18n.current_languages()._langs
+
+    @i18n.CurrentLanguages('en_US', 'en')
+    def function() -> tuple[str]:
+      return i18n.current_languages()._langs
+
+    async def main() -> list:
+      return await asyncio.gather(task(( 'en', )), task(( 'en_US', 'en' )), task(( 'en', )))
+
+    self.assertEqual(asyncio.run(main()), [ ( 'en', ), ( 'en_US', 'en' ), ( 'en', ) ])
+
+    shared = i18n.CurrentLanguages('en')
+      # One instance entered by overlapping tasks, ex: at module level
+
+    async def shared_task(_delay: float) -> tuple[str]:
+      with shared:
+        await asyncio.sleep(_delay)
+        return i18n.current_languages()._langs
+
+    async def shared_main() -> list:
+      return await asyncio.gather(shared_task(0.01), shared_task(0.02))
+
+    self.assertEqual(asyncio.run(shared_main()), [ ( 'en', ), ( 'en', ) ])
+    self.assertEqual(function(), ( 'en_US', 'en' ))
+    self.assertIs(i18n.current_languages(), i18n.shared_languages())
+
+    return None
+
+  def test_lazy(self) -> None:
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      for ( lang, label, greeting ) in ( ( 'en', 'Name', 'Hello {name}' ), ( 'fr', 'Nom', 'Bonjour {name}' ) ):
+        os.makedirs(os.path.join(dirpath, lang, 'LC_MESSAGES'))
+        with open(os.path.join(dirpath, lang, 'LC_MESSAGES', 'lazy.po'), 'w', encoding = 'utf-8') as fp:
+          fp.write(f'msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n\nmsgid "/label"\nmsgstr "{label}"\n\nmsgctxt "greeting"\nmsgid "/greeting"\nmsgstr "{greeting}"\n')
+      t_domain = i18n.TranslationDomain('lazy', locdirpath = dirpath)
+      label = i18n.CurrentTranslation(t_domain).lazy('/label')
+      greeting = i18n.CurrentTranslation(t_domain, 'greeting').lazy('/greeting', name = label)
+        # Nothing is loaded until they are converted to str
+
+      with i18n.CurrentLanguages('fr', 'en'):
+        self.assertEqual(str(label), 'Nom')
+        self.assertEqual(f'{greeting:>16}', '     Bonjour Nom')
+        with mock.patch.object(i18n.CurrentTranslation, 'resolve', side_effect = AssertionError):
+          self.assertEqual(f'{label}: {greeting}', 'Nom: Bonjour Nom')
+        fr_label = label._current_translation.resolve()
+        catalog = fr_label._translations
+        reloaded = gettext.NullTranslations()
+        reloaded.add_fallback(catalog)
+        reloaded.gettext = lambda _msgid: 'Libell\u00e9' if _msgid == '/label' else catalog.gettext(_msgid)
+        fr_label._swap(reloaded, dict())
+          # Only the catalog of the field is reloaded
+        self.assertEqual(str(greeting), 'Bonjour Libell\u00e9')
+        fr_label._swap(catalog, dict())
+        self.assertEqual(str(greeting), 'Bonjour Nom')
+        self.assertEqual(len(greeting._rendered), 1)
+        self.assertEqual(greeting._rendered.get(i18n.current_languages()._langs)[0][0](), greeting._current_translation.resolve()._translation._translations)
+      with i18n.CurrentLanguages('en'):
+        self.assertEqual(str(greeting), 'Hello Name')
+        tt = i18n.Translation(i18n.TranslationDomainLanguage(t_domain, i18n.current_languages()))
+      with i18n.CurrentLanguages('fr', 'en'):
+        self.assertEqual(str(tt.lazy('/label')), 'Nom')
+        self.assertEqual(str(i18n.TranslationContext(tt, 'greeting').lazy('/greeting', name = 'Alex')), 'Bonjour Alex')
+      self.assertIs(tt.lazy('/label')._current_translation, i18n.shared_current_translation(t_domain))
+      self.assertEqual(repr(label), "LazyText('/label')")
+      with mock.patch.object(i18n.LazyText, 'rendered_max_size', 2):
+        bounded = i18n.CurrentTranslation(t_domain).lazy('/label')
+        for codes in ( ( 'fr', 'en' ), ( 'en', ), ( 'fr', ), ( 'en', ) ):
+          with i18n.CurrentLanguages(*codes):
+            str(bounded)
+        self.assertEqual(len(bounded._rendered), 2)
+      i18n.clear_locale_cache()
+
+    return None
+
+
+class TestAsyncLoading(unittest.TestCase):
+
+  def test_aload(self) -> None:
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      os.makedirs(os.path.join(dirpath, 'en', 'LC_MESSAGES'))
+      with open(os.path.join(dirpath, 'en', 'LC_MESSAGES', 'async.po'), 'w', encoding = 'utf-8') as fp:
+        fp.write('msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n\nmsgid "/label"\nmsgstr "Name"\n')
+      t_domain = i18n.TranslationDomain('async', locdirpath = dirpath)
+      i18n.clear_locale_cache()
+      load = i18n.Translation._load
+      load_threads = []
+
+      def thread_load(_translation_domain_language: i18n.TranslationDomainLanguage) -> gettext.NullTranslations:
+        load_threads.append(threading.current_thread())
+        time.sleep(0.05)
+        return load(_translation_domain_language)
+
+      async def main() -> tuple:
+        t_langs = await i18n.TranslationLanguages.aresolve('en')
+        translations = await asyncio.gather(*( i18n.Translation.aload(t_domain, t_langs) for i in range(5) ))
+        ct = i18n.CurrentTranslation(t_domain)
+        with i18n.CurrentLanguages(t_langs):
+          resolved = await ct.aresolve()
+          rendered = await ct.arender_many([ ( '/label', None, None, None, None ), ( '/missing', None, None, { 'x': 1 }, None ) ])
+        return ( t_langs, translations, resolved, rendered )
+
+      with mock.patch.object(i18n.Translation, '_load', side_effect = thread_load):
+        ( t_langs, translations, resolved, rendered ) = asyncio.run(main())
+      self.assertIs(t_langs, i18n.shared_languages('en'))
+      self.assertEqual(len(load_threads), 1)
+      self.assertIsNot(load_threads[0], threading.current_thread())
+      self.assertTrue(all(translation is translations[0] for translation in translations))
+      self.assertIs(resolved._translations, translations[0]._translations)
+      self.assertIs(i18n.Translation(i18n.TranslationDomainLanguage(t_domain, t_langs))._translations, translations[0]._translations)
+      self.assertEqual(rendered, [ 'Name', '/missing' ])
+      with self.assertNoLogs(level = logging.WARNING), mock.patch.object(i18n.Translation, 'capture_caller', True), \
+          mock.patch.object(i18n.TranslationRegistry, 'get_or_load', side_effect = AssertionError), \
+          mock.patch.object(i18n.text, '_caller_frame_summary', side_effect = AssertionError):
+      # A loaded catalog is reused from the registry, without loading it on the event loop or capturing the caller
+        cached = asyncio.run(i18n.Translation.aload(t_domain, t_langs))
+      self.assertIs(cached._translations, translations[0]._translations)
+      self.assertIn(cached, i18n.text._live_translations)
+      self.assertIs(asyncio.run(i18n.TranslationLanguages.aresolve(None)), i18n.shared_languages(None))
+      self.assertEqual(i18n.text._executor_calls, dict())
+      i18n.clear_locale_cache()
+
+    return None
+
+
+class TestBulk(unittest.TestCase):
+
+  def test_render(self) -> None:
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      for ( lang, plural, greeting, apples ) in ( ( 'en', 'n != 1', 'Hello {name}', ( '{n} apple', '{n} apples' ) ), ( 'fr', 'n>1', 'Bonjour {name}', ( '{n} pomme', '{n} pommes' ) ) ):
+        os.makedirs(os.path.join(dirpath, lang, 'LC_MESSAGES'))
+        with open(os.path.join(dirpath, lang, 'LC_MESSAGES', 'bulk.po'), 'w', encoding = 'utf-8') as fp:
+          fp.write(f'msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\nPlural-Forms: nplurals=2; plural={plural};\\n"\n\nmsgid "/greeting"\nmsgstr "{greeting}"\n\n'
+            f'msgid "/apples"\nmsgid_plural "/apples/plural"\nmsgstr[0] "{apples[0]}"\nmsgstr[1] "{apples[1]}"\n')
+      t_domain = i18n.TranslationDomain('bulk', locdirpath = dirpath)
+      rows = [ ( '/greeting', None, None, { 'name': f'name{i}' }, None ) if i % 2 == 0 else ( '/apples', '/apples/plural', i // 2, { 'n': i // 2 }, i18n.PronounTranslation.PronounPersonEnum.Third_Person ) for i in range(9) ]
+      expected = [ ( f'Bonjour name{i}', f'Hello name{i}' ) if i % 2 == 0 else ( f'{i // 2} pomme{"s" if i // 2 > 1 else ""}', f'{i // 2} apple{"s" if i // 2 != 1 else ""}' ) for i in range(9) ]
+
+      self.assertEqual(list(bulk.render(rows, t_domain, languages = [ 'fr', 'en' ], workers = 0, chunk_size = 2)), expected)
+      self.assertEqual(list(bulk.render(iter(rows), t_domain, languages = [ 'fr', 'en' ], workers = 3, chunk_size = 2)), expected)
+        # 2 workers for 'fr'
+
+      input_filepath = os.path.join(dirpath, 'rows.jsonl')
+      with open(input_filepath, 'w', encoding = 'utf-8') as fp:
+        fp.write('{"msgid": "/greeting", "fields": {"name": "Alex"}}\n\n{"msgid": "/apples", "msgid_plural": "/apples/plural", "n": 2, "fields": {"n": 2}}\n')
+      output_filepath = os.path.join(dirpath, 'rendered.csv')
+      arguments = argparse.Namespace(domain = 'bulk', locdir = dirpath, languages = [ 'fr_CA:fr', 'en' ], context = None, workers = 1, chunk_size = 1000, input = input_filepath, output = output_filepath, input_format = None, output_format = None)
+      with mock.patch('sys.stderr', io.StringIO()) as stderr:
+        self.assertEqual(bulk.main(arguments), 0)
+      self.assertIn('2 rows in 2 languages', stderr.getvalue())
+      with open(output_filepath, encoding = 'utf-8', newline = '') as fp:
+        self.assertEqual(fp.read(), 'fr_CA,en\r\nBonjour Alex,Hello Alex\r\n2 pommes,2 apples\r\n')
+      self.assertEqual(list(bulk.read_rows(io.StringIO('msgid,n,name\n/greeting,,Alex\n'), 'csv')), [ ( '/greeting', None, None, { 'name': 'Alex' }, None ) ])
+      i18n.clear_locale_cache()
+
+    return None
+
+
+class TestLocaleNegotiator(unittest.TestCase):
+
+  def test_language_tags(self) -> None:
+
+    for tag in ( 'en_US', 'en-us', 'EN-US', 'en_US.UTF-8' ):
+      self.assertEqual(i18n.normalize_language_code(tag), 'en_US')
+    self.assertEqual(i18n.normalize_language_code('zh-hant-tw'), 'zh_Hant_TW')
+    self.assertEqual(i18n.normalize_language_code('es-419'), 'es_419')
+    self.assertEqual(i18n.normalize_language_code('sr_RS.UTF-8@Latin'), 'sr_RS@latin')
+    for tag in ( '*', 'C', '', 'en--us', 'é' ):
+      self.assertIsNone(i18n.normalize_language_code(tag))
+
+    self.assertEqual(i18n.truncation_chain('zh_Hant_TW'), ( 'zh_Hant_TW', 'zh_Hant', 'zh' ))
+    self.assertEqual(i18n.truncation_chain('en_US_x_abc'), ( 'en_US_x_abc', 'en_US', 'en' ))
+    self.assertEqual(i18n.truncation_chain('sr_RS@latin'), ( 'sr_RS@latin', 'sr@latin', 'sr_RS', 'sr' ))
+
+    self.assertEqual(i18n.parse_accept_language('fr-CH, fr;q=0.9, en;q=0.8, de;q=0.7, *;q=0.5'), [ 'fr_CH', 'fr', 'en', 'de' ])
+    self.assertEqual(i18n.parse_accept_language('de;q=0.5, en-GB;q=0.8, ja;q=0, en-gb, nl;q=x'), [ 'en_GB', 'de' ])
+    self.assertEqual(i18n.parse_accept_language(''), [])
+
+    return None
+
+  def test_negotiate(self) -> None:
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      for lang in ( 'en', 'en_US', 'fr', 'pt_BR', 'zh_Hant', 'de' ):
+        os.makedirs(os.path.join(dirpath, lang, 'LC_MESSAGES'))
+        if lang != 'de':
+          with open(os.path.join(dirpath, lang, 'LC_MESSAGES', 'app.mo'), 'wb') as fp:
+            fp.write(b'')
+      negotiator = i18n.LocaleNegotiator(i18n.TranslationDomain('app', locdirpath = dirpath), max_size = 2)
+
+    self.assertEqual(negotiator.installed_languages, ( 'en', 'en_US', 'fr', 'pt_BR', 'zh_Hant' ))
+    self.assertEqual(negotiator.negotiate('zh-Hant-TW, fr-CA;q=0.8, de;q=0.7'), ( 'zh_Hant', 'fr', 'en' ))
+    self.assertEqual(negotiator.negotiate('en-us,en;q=0.5'), ( 'en_US', 'en' ))
+    self.assertEqual(negotiator.negotiate('pt'), ( 'pt_BR', 'en' ))
+    self.assertEqual(negotiator.negotiate([ 'fr', 'en_US.UTF-8' ]), ( 'fr', 'en_US', 'en' ))
+    self.assertEqual(negotiator.negotiate(None), ( 'en', ))
+    self.assertEqual(i18n.LocaleNegotiator(i18n.TranslationDomain('test'), default_language = 'fr').negotiate('de, en'), ( 'en', 'fr' ))
+
+    negotiator.negotiate('')
+    self.assertEqual(negotiator.stats, { 'hits': 1, 'misses': 5, 'size': 2, 'max_size': 2 })
+    t_langs = negotiator.languages('fr;q=0.5, xx')
+    self.assertIs(t_langs, i18n.shared_languages('fr', 'en'))
+    self.assertEqual(t_langs._langs, ( 'fr', 'en' ))
+
+    return None
+
+
+class TestTranslationReloader(unittest.TestCase):
+
+  po_template: Final[str] = r"""msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\n"
+"Plural-Forms: nplurals=2; plural=n != 1;\n"
+
+msgid "/greeting"
+msgstr "Hello {name} ({version})"
+
+msgid "/item"
+msgid_plural "/items"
+msgstr[0] "{n} item ({version})"
+msgstr[1] "{n} items ({version})"
+"""
+
+  def write_po(self, _pofilepath: str, _version: int) -> None:
+    with open(_pofilepath, 'wb') as fp:
+      fp.write(self.po_template.replace('{version}', str(_version)).encode('utf-8'))
+    os.utime(_pofilepath, ns = ( _version * 1000000000, _version * 1000000000 ))
+    return None
+
+  def test_reload_under_load(self) -> None:
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      os.makedirs(os.path.join(dirpath, 'en', 'LC_MESSAGES'))
+      pofilepath = os.path.join(dirpath, 'en', 'LC_MESSAGES', 'hot.po')
+      self.write_po(pofilepath, 1)
+      t_translation = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('hot', locdirpath = dirpath), i18n.TranslationLanguages('en')))
+      reloader = i18n.TranslationReloader()
+      self.assertEqual(reloader.check(), 0)
+
+      versions = 10
+      valid = set(f'Hello Alex ({v})' for v in range(1, versions + 1)) | set(f'3 items ({v})' for v in range(1, versions + 1))
+      results = set()
+      errors = []
+      stop = threading.Event()
+
+      def hammer() -> None:
+        try:
+          while not stop.is_set():
+            results.add(t_translation.get('/greeting', { 'name': 'Alex' }))
+            results.add(t_translation.nget('/item', '/items', 3, { 'n': 3 }))
+        except Exception as e:
+          errors.append(e)
+        return None
+
+      threads = [ threading.Thread(target = hammer) for i in range(4) ]
+      for thread in threads:
+        thread.start()
+      try:
+        for version in range(2, versions + 1):
+          self.write_po(pofilepath, version)
+          self.assertEqual(reloader.check(), 1)
+          time.sleep(0.002)
+      finally:
+        stop.set()
+        for thread in threads:
+          thread.join()
+
+      self.assertEqual(errors, [])
+      self.assertLessEqual(results, valid)
+      self.assertEqual(t_translation.get('/greeting', { 'name': 'Alex' }), f'Hello Alex ({versions})')
+      self.assertEqual(i18n.translation_registry.get(i18n.TranslationDomainLanguage(i18n.TranslationDomain('hot', locdirpath = dirpath), i18n.TranslationLanguages('en')).key)[1].gettext('/greeting'), f'Hello {{name}} ({versions})')
+
+      with open(pofilepath, 'wb') as fp:
+        fp.write(b'msgid "/greeting"\nsyntax error\n')
+      with self.assertLogs(level = logging.ERROR):
+        self.assertEqual(reloader.check(), 0)
+      self.assertEqual(t_translation.get('/greeting', { 'name': 'Alex' }), f'Hello Alex ({versions})')
+
+      stats = reloader.stats
+      self.assertEqual(( stats['generation'], stats['failures'] ), ( versions - 1, 1 ))
+      self.assertGreater(stats['max_latency'], 0)
+      i18n.clear_locale_cache()
+
+    return None
+
+  def test_background_thread(self) -> None:
+
+    for use_inotify in ( None, False ):
+      with tempfile.TemporaryDirectory() as dirpath:
+        os.makedirs(os.path.join(dirpath, 'en', 'LC_MESSAGES'))
+        pofilepath = os.path.join(dirpath, 'en', 'LC_MESSAGES', 'background.po')
+        self.write_po(pofilepath, 1)
+        t_translation = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('background', locdirpath = dirpath), i18n.TranslationLanguages('en')))
+        with i18n.TranslationReloader(0.02, use_inotify = use_inotify) as reloader:
+          self.assertTrue(reloader.running)
+          self.write_po(pofilepath, 2)
+          for i in range(500):
+            if t_translation.get('/greeting', { 'name': 'Alex' }) != 'Hello Alex (1)':
+              break
+            time.sleep(0.01)
+        self.assertFalse(reloader.running)
+        self.assertEqual(t_translation.get('/greeting', { 'name': 'Alex' }), 'Hello Alex (2)')
+        i18n.clear_locale_cache()
+
+    return None
+
+  def test_registry_catalogs(self) -> None:
+  # Catalogs used through short-lived Translation instances are reloaded in the registry
+
+    with tempfile.TemporaryDirectory() as dirpath:
+      os.makedirs(os.path.join(dirpath, 'en', 'LC_MESSAGES'))
+      pofilepath = os.path.join(dirpath, 'en', 'LC_MESSAGES', 'short.po')
+      self.write_po(pofilepath, 1)
+      def greeting() -> str:
+        return i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('short', locdirpath = dirpath), i18n.TranslationLanguages('en'))).get('/greeting', { 'name': 'Alex' })
+      self.assertEqual(greeting(), 'Hello Alex (1)')
+      gc.collect()
+      reloader = i18n.TranslationReloader()
+      self.assertEqual(reloader.check(), 0)
+      self.write_po(pofilepath, 2)
+      self.assertEqual(reloader.check(), 1)
+      with self.assertLogs(level = logging.WARNING):
+        self.assertEqual(greeting(), 'Hello Alex (2)')
+      i18n.translation_registry.evict(i18n.TranslationDomainLanguage(i18n.TranslationDomain('short', locdirpath = dirpath), i18n.TranslationLanguages('en')).key)
+      gc.collect()
+      self.write_po(pofilepath, 3)
+      self.assertEqual(reloader.check(), 0)
+        # Neither in the registry nor in use
+      i18n.clear_locale_cache()
+
+    return None
+
+
+class TestPreload(unittest.TestCase):
+
+  def test_preload(self) -> None:
+
+    test_locdirpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'i18n', 'locales')
+    i18n.translation_registry.evict(i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), i18n.TranslationLanguages('en')).key)
+    translations = i18n.preload([ 'test' ], 'all', locale_roots = [ test_locdirpath ], templates = True)
+    self.assertEqual([ type(t) for t in translations ], [ i18n.Translation, i18n.PronounTranslation, i18n.Translation ])
+    self.assertEqual(translations[0].language, 'en')
+    self.assertIn(translations[0]._translation_domain_language.key, i18n.translation_registry)
+    self.assertIs(translations[1], i18n.shared_languages('en').pronouns)
+    self.assertIs(translations[2], i18n.shared_languages('en').conjunctions._translation)
+    catalog = translations[0]._translations._catalog
+    self.assertLessEqual(set(text for key, text in catalog.items() if key != ''), set(translations[0]._templates))
+
+    with self.assertNoLogs(level = logging.WARNING):
+      tt = i18n.Translation(i18n.TranslationDomainLanguage(i18n.TranslationDomain('test'), i18n.TranslationLanguages('en')))
+    self.assertIs(tt._translations, translations[0]._translations)
+    self.assertIs(tt._templates, translations[0]._templates)
+
+    with self.assertRaises(ValueError):
+      i18n.preload([ 'test' ])
+    self.assertEqual(len(i18n.preload([ i18n.TranslationDomain('test') ], [ ( 'en_US', 'en' ) ], freeze = True)), 3)
+    self.assertGreater(gc.get_freeze_count(), 0)
+    gc.unfreeze()
+
+    return None
+
 
 mainName = '__main__'
 